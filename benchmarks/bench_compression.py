@@ -0,0 +1,68 @@
+"""Bytes saved and CPU cost of gzip/brotli per list endpoint.
+
+    python benchmarks/bench_compression.py --rows 200
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from common import setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from engir.compression import brotli, compress_bytes  # noqa: E402
+from engir.models import Classroom, Enrollment, Session, Teacher  # noqa: E402
+
+ENDPOINTS = ('/api/classes/?limit=100', '/api/enrollments/?limit=100', '/api/sessions/?limit=100')
+
+
+def seed(rows: int):
+    teacher = Teacher.objects.create(full_name='Bench Mentor', email='bench@example.com', bio='Mentor ' * 20)
+    classrooms = [
+        Classroom.objects.create(
+            teacher=teacher, title=f'Class {index}', description='Hands-on livestream class. ' * 5, tags=['bench']
+        )
+        for index in range(max(rows // 10, 1))
+    ]
+    Session.objects.bulk_create(
+        Session(classroom=classrooms[index % len(classrooms)], title=f'Session {index}',
+                starts_at=timezone.now() + timedelta(hours=index), stream_key=f'KEY{index:08d}',
+                playback_url=f'https://live.engir.app/watch/KEY{index:08d}')
+        for index in range(rows)
+    )
+    Enrollment.objects.bulk_create(
+        Enrollment(classroom=classrooms[index % len(classrooms)], full_name=f'Learner {index}',
+                   email=f'learner{index}@example.com', source='landing')
+        for index in range(rows)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    encodings = ['gzip'] + (['br'] if brotli else [])
+
+    with test_database():
+        seed(args.rows)
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench'))
+        print(f'{"endpoint":<32}{"encoding":<10}{"raw":>10}{"encoded":>10}{"saved":>8}{"cpu/resp":>12}')
+        for endpoint in ENDPOINTS:
+            body = client.get(endpoint, HTTP_ACCEPT_ENCODING='identity', secure=True).content
+            for encoding in encodings:
+                started = time.thread_time()
+                for _ in range(args.repeat):
+                    encoded = compress_bytes(body, encoding)
+                cpu_ms = (time.thread_time() - started) * 1000 / args.repeat
+                saved = 1 - len(encoded) / len(body)
+                print(f'{endpoint:<32}{encoding:<10}{len(body):>10}{len(encoded):>10}{saved:>8.0%}{cpu_ms:>10.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Cost of one password hash per hasher configuration.
+
+Use it to pick ENGIR_PBKDF2_ITERATIONS / ENGIR_ARGON2_* for the production CPU:
+aim for roughly 50-250 ms per hash on a single core.
+
+    python benchmarks/bench_hashing.py --repeat 5
+"""
+import argparse
+import time
+
+from common import setup_django
+
+setup_django()
+
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher  # noqa: E402
+
+
+def pbkdf2(iterations):
+    return type('BenchPBKDF2', (PBKDF2PasswordHasher,), {'iterations': iterations})
+
+
+def argon2(time_cost, memory_cost, parallelism):
+    attrs = {'time_cost': time_cost, 'memory_cost': memory_cost, 'parallelism': parallelism}
+    return type('BenchArgon2', (Argon2PasswordHasher,), attrs)
+
+
+CONFIGS = [
+    ('pbkdf2 260k', pbkdf2(260_000)),
+    ('pbkdf2 600k', pbkdf2(600_000)),
+    ('argon2 t=2 m=64MiB p=1', argon2(2, 65536, 1)),
+    ('argon2 t=3 m=64MiB p=1', argon2(3, 65536, 1)),
+    ('argon2 t=2 m=100MiB p=8', argon2(2, 102400, 8)),
+]
+
+
+def single_hash_ms(hasher, repeat):
+    salt = hasher.salt()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        hasher.encode('correct horse battery staple', salt)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"hasher":<28}{"ms/hash":>10}')
+    for label, hasher_class in CONFIGS:
+        try:
+            print(f'{label:<28}{single_hash_ms(hasher_class(), args.repeat):>10.1f}')
+        except ValueError as exc:
+            print(f'{label:<28}{"skipped":>10}  ({exc})')
+
+
+if __name__ == '__main__':
+    main()
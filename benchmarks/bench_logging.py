@@ -0,0 +1,77 @@
+"""Compare request-thread logging throughput: plain StreamHandler vs AsyncStreamHandler.
+
+The stream simulates container stdout backpressure by sleeping on every write.
+
+    python benchmarks/bench_logging.py --records 2000 --threads 8 --write-latency-us 200
+"""
+import argparse
+import logging
+import threading
+import time
+
+from common import setup_django
+
+setup_django()
+
+from engir.log import AsyncStreamHandler, JSONFormatter, RequestContextFilter  # noqa: E402
+
+
+class SlowStream:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lines = 0
+
+    def write(self, data):
+        time.sleep(self.latency)
+        self.lines += 1
+
+    def flush(self):
+        pass
+
+
+def run(handler: logging.Handler, records: int, threads: int) -> float:
+    logger = logging.getLogger(f'bench.{id(handler)}')
+    logger.propagate = False
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    per_thread = records // threads
+
+    def work():
+        for index in range(per_thread):
+            logger.info('enrollment accepted', extra={'classroom_id': index % 50, 'source': 'bench'})
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--write-latency-us', type=float, default=200.0)
+    args = parser.parse_args()
+    latency = args.write_latency_us / 1_000_000
+
+    sync_handler = logging.StreamHandler(SlowStream(latency))
+    async_handler = AsyncStreamHandler(stream=SlowStream(latency), queue_size=args.records)
+    for handler in (sync_handler, async_handler):
+        handler.setFormatter(JSONFormatter())
+        handler.addFilter(RequestContextFilter())
+
+    sync_elapsed = run(sync_handler, args.records, args.threads)
+    async_elapsed = run(async_handler, args.records, args.threads)
+    async_handler.stop()
+
+    print(f'{args.records} records, {args.threads} threads, {args.write_latency_us:.0f}us per write')
+    for label, elapsed in (('StreamHandler', sync_elapsed), ('AsyncStreamHandler', async_elapsed)):
+        print(f'{label:<20} {elapsed * 1000:9.1f} ms on request threads  {args.records / elapsed:12.0f} records/s')
+    print(f'speed-up: {sync_elapsed / async_elapsed:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""CPU spent serializing list pages: ModelSerializer + JSONRenderer vs values() projection + FastJSONRenderer.
+
+    python benchmarks/bench_serialization.py --rows 1000 --repeat 5
+"""
+import argparse
+import time
+
+from common import setup_django, test_database
+
+setup_django()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from engir import projections  # noqa: E402
+from engir.models import Classroom, Enrollment, Session, Teacher  # noqa: E402
+from engir.renderers import FastJSONRenderer  # noqa: E402
+from engir.serializers import ClassroomSerializer, EnrollmentSerializer  # noqa: E402
+
+
+def seed(rows: int):
+    teacher = Teacher.objects.create(full_name='Bench Mentor', email='bench@example.com')
+    classrooms = [
+        Classroom.objects.create(teacher=teacher, title=f'Class {index}', capacity=rows, tags=['bench', 'demo'])
+        for index in range(rows)
+    ]
+    Session.objects.bulk_create(
+        Session(classroom=classroom, title='Kickoff', starts_at=timezone.now(), ends_at=timezone.now())
+        for classroom in classrooms
+    )
+    Enrollment.objects.bulk_create(
+        Enrollment(classroom=classrooms[index % 40], full_name=f'Learner {index}', email=f'l{index}@example.com')
+        for index in range(rows)
+    )
+
+
+def measure(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.rows)
+        cases = {
+            'classes': (
+                lambda: JSONRenderer().render(ClassroomSerializer(Classroom.objects.all(), many=True).data),
+                lambda: FastJSONRenderer().render(
+                    projections.represent_classrooms(projections.classroom_values(Classroom.objects.all()))
+                ),
+            ),
+            'enrollments': (
+                lambda: JSONRenderer().render(
+                    EnrollmentSerializer(
+                        Enrollment.objects.select_related('classroom', 'classroom__teacher', 'student'), many=True
+                    ).data
+                ),
+                lambda: FastJSONRenderer().render(
+                    projections.represent_enrollments(projections.enrollment_values(Enrollment.objects.all()))
+                ),
+            ),
+        }
+        print(f'{args.rows} rows, best of {args.repeat} (process CPU time, includes SQLite query time)')
+        for name, (baseline, fast) in cases.items():
+            slow_seconds = measure(baseline, args.repeat)
+            fast_seconds = measure(fast, args.repeat)
+            per_thousand = (slow_seconds - fast_seconds) * 1000 / args.rows * 1000
+            print(
+                f'{name:<12} serializer {slow_seconds * 1000:8.1f} ms   projection {fast_seconds * 1000:8.1f} ms'
+                f'   saved {per_thousand:7.1f} ms CPU per 1,000 rows'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import hashlib
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -43,6 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'engir.middleware.MetricsMiddleware',
+    'engir.middleware.RequestContextMiddleware',
+    'engir.middleware.CompressionMiddleware',
+    'engir.db_routing.ReplicaStickinessMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -93,6 +98,57 @@ else:
         }
     }
 
+# Read replicas: comma-separated PostgreSQL hosts, or SQLite files standing in for replicas locally.
+# Tests mirror every replica onto the primary test database.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv('ENGIR_DB_REPLICAS', '').split(','))):
+    alias = f'replica_{index}'
+    replica = dict(DATABASES['default'])
+    if DB_BACKEND == 'postgres':
+        host, _, port = location.strip().partition(':')
+        replica.update(HOST=host, PORT=port or replica['PORT'])
+    else:
+        replica['NAME'] = BASE_DIR / location.strip()
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['engir.db_routing.PrimaryReplicaRouter']
+# How long a client keeps reading from the primary after a write; cover the replication lag.
+REPLICA_STICKY_SECONDS = int(os.getenv('ENGIR_REPLICA_STICKY_SECONDS', '5'))
+
+# Cache: Redis shared by all workers when configured, process-local memory otherwise.
+REDIS_URL = os.getenv('ENGIR_REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'engir',
+        }
+    }
+
+# Password hashing: the first entry hashes new passwords, the rest still verify older hashes.
+PASSWORD_HASHER = os.getenv('ENGIR_PASSWORD_HASHER', 'pbkdf2').lower()
+PBKDF2_ITERATIONS = int(os.getenv('ENGIR_PBKDF2_ITERATIONS', 600000))
+ARGON2_TIME_COST = int(os.getenv('ENGIR_ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ENGIR_ARGON2_MEMORY_COST', 65536))  # KiB
+ARGON2_PARALLELISM = int(os.getenv('ENGIR_ARGON2_PARALLELISM', 1))
+PASSWORD_HASHERS = [
+    'engir.passwords.TunedPBKDF2PasswordHasher',
+    'engir.passwords.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if PASSWORD_HASHER == 'argon2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,14 +184,36 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'engir.authentication.DenylistJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'engir.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'engir.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 25,
+    # Trusted reverse proxies in front of the app. Throttles key on the client address these
+    # append to X-Forwarded-For; with 0 they use REMOTE_ADDR and ignore the header.
+    'NUM_PROXIES': int(os.getenv('ENGIR_NUM_PROXIES', 0)),
+}
+
+# Token-bucket rates ('N/period': bucket of N refilled over the period), see engir/throttling.py.
+# Register/login buckets are per client IP; enrollment has per-IP and per-user buckets.
+THROTTLE_RATES = {
+    'register': os.getenv('ENGIR_THROTTLE_REGISTER', '20/hour'),
+    'login': os.getenv('ENGIR_THROTTLE_LOGIN', '30/min'),
+    'login_username': os.getenv('ENGIR_THROTTLE_LOGIN_USERNAME', '10/min'),
+    'enroll': os.getenv('ENGIR_THROTTLE_ENROLL', '60/min'),
+    'enroll_user': os.getenv('ENGIR_THROTTLE_ENROLL_USER', '10/min'),
 }
 
 SIMPLE_JWT = {
@@ -143,6 +221,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.getenv('JWT_REFRESH_DAYS', 7))),
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Refresh rotates the pair; the presented refresh token goes on the cache-backed denylist.
+    'ROTATE_REFRESH_TOKENS': True,
     'SIGNING_KEY': SECRET_KEY,
 }
 
@@ -203,23 +283,83 @@ LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/admin/'
 LOGOUT_REDIRECT_URL = '/admin/login/'
 
-# Logging
+# Metrics: point every gunicorn worker at the same directory so /metrics aggregates them.
+METRICS_DIR = os.getenv('ENGIR_METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('ENGIR_METRICS_FLUSH_INTERVAL', 1.0))
+METRICS_TOKEN = os.getenv('ENGIR_METRICS_TOKEN', '')
+
+# RTMP ingest callbacks (/api/ingest/auth/): shared secret sent by the media server as ?secret=...
+INGEST_SECRET = os.getenv('ENGIR_INGEST_SECRET', '')
+# Flip a scheduled session to live when its publisher connects.
+INGEST_AUTO_LIVE = os.getenv('ENGIR_INGEST_AUTO_LIVE', 'true').lower() == 'true'
+
+# Signed playback/host URLs. The first key signs; every key verifies, so rotate by prepending.
+PLAYBACK_SIGNING_KEYS = [
+    key.encode() for key in os.getenv('ENGIR_PLAYBACK_SIGNING_KEYS', '').split(',') if key
+] or [hashlib.sha256(f'engir.playback:{SECRET_KEY}'.encode()).hexdigest().encode()]
+PLAYBACK_TOKEN_TTL = int(os.getenv('ENGIR_PLAYBACK_TOKEN_TTL', 4 * 3600))
+PLAYBACK_BASE_URL = os.getenv('ENGIR_PLAYBACK_BASE_URL', 'https://live.engir.app')
+
+# Viewer heartbeats are buffered per worker and written to Attendance this often (seconds) by a timer thread.
+PRESENCE_FLUSH_INTERVAL = float(os.getenv('ENGIR_PRESENCE_FLUSH_INTERVAL', 30))
+
+# Batch endpoint: sub-requests per call and worker threads when a batch asks for parallel execution
+BATCH_MAX_REQUESTS = int(os.getenv('ENGIR_BATCH_MAX_REQUESTS', 10))
+BATCH_MAX_WORKERS = int(os.getenv('ENGIR_BATCH_MAX_WORKERS', 4))
+
+# Delta sync: rows per page, age before the cursor moves past a change, tombstone retention
+SYNC_PAGE_SIZE = int(os.getenv('ENGIR_SYNC_PAGE_SIZE', 500))
+SYNC_SETTLE_SECONDS = int(os.getenv('ENGIR_SYNC_SETTLE_SECONDS', 5))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('ENGIR_SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+# Bulk enrollment status changes: enrollment ids per request
+BULK_STATUS_MAX_IDS = int(os.getenv('ENGIR_BULK_STATUS_MAX_IDS', 1000))
+
+# archive_history moves sessions that ended, and enrollments cancelled, this many days ago out of the hot tables
+ARCHIVE_AFTER_DAYS = int(os.getenv('ENGIR_ARCHIVE_AFTER_DAYS', 180))
+
+# Response compression (brotli when the package is installed, gzip otherwise)
+COMPRESSION_MIN_SIZE = int(os.getenv('ENGIR_COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('ENGIR_COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('ENGIR_COMPRESSION_BROTLI_QUALITY', 5))
+
+# Logging: records are queued on the request thread and written as JSON by a background listener.
+LOG_FORMAT = os.getenv('ENGIR_LOG_FORMAT', 'json').lower()
+LOG_QUEUE_SIZE = int(os.getenv('ENGIR_LOG_QUEUE_SIZE', 10000))
+LOG_LEVEL = os.getenv('ENGIR_LOG_LEVEL', 'INFO').upper()
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'engir.log.JSONFormatter',
+        },
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'engir.log.RequestContextFilter',
+        },
+    },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            'class': 'engir.log.AsyncStreamHandler',
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'plain' if LOG_FORMAT == 'plain' else 'json',
+            'filters': ['request_context'],
         },
     },
     'root': {
         'handlers': ['console'],
-        'level': 'INFO',
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
             'handlers': ['console'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
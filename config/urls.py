@@ -1,7 +1,10 @@
 from django.urls import include, path
 from django.contrib import admin
 
+from engir.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('engir.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -1,11 +1,38 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
 from .models import Classroom, Enrollment, Session, Student, Teacher
 
+INLINE_LIMIT = 50
+ESTIMATE_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use PostgreSQL's planner statistics instead of ``COUNT(*)`` for unfiltered large tables."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and connections[queryset.db].vendor == 'postgresql':
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
+
 
 @admin.register(Teacher)
 class TeacherAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'email', 'headline', 'user', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('full_name', 'email', 'headline', 'user__email')
     ordering = ('full_name',)
 
@@ -13,14 +40,26 @@ class TeacherAdmin(admin.ModelAdmin):
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'email', 'timezone', 'user', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('full_name', 'email', 'user__email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class EnrollmentInline(admin.TabularInline):
+    """Latest enrollments only; the full list lives in the enrollment changelist."""
+
     model = Enrollment
     extra = 0
     fields = ('full_name', 'email', 'phone_number', 'status', 'created_at')
-    readonly_fields = ('full_name', 'email', 'phone_number', 'created_at')
+    readonly_fields = ('full_name', 'email', 'phone_number', 'status', 'created_at')
+    verbose_name_plural = f'Latest {INLINE_LIMIT} enrollments'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 class SessionInline(admin.TabularInline):
@@ -34,28 +73,85 @@ class SessionInline(admin.TabularInline):
         'playback_url',
     )
     readonly_fields = ('playback_url',)
+    verbose_name_plural = f'Latest {INLINE_LIMIT} sessions'
+
+
+def _limited_inline_queryset(model, classroom, ordering):
+    ids = list(
+        model.objects.filter(classroom=classroom).order_by(ordering).values_list('pk', flat=True)[:INLINE_LIMIT]
+    )
+    return model.objects.filter(pk__in=ids).order_by(ordering)
 
 
 @admin.register(Classroom)
 class ClassroomAdmin(admin.ModelAdmin):
-    list_display = ('title', 'teacher', 'code', 'starts_at', 'capacity', 'available_seats', 'is_public')
+    list_display = ('title', 'teacher', 'code', 'starts_at', 'capacity', 'seats_available', 'is_public')
+    list_select_related = ('teacher',)
     search_fields = ('title', 'code', 'teacher__full_name')
     list_filter = ('is_public',)
     inlines = [SessionInline, EnrollmentInline]
-    readonly_fields = ('code', 'created_at', 'updated_at')
+    autocomplete_fields = ('teacher',)
+    readonly_fields = ('code', 'created_at', 'updated_at', 'all_enrollments')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # A correlated subquery is only evaluated for the rows on the current page.
+        seats_taken = (
+            Enrollment.objects.filter(
+                classroom=OuterRef('pk'), status__in=[Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED]
+            )
+            .order_by()
+            .values('classroom')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(seats_taken=Coalesce(Subquery(seats_taken, output_field=IntegerField()), Value(0)))
+        )
+
+    @admin.display(description='Available seats', ordering='seats_taken')
+    def seats_available(self, obj):
+        return max(obj.capacity - obj.seats_taken, 0)
+
+    @admin.display(description='Enrollments')
+    def all_enrollments(self, obj):
+        if not obj.pk:
+            return '-'
+        url = reverse('admin:engir_enrollment_changelist')
+        return format_html('<a href="{}?classroom__id__exact={}">View all enrollments</a>', url, obj.pk)
+
+    def get_formset_kwargs(self, request, obj, inline, prefix):
+        kwargs = super().get_formset_kwargs(request, obj, inline, prefix)
+        if obj is not None and obj.pk:
+            if isinstance(inline, EnrollmentInline):
+                kwargs['queryset'] = _limited_inline_queryset(Enrollment, obj, '-created_at')
+            elif isinstance(inline, SessionInline):
+                kwargs['queryset'] = _limited_inline_queryset(Session, obj, '-starts_at')
+        return kwargs
 
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'email', 'classroom', 'status', 'created_at')
+    list_editable = ('status',)
     list_filter = ('status',)
+    list_select_related = ('classroom',)
     search_fields = ('full_name', 'email', 'classroom__title', 'classroom__code')
     autocomplete_fields = ('classroom',)
+    raw_id_fields = ('student',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
     list_display = ('title', 'classroom', 'starts_at', 'status', 'stream_provider', 'playback_url')
     list_filter = ('status', 'stream_provider')
+    list_select_related = ('classroom',)
     search_fields = ('title', 'classroom__title', 'classroom__code')
     autocomplete_fields = ('classroom',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,209 @@
+"""Enrollment funnel rollups.
+
+``EnrollmentRollup`` counts enrollments by the UTC hour and day they were created,
+per classroom, source and *current* status. A status change moves one enrollment
+from one status row to another within its creation bucket, so the rollups always
+describe the funnel of each signup cohort. ``Enrollment`` signals apply the deltas
+inside the writing transaction (see ``engir.signals``); ``backfill`` recomputes
+history window by window, archived enrollments included, for anything that
+bypassed them.
+
+Funnel queries read only rollup rows, so their cost follows the number of buckets
+and sources in the range rather than the number of enrollments.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncHour
+
+from .db_routing import PRIMARY
+from .models import Enrollment, EnrollmentArchive, EnrollmentRollup
+
+HOUR = EnrollmentRollup.Granularity.HOUR
+DAY = EnrollmentRollup.Granularity.DAY
+STATUSES = [value for value, _ in Enrollment.Status.choices]
+DEFAULT_CHUNK_DAYS = 7
+
+# (classroom_id, granularity, bucket, source, status)
+RollupKey = Tuple[int, str, datetime, str, str]
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment: datetime) -> datetime:
+    return hour_bucket(moment).replace(hour=0)
+
+
+def _keys(created_at: datetime, classroom_id: int, source: str, status: str):
+    yield classroom_id, HOUR, hour_bucket(created_at), source or '', status
+    yield classroom_id, DAY, day_bucket(created_at), source or '', status
+
+
+def _filter(key: RollupKey):
+    classroom_id, granularity, bucket, source, status = key
+    return EnrollmentRollup.objects.filter(
+        classroom_id=classroom_id, granularity=granularity, bucket=bucket, source=source, status=status
+    )
+
+
+def apply_deltas(deltas: Dict[RollupKey, int]) -> None:
+    """Add ``deltas`` to the rollup rows, creating missing rows."""
+    # Sorted so concurrent writers lock rows in the same order.
+    for key in sorted(key for key, delta in deltas.items() if delta):
+        delta = deltas[key]
+        if _filter(key).update(count=F('count') + delta) or delta < 0:
+            # A missing row for a decrement means the rollups drifted; backfill repairs that.
+            continue
+        classroom_id, granularity, bucket, source, status = key
+        # Two writers may both miss the row; the loser's insert is ignored and it retries the update.
+        EnrollmentRollup.objects.bulk_create(
+            [
+                EnrollmentRollup(
+                    classroom_id=classroom_id, granularity=granularity, bucket=bucket, source=source, status=status
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        _filter(key).update(count=F('count') + delta)
+
+
+def record_enrollment_change(enrollment, previous: Optional[tuple], current: Optional[tuple]) -> None:
+    """Move ``enrollment`` between rollup rows; keys are ``(classroom_id, source, status)``, ``None`` when absent."""
+    if previous == current or enrollment.created_at is None:
+        return
+    deltas = Counter()
+    if previous is not None:
+        for key in _keys(enrollment.created_at, *previous):
+            deltas[key] -= 1
+    if current is not None:
+        for key in _keys(enrollment.created_at, *current):
+            deltas[key] += 1
+    apply_deltas(deltas)
+
+
+def record_status_changes(changes: Iterable[tuple]) -> None:
+    """Bulk ``record_enrollment_change`` for set-based updates, applied as one set of deltas.
+
+    ``changes`` holds ``(created_at, classroom_id, source, previous_status, current_status)``.
+    """
+    deltas = Counter()
+    for created_at, classroom_id, source, previous, current in changes:
+        for key in _keys(created_at, classroom_id, source, previous):
+            deltas[key] -= 1
+        for key in _keys(created_at, classroom_id, source, current):
+            deltas[key] += 1
+    apply_deltas(deltas)
+
+
+def _hourly_counts(model, start: datetime, end: datetime):
+    return (
+        model.objects.using(PRIMARY)
+        .filter(created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .values('classroom_id', 'source', 'status', bucket=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .annotate(count=Count('id'))
+    )
+
+
+def _window_rows(start: datetime, end: datetime) -> Iterable[EnrollmentRollup]:
+    # Archived enrollments still belong to the funnel; engir.archive bypasses the decrementing signals.
+    hourly = defaultdict(int)
+    for model in (Enrollment, EnrollmentArchive):
+        for row in _hourly_counts(model, start, end):
+            hourly[row['classroom_id'], hour_bucket(row['bucket']), row['source'], row['status']] += row['count']
+    daily = defaultdict(int)
+    for (classroom_id, bucket, source, status), count in hourly.items():
+        daily[classroom_id, day_bucket(bucket), source, status] += count
+        yield EnrollmentRollup(
+            classroom_id=classroom_id, granularity=HOUR, bucket=bucket, source=source, status=status, count=count
+        )
+    for (classroom_id, bucket, source, status), count in daily.items():
+        yield EnrollmentRollup(
+            classroom_id=classroom_id, granularity=DAY, bucket=bucket, source=source, status=status, count=count
+        )
+
+
+def backfill(since: Optional[datetime] = None, chunk_days: int = DEFAULT_CHUNK_DAYS, now: datetime = None) -> int:
+    """Recompute the rollups from ``since`` (default: the first enrollment, archived or not) in day-aligned windows.
+
+    Each window is replaced in its own transaction, so the funnel stays readable while
+    this runs and an interrupted backfill can be resumed with ``since``. Returns the
+    number of rollup rows written.
+    """
+    if since is None:
+        firsts = [
+            model.objects.using(PRIMARY).aggregate(first=Min('created_at'))['first']
+            for model in (Enrollment, EnrollmentArchive)
+        ]
+        if not any(firsts):
+            return 0
+        since = min(first for first in firsts if first)
+    start = day_bucket(since)
+    end = day_bucket(now or datetime.now(dt_timezone.utc)) + timedelta(days=1)
+    step = timedelta(days=max(chunk_days, 1))
+    written = 0
+    while start < end:
+        stop = min(start + step, end)
+        with transaction.atomic(using=PRIMARY):
+            EnrollmentRollup.objects.filter(bucket__gte=start, bucket__lt=stop).delete()
+            rows = list(_window_rows(start, stop))
+            EnrollmentRollup.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+        start = stop
+    return written
+
+
+def _counts(rows, *fields) -> list:
+    grouped = defaultdict(lambda: dict.fromkeys(STATUSES, 0))
+    for row in rows:
+        grouped[tuple(row[field] for field in fields)][row['status']] += row['total']
+    return [dict(zip(fields, key), **_funnel(counts)) for key, counts in grouped.items()]
+
+
+def _funnel(counts: dict) -> dict:
+    total = sum(counts.values())
+    confirmed = counts.get(Enrollment.Status.CONFIRMED, 0)
+    return {
+        **counts,
+        'total': total,
+        'confirmation_rate': round(confirmed / total, 4) if total else None,
+    }
+
+
+def funnel(
+    since: datetime,
+    until: datetime,
+    granularity: str = DAY,
+    classroom_ids=None,
+    source: Optional[str] = None,
+) -> dict:
+    """Funnel totals, per-source breakdown and a per-bucket series between ``since`` and ``until``.
+
+    ``classroom_ids`` may be a list or a subquery; ``None`` means every classroom.
+    Buckets are aligned to ``granularity``: a bucket is included when it starts in
+    ``[since, until)``.
+    """
+    align = hour_bucket if granularity == HOUR else day_bucket
+    rows = EnrollmentRollup.objects.filter(granularity=granularity, bucket__gte=align(since), bucket__lt=until)
+    if classroom_ids is not None:
+        rows = rows.filter(classroom_id__in=classroom_ids)
+    if source is not None:
+        rows = rows.filter(source=source)
+    grouped = list(rows.order_by().values('bucket', 'source', 'status').annotate(total=Sum('count')))
+    totals = dict.fromkeys(STATUSES, 0)
+    for row in grouped:
+        totals[row['status']] += row['total']
+    return {
+        'granularity': granularity,
+        'since': align(since),
+        'until': until,
+        'totals': _funnel(totals),
+        'sources': sorted(_counts(grouped, 'source'), key=lambda item: (-item['total'], item['source'])),
+        'series': sorted(_counts(grouped, 'bucket'), key=lambda item: item['bucket']),
+    }
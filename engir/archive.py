@@ -0,0 +1,145 @@
+"""Moving finished history out of the hot ``Session`` and ``Enrollment`` tables.
+
+Completed or cancelled sessions that ended more than ``ARCHIVE_AFTER_DAYS`` ago,
+and enrollments cancelled that long ago, are copied into ``SessionArchive`` /
+``EnrollmentArchive`` together with their attendance, then deleted from the hot
+tables. Sessions go first, so an attendance row shared by both is kept once, with
+its session. Each primary-key-ordered batch is one short transaction that skips
+rows other transactions hold locked, so the job can run during traffic. Because
+the rows leave the live tables, every existing read path excludes them without
+extra filters. The whole job reads from the primary: the rows it copies are the
+rows it deletes there, so a lagging replica must never supply them.
+
+The rows are removed with a raw ``DELETE``, so the receivers in ``engir.signals``
+never see them. Funnel rollups keep counting them (``engir.analytics`` also reads
+the archive when backfilling). Each batch writes its own tombstones, so delta-sync
+clients holding the rows drop them.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import ingest
+from .changes import next_change_seqs
+from .db_routing import use_primary
+from .models import Attendance, Enrollment, EnrollmentArchive, Session, SessionArchive, Tombstone
+
+DEFAULT_BATCH_SIZE = 500
+ARCHIVABLE_SESSION_STATUSES = (Session.Status.COMPLETED, Session.Status.CANCELLED)
+ATTENDANCE_VALUES = ('session_id', 'enrollment_id', 'minutes', 'first_seen_at', 'last_seen_at')
+
+
+def _attendance_by(field: str, ids) -> Dict[int, list]:
+    grouped = defaultdict(list)
+    for row in Attendance.objects.filter(**{f'{field}__in': ids}).values(*ATTENDANCE_VALUES):
+        grouped[row[field]].append(row)
+    return grouped
+
+
+def _raw_delete(queryset) -> None:
+    # One DELETE without collecting instances or sending signals; dependants are moved first.
+    queryset._raw_delete(queryset.db)
+
+
+def _record_tombstones(resource: str, ids) -> None:
+    Tombstone.objects.bulk_create(
+        [
+            Tombstone(resource=resource, object_id=object_id, change_seq=change_seq)
+            for object_id, change_seq in zip(ids, next_change_seqs(len(ids)))
+        ]
+    )
+
+
+def _session_batch(cutoff: datetime, after_id: int, batch_size: int) -> list:
+    with transaction.atomic():
+        rows = list(
+            Session.objects.select_for_update(skip_locked=True)
+            .filter(pk__gt=after_id, status__in=ARCHIVABLE_SESSION_STATUSES, ends_at__lt=cutoff)
+            .order_by('pk')
+            .values()[:batch_size]
+        )
+        if not rows:
+            return rows
+        ids = [row['id'] for row in rows]
+        attendance = _attendance_by('session_id', ids)
+        SessionArchive.objects.bulk_create(
+            [
+                SessionArchive(
+                    id=row['id'],
+                    classroom_id=row['classroom_id'],
+                    title=row['title'],
+                    status=row['status'],
+                    starts_at=row['starts_at'],
+                    ends_at=row['ends_at'],
+                    row=row,
+                    attendance=attendance.get(row['id'], []),
+                )
+                for row in rows
+            ]
+        )
+        _raw_delete(Attendance.objects.filter(session_id__in=ids))
+        _raw_delete(Session.objects.filter(pk__in=ids))
+        _record_tombstones(Tombstone.Resource.SESSION, ids)
+        stream_keys = [row['stream_key'] for row in rows]
+        transaction.on_commit(lambda: ingest.invalidate(*stream_keys))
+    return rows
+
+
+def _enrollment_batch(cutoff: datetime, after_id: int, batch_size: int) -> list:
+    with transaction.atomic():
+        rows = list(
+            Enrollment.objects.select_for_update(skip_locked=True)
+            .filter(pk__gt=after_id, status=Enrollment.Status.CANCELLED, updated_at__lt=cutoff)
+            .order_by('pk')
+            .values()[:batch_size]
+        )
+        if not rows:
+            return rows
+        ids = [row['id'] for row in rows]
+        attendance = _attendance_by('enrollment_id', ids)
+        EnrollmentArchive.objects.bulk_create(
+            [
+                EnrollmentArchive(
+                    id=row['id'],
+                    classroom_id=row['classroom_id'],
+                    student_id=row['student_id'],
+                    email=row['email'],
+                    status=row['status'],
+                    source=row['source'],
+                    created_at=row['created_at'],
+                    row=row,
+                    attendance=attendance.get(row['id'], []),
+                )
+                for row in rows
+            ]
+        )
+        _raw_delete(Attendance.objects.filter(enrollment_id__in=ids))
+        _raw_delete(Enrollment.objects.filter(pk__in=ids))
+        _record_tombstones(Tombstone.Resource.ENROLLMENT, ids)
+    return rows
+
+
+def _archive(batch, cutoff: datetime, batch_size: int) -> int:
+    total = 0
+    last_id = 0
+    while True:
+        rows = batch(cutoff, last_id, batch_size)
+        if not rows:
+            return total
+        total += len(rows)
+        last_id = rows[-1]['id']
+
+
+def archive_history(days: int = None, batch_size: int = DEFAULT_BATCH_SIZE, now: datetime = None) -> Dict[str, int]:
+    """Archive sessions and enrollments finished more than ``days`` (default ``ARCHIVE_AFTER_DAYS``) ago."""
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = (now or datetime.now(dt_timezone.utc)) - timedelta(days=days)
+    with use_primary():
+        return {
+            'sessions': _archive(_session_batch, cutoff, batch_size),
+            'enrollments': _archive(_enrollment_batch, cutoff, batch_size),
+        }
@@ -0,0 +1,14 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import tokens
+
+
+class DenylistJWTAuthentication(JWTAuthentication):
+    """JWT authentication that rejects revoked tokens using the cache-backed denylist."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if tokens.is_revoked(validated_token):
+            raise InvalidToken({'detail': 'Token has been revoked.', 'code': 'token_revoked'})
+        return validated_token
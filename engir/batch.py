@@ -0,0 +1,129 @@
+"""Run several read-only API requests inside one HTTP request.
+
+Sub-requests are dispatched straight to the resolved view, skipping the middleware
+stack. DRF views reuse the outer request's user and token, so authentication runs
+once. Sequential execution shares the request thread's database connection.
+``parallel`` runs them in a small thread pool instead; each worker opens and
+closes its own connection. Sub-response bodies are spliced into the result as raw
+bytes, so JSON is not parsed and re-rendered.
+"""
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from urllib.parse import urlsplit
+
+from django.core.handlers.exception import response_for_exception
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from . import metrics
+
+SAFE_METHODS = ('GET', 'HEAD')
+# Headers describing the outer POST body that must not leak into the GET sub-requests.
+BODY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_CONTENT_ENCODING')
+
+SUBREQUESTS = metrics.Counter(
+    'engir_batch_subrequests_total', 'Batched sub-requests by route name and status.', ('route', 'status')
+)
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse(items, max_requests: int) -> List[dict]:
+    """Validate the ``requests`` list into ``[{'id', 'method', 'path', 'query'}]``."""
+    if not isinstance(items, list) or not items:
+        raise BatchError('Provide a non-empty "requests" list.')
+    if len(items) > max_requests:
+        raise BatchError(f'At most {max_requests} requests per batch.')
+    parsed, seen = [], set()
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'Request {index} needs a "path".')
+        method = str(item.get('method', 'GET')).upper()
+        if method not in SAFE_METHODS:
+            raise BatchError(f'Request {index}: only GET and HEAD can be batched.')
+        request_id = str(item.get('id', index))
+        if request_id in seen:
+            raise BatchError(f'Duplicate request id "{request_id}".')
+        seen.add(request_id)
+        url = urlsplit(item['path'])
+        parsed.append({'id': request_id, 'method': method, 'path': url.path, 'query': url.query})
+    return parsed
+
+
+def _sub_request(outer: HttpRequest, user, auth, item: dict) -> HttpRequest:
+    request = HttpRequest()
+    request.method = item['method']
+    request.path = request.path_info = item['path']
+    request.META = {key: value for key, value in outer.META.items() if key not in BODY_META}
+    request.META.update(REQUEST_METHOD=item['method'], PATH_INFO=item['path'], QUERY_STRING=item['query'])
+    request.GET = QueryDict(item['query'])
+    request.COOKIES = outer.COOKIES
+    request.user = user
+    if hasattr(outer, 'session'):
+        request.session = outer.session
+    if user.is_authenticated:
+        # Picked up by rest_framework.request.Request in place of the authentication classes.
+        # Anonymous callers go through them as usual so 401s keep their WWW-Authenticate challenge.
+        request._force_auth_user = user
+        request._force_auth_token = auth
+    return request
+
+
+def _dispatch(outer: HttpRequest, user, auth, item: dict, excluded_view) -> tuple:
+    request = _sub_request(outer, user, auth, item)
+    try:
+        match = resolve(request.path_info)
+        if getattr(match.func, 'cls', match.func) is excluded_view:
+            raise Resolver404('Batches cannot be nested.')
+        request.resolver_match = match
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+    except Exception as exc:  # noqa: BLE001 - one failing sub-request must not sink the batch
+        response = response_for_exception(request, exc)
+    route = (getattr(request, 'resolver_match', None) and request.resolver_match.url_name) or 'unmatched'
+    SUBREQUESTS.inc(route=route, status=response.status_code)
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return item['id'], response.status_code, response.get('Content-Type', ''), body
+
+
+def _in_worker(task):
+    def run():
+        try:
+            return task()
+        finally:
+            connections.close_all()
+
+    return run
+
+
+def execute(outer: HttpRequest, user, auth, items: List[dict], parallel: bool, max_workers: int, excluded_view):
+    """Run ``items`` and return ``[(id, status, content_type, body)]`` in request order."""
+    tasks = [lambda item=item: _dispatch(outer, user, auth, item, excluded_view) for item in items]
+    if not parallel or len(tasks) == 1 or max_workers <= 1:
+        return [task() for task in tasks]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+        # Each task gets a copy of the caller's context: request id for logs, primary pinning.
+        futures = [pool.submit(contextvars.copy_context().run, _in_worker(task)) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def render(results) -> bytes:
+    """``{"responses": {id: {"status", "body"}}}``; JSON bodies are embedded verbatim."""
+    parts = []
+    for request_id, status, content_type, body in results:
+        if not body:
+            encoded = b'null'
+        elif content_type.startswith('application/json'):
+            encoded = body
+        else:
+            encoded = json.dumps(body.decode('utf-8', 'replace')).encode()
+        parts.append(b'%s:{"status":%d,"body":%s}' % (json.dumps(request_id).encode(), status, encoded))
+    return b'{"responses":{' + b','.join(parts) + b'}}'
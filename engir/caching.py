@@ -0,0 +1,118 @@
+"""Two-tier caches: a small in-process LRU in front of the shared Django cache."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from django.core.cache import cache
+
+from . import metrics
+
+
+class TwoTierCache:
+    """Cache ``key -> value`` in process memory and in ``django.core.cache``.
+
+    Local entries expire after ``local_ttl`` seconds so invalidations issued by other
+    processes through the shared cache are picked up quickly. ``None`` is never cached.
+    """
+
+    def __init__(self, name: str, maxsize: int = 2048, ttl: int = 3600, local_ttl: float = 30.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f'engir:{self.name}:{key}'
+
+    def _get_local(self, key: Hashable):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: Hashable, value, ttl: Optional[float] = None) -> None:
+        local_ttl = self.local_ttl if ttl is None else min(self.local_ttl, ttl)
+        with self._lock:
+            self._local[key] = (value, time.monotonic() + local_ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def get(self, key: Hashable, loader: Optional[Callable[[Hashable], object]] = None):
+        value = self._get_local(key)
+        if value is not None:
+            metrics.record_cache(self.name, True)
+            return value
+        value = cache.get(self._shared_key(key))
+        if value is not None:
+            metrics.record_cache(self.name, True)
+            self._set_local(key, value)
+            return value
+        metrics.record_cache(self.name, False)
+        if loader is None:
+            return None
+        value = loader(key)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value, ttl: Optional[int] = None) -> None:
+        cache.set(self._shared_key(key), value, self.ttl if ttl is None else ttl)
+        self._set_local(key, value, ttl)
+
+    def add(self, key: Hashable, value, ttl: Optional[int] = None) -> bool:
+        """Store ``value`` only if no other process has; returns whether this call stored it."""
+        added = cache.add(self._shared_key(key), value, self.ttl if ttl is None else ttl)
+        if added:
+            self._set_local(key, value, ttl)
+        return added
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+        cache.delete(self._shared_key(key))
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+classroom_codes = TwoTierCache('classroom_code')
+
+
+def normalize_class_code(code: str) -> str:
+    return (code or '').strip().upper()
+
+
+def classroom_id_for_code(code: str) -> Optional[int]:
+    """Resolve a class code to a classroom id without touching the database on cache hits."""
+    from .models import Classroom
+
+    code = normalize_class_code(code)
+    if not code:
+        return None
+    return classroom_codes.get(code, lambda key: Classroom.objects.filter(code=key).values_list('id', flat=True).first())
+
+
+def classroom_for_code(code: str, queryset=None):
+    """Return the classroom for ``code`` via a primary-key probe, dropping stale cache entries."""
+    from .models import Classroom
+
+    classroom_id = classroom_id_for_code(code)
+    if classroom_id is None:
+        return None
+    if queryset is None:
+        queryset = Classroom.objects.all()
+    classroom = queryset.filter(pk=classroom_id).first()
+    if classroom is None:
+        classroom_codes.invalidate(normalize_class_code(code))
+    return classroom
@@ -0,0 +1,128 @@
+"""Maintenance of the ``ClassroomCatalogEntry`` read model.
+
+Signal receivers call ``schedule_refresh`` whenever a classroom, its teacher, an
+enrollment or a session changes; the affected entries are recomputed from the
+primary after the transaction commits. ``rebuild_catalog`` repairs anything that
+bypassed signals (``QuerySet.update()``, raw SQL, restores).
+"""
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .db_routing import PRIMARY
+from .models import Classroom, ClassroomCatalogEntry, Session
+from .projections import annotate_classroom_summary
+
+DEFAULT_BATCH_SIZE = 500
+ENTRY_FIELDS = (
+    'teacher',
+    'teacher_name',
+    'title',
+    'code',
+    'tags',
+    'is_public',
+    'starts_at',
+    'capacity',
+    'seats_taken',
+    'seats_available',
+    'is_full',
+    'next_session_id',
+    'next_session_starts_at',
+    'search_text',
+    'classroom_created_at',
+    'refreshed_at',
+)
+
+
+def _search_text(row: dict) -> str:
+    parts = [row['title'], row['code'], row['teacher__full_name'], *(str(tag) for tag in row['tags'] or ())]
+    return ' '.join(part for part in parts if part).lower()
+
+
+def _summary_rows(queryset):
+    next_session_starts_at = (
+        Session.objects.filter(classroom=OuterRef('pk'), status__in=[Session.Status.SCHEDULED, Session.Status.LIVE])
+        .order_by('starts_at')
+        .values('starts_at')[:1]
+    )
+    return (
+        annotate_classroom_summary(queryset)
+        .annotate(next_session_starts_at=Subquery(next_session_starts_at))
+        .values(
+            'id',
+            'teacher_id',
+            'teacher__full_name',
+            'title',
+            'code',
+            'tags',
+            'is_public',
+            'starts_at',
+            'capacity',
+            'seats_taken',
+            'next_session_id',
+            'next_session_starts_at',
+            'created_at',
+        )
+    )
+
+
+def _entry(row: dict) -> ClassroomCatalogEntry:
+    available = max(row['capacity'] - row['seats_taken'], 0)
+    return ClassroomCatalogEntry(
+        classroom_id=row['id'],
+        teacher_id=row['teacher_id'],
+        teacher_name=row['teacher__full_name'],
+        title=row['title'],
+        code=row['code'],
+        tags=row['tags'] or [],
+        is_public=row['is_public'],
+        starts_at=row['starts_at'],
+        capacity=row['capacity'],
+        seats_taken=row['seats_taken'],
+        seats_available=available,
+        is_full=available == 0,
+        next_session_id=row['next_session_id'],
+        next_session_starts_at=row['next_session_starts_at'],
+        search_text=_search_text(row),
+        classroom_created_at=row['created_at'],
+    )
+
+
+def _upsert(entries) -> int:
+    if entries:
+        ClassroomCatalogEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=['classroom'], update_fields=ENTRY_FIELDS
+        )
+    return len(entries)
+
+
+def refresh(classroom_ids: Iterable[int]) -> int:
+    """Recompute the entries of ``classroom_ids`` with one read and one upsert."""
+    classroom_ids = sorted({classroom_id for classroom_id in classroom_ids if classroom_id})
+    if not classroom_ids:
+        return 0
+    # Replicas may not have the write that triggered the refresh yet.
+    rows = _summary_rows(Classroom.objects.using(PRIMARY).filter(pk__in=classroom_ids))
+    return _upsert([_entry(row) for row in rows])
+
+
+def schedule_refresh(classroom_ids: Iterable[int]) -> None:
+    classroom_ids = list(classroom_ids)
+    transaction.on_commit(lambda: refresh(classroom_ids))
+
+
+def rebuild(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Recompute every entry in primary-key batches and drop entries of vanished classrooms."""
+    total = 0
+    last_id = 0
+    while True:
+        rows = list(
+            _summary_rows(Classroom.objects.using(PRIMARY).filter(pk__gt=last_id).order_by('pk'))[:batch_size]
+        )
+        if not rows:
+            break
+        total += _upsert([_entry(row) for row in rows])
+        last_id = rows[-1]['id']
+    ClassroomCatalogEntry.objects.exclude(classroom_id__in=Classroom.objects.values('pk')).delete()
+    return total
@@ -0,0 +1,51 @@
+"""The global change sequence stamped on synced rows and tombstones.
+
+On PostgreSQL values come from the ``engir_change_seq`` sequence (created by
+migration ``0012``), so every row write and every deletion gets a distinct,
+increasing number across processes. Other backends (SQLite in development and
+tests) fall back to a process-local monotonic microsecond clock.
+"""
+import threading
+import time
+from typing import List
+
+from django.db import connections
+from django.db.models.expressions import RawSQL, Value
+
+SEQUENCE_NAME = 'engir_change_seq'
+
+_lock = threading.Lock()
+_last = 0
+
+
+def _local_next() -> int:
+    global _last
+    with _lock:
+        _last = max(_last + 1, time.time_ns() // 1000)
+        return _last
+
+
+def next_change_seq(using: str = 'default') -> int:
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [SEQUENCE_NAME])
+            return cursor.fetchone()[0]
+    return _local_next()
+
+
+def next_change_seqs(count: int, using: str = 'default') -> List[int]:
+    """``count`` fresh sequence numbers in one round trip, for bulk inserts."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [SEQUENCE_NAME, count])
+            return [row[0] for row in cursor.fetchall()]
+    return [_local_next() for _ in range(count)]
+
+
+def change_seq_expression(using: str = 'default'):
+    """For ``QuerySet.update(change_seq=...)``: a fresh value per row where the database can do that."""
+    if connections[using].vendor == 'postgresql':
+        return RawSQL('nextval(%s)', [SEQUENCE_NAME])
+    return Value(_local_next())
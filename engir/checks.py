@@ -0,0 +1,27 @@
+"""System checks for settings that only break once several processes serve traffic."""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries are invisible to other gunicorn workers and to the scheduler process.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_configured() -> bool:
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.security, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if shared_cache_configured():
+        return []
+    return [
+        Error(
+            'The default cache is process-local, so revoked and rotated refresh tokens and throttle buckets '
+            'are only seen by the process that wrote them.',
+            hint='Set ENGIR_REDIS_URL to a Redis instance shared by every web worker and the scheduler.',
+            id='engir.E001',
+        )
+    ]
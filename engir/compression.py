@@ -0,0 +1,127 @@
+"""Response body compression with brotli/gzip negotiation.
+
+Brotli is used when the optional ``brotli`` package is installed and the client
+accepts it; gzip (stdlib ``zlib``) is the fallback.
+"""
+import time
+import zlib
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/',
+)
+
+COMPRESSION_BYTES_IN = metrics.Counter(
+    'engir_compression_bytes_in_total', 'Response bytes before compression.', ('route', 'encoding')
+)
+COMPRESSION_BYTES_OUT = metrics.Counter(
+    'engir_compression_bytes_out_total', 'Response bytes after compression.', ('route', 'encoding')
+)
+COMPRESSION_SECONDS = metrics.Counter(
+    'engir_compression_cpu_seconds_total', 'Thread CPU time spent compressing responses.', ('route', 'encoding')
+)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Pick the best supported encoding; ties favour brotli."""
+    accepted = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = (content_type or '').lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or '+json' in content_type
+
+
+class Compressor:
+    """Incremental compressor with a uniform interface for gzip and brotli."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        else:
+            self._zlib = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress ``data``; ``flush`` emits everything buffered so far for streaming clients."""
+        if self.encoding == 'br':
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def record(route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+    COMPRESSION_BYTES_IN.inc(bytes_in, route=route, encoding=encoding)
+    COMPRESSION_BYTES_OUT.inc(bytes_out, route=route, encoding=encoding)
+    COMPRESSION_SECONDS.inc(cpu_seconds, route=route, encoding=encoding)
+
+
+def stream(chunks, encoding: str, route: str):
+    """Compress a streaming body chunk by chunk, flushing after each so clients see progress."""
+    compressor = Compressor(encoding)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    for chunk in chunks:
+        started = time.thread_time()
+        out = compressor.compress(chunk, flush=True)
+        cpu_seconds += time.thread_time() - started
+        bytes_in += len(chunk)
+        bytes_out += len(out)
+        if out:
+            yield out
+    started = time.thread_time()
+    tail = compressor.finish()
+    cpu_seconds += time.thread_time() - started
+    bytes_out += len(tail)
+    record(route, encoding, bytes_in, bytes_out, cpu_seconds)
+    if tail:
+        yield tail
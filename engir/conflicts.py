@@ -0,0 +1,89 @@
+"""Teacher double-booking detection.
+
+Scheduled and live sessions of one teacher must not overlap. The check is a single
+query over ``session_teacher_interval_idx``: because no session is longer than
+``MAX_SESSION_DURATION``, an overlapping session must start inside
+``(start - MAX_SESSION_DURATION, end)``, which bounds the index range scan instead of
+walking the teacher's whole history. On PostgreSQL the ``session_teacher_no_overlap``
+exclusion constraint backs this up against concurrent writers.
+"""
+from datetime import timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Q
+
+from .models import Session
+
+MAX_SESSION_DURATION = Session.MAX_DURATION
+BLOCKING_STATUSES = (Session.Status.SCHEDULED, Session.Status.LIVE)
+CONSTRAINT_NAME = 'session_teacher_no_overlap'
+
+# (teacher_id, starts_at, ends_at)
+Interval = Tuple[int, object, object]
+
+
+def session_interval(starts_at, ends_at, duration_minutes: Optional[int]):
+    """The interval ``Session.save`` will store for these values."""
+    if starts_at and not ends_at:
+        ends_at = starts_at + timedelta(minutes=duration_minutes or Session._meta.get_field('duration_minutes').default)
+    return starts_at, ends_at
+
+
+def overlapping_pairs(intervals: Sequence[Interval]) -> List[Tuple[int, int]]:
+    """Indexes of intervals within one batch that overlap each other."""
+    order = sorted(range(len(intervals)), key=lambda index: (intervals[index][0], intervals[index][1]))
+    pairs = []
+    for position, index in enumerate(order):
+        teacher_id, _, ends_at = intervals[index]
+        for other in order[position + 1:]:
+            other_teacher, other_start, _ = intervals[other]
+            if other_teacher != teacher_id or other_start >= ends_at:
+                break
+            pairs.append((index, other))
+    return pairs
+
+
+def find_conflicts(intervals: Iterable[Interval], exclude_ids: Iterable[int] = ()) -> List[dict]:
+    """Return stored sessions overlapping any of ``intervals`` in one query."""
+    condition = Q()
+    for teacher_id, starts_at, ends_at in intervals:
+        condition |= Q(
+            teacher_id=teacher_id,
+            starts_at__gt=starts_at - MAX_SESSION_DURATION,
+            starts_at__lt=ends_at,
+            ends_at__gt=starts_at,
+        )
+    if not condition:
+        return []
+    queryset = Session.objects.filter(condition, status__in=BLOCKING_STATUSES)
+    exclude_ids = [pk for pk in exclude_ids if pk]
+    if exclude_ids:
+        queryset = queryset.exclude(pk__in=exclude_ids)
+    return list(queryset.order_by('starts_at').values('id', 'teacher_id', 'classroom_id', 'title', 'starts_at', 'ends_at'))
+
+
+def reassignment_conflicts(classroom, teacher_id: int) -> List[dict]:
+    """Sessions of ``teacher_id`` that ``classroom``'s blocking sessions would overlap if it moved to them."""
+    sessions = list(
+        classroom.sessions.filter(status__in=BLOCKING_STATUSES, ends_at__isnull=False).values_list(
+            'id', 'starts_at', 'ends_at'
+        )
+    )
+    intervals = [(teacher_id, starts_at, ends_at) for _, starts_at, ends_at in sessions]
+    return find_conflicts(intervals, exclude_ids=[pk for pk, _, _ in sessions])
+
+
+def overlaps(conflict: dict, interval: Interval) -> bool:
+    teacher_id, starts_at, ends_at = interval
+    return conflict['teacher_id'] == teacher_id and conflict['starts_at'] < ends_at and conflict['ends_at'] > starts_at
+
+
+def describe(conflict: dict) -> str:
+    return (
+        f"Overlaps \"{conflict['title']}\" "
+        f"({conflict['starts_at'].isoformat()} – {conflict['ends_at'].isoformat()}) for this teacher."
+    )
+
+
+def is_overlap_violation(exc: Exception) -> bool:
+    return CONSTRAINT_NAME in str(exc)
@@ -0,0 +1,104 @@
+"""Primary/replica database routing.
+
+Reads go to a random alias in ``settings.DATABASE_REPLICAS`` unless the current
+context is pinned to the primary: unsafe requests, requests from clients that wrote
+within ``REPLICA_STICKY_SECONDS`` (read-your-writes), code wrapped in
+``use_primary()``, and anything inside a transaction on the primary, whether it runs
+in a request, a management command, a signal receiver or a background thread. Writes, ``select_for_update()`` and ``get_or_create()`` always use
+the primary because Django routes any queryset marked for write through
+``db_for_write``.
+"""
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'engir_primary'
+
+_pinned = contextvars.ContextVar('engir_db_pinned', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def is_pinned() -> bool:
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def _sticky_key(authorization: str) -> str:
+    return 'engir:db_sticky:' + hashlib.sha256(authorization.encode()).hexdigest()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        pool = replicas()
+        if not pool or _pinned.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(pool)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data, so objects loaded from any of them may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaStickinessMiddleware:
+    """Pin unsafe requests, and the client's reads shortly after them, to the primary.
+
+    Clients are recognised by a short-lived cookie and, for token-authenticated API
+    clients that ignore cookies, by a hash of their ``Authorization`` header kept in
+    the cache for the same period.
+
+    Views whose class sets ``replica_reads = True`` only read even when called with an
+    unsafe method (the batch endpoint POSTs a list of GETs): they keep replica reads
+    and do not make the client sticky.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        authorization = request.headers.get('Authorization', '')
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        request._db_sticky = STICKY_COOKIE in request.COOKIES or bool(
+            authorization and cache.get(_sticky_key(authorization))
+        )
+        token = _pinned.set(unsafe or request._db_sticky)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if unsafe and not getattr(request, '_db_replica_reads', False) and response.status_code < 400:
+            ttl = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, '1', max_age=ttl, httponly=True, samesite='Lax')
+            if authorization:
+                cache.set(_sticky_key(authorization), True, ttl)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if replicas() and getattr(getattr(view_func, 'cls', view_func), 'replica_reads', False):
+            request._db_replica_reads = True
+            _pinned.set(request._db_sticky)
+        return None
@@ -0,0 +1,204 @@
+"""iCalendar feeds for classrooms, teachers and students.
+
+A classroom's version is read from the database: its own ``change_seq`` and the
+highest ``change_seq`` and number of its sessions (see ``engir.changes``). Every
+write bumps a sequence and every deletion or archival changes the count, so all
+workers and the scheduler agree on it without sharing any state. A feed's
+``ETag``/``Last-Modified`` are derived from the versions of the classrooms it covers,
+so a conditional request costs one aggregate query and renders nothing. Bodies are
+cached per ``(classroom, version)`` VEVENT block; missing blocks are rendered from a
+``values()`` projection while the response streams.
+"""
+import hashlib
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterator, List, NamedTuple
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from . import metrics
+from .db_routing import PRIMARY
+from .models import Classroom, Session
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+BLOCK_TTL = 24 * 3600
+SIGNING_SALT = 'engir.ics'
+PRODID = '-//Engir//Sessions//EN'
+FEED_SESSION_STATUSES = (
+    Session.Status.SCHEDULED,
+    Session.Status.LIVE,
+    Session.Status.COMPLETED,
+    Session.Status.CANCELLED,
+)
+EVENT_FIELDS = (
+    'id',
+    'classroom_id',
+    'classroom__title',
+    'title',
+    'description',
+    'starts_at',
+    'ends_at',
+    'duration_minutes',
+    'status',
+    'updated_at',
+)
+
+FEED_REQUESTS = metrics.Counter(
+    'engir_calendar_feed_requests_total', 'Calendar feed requests by feed kind and result.', ('feed', 'result')
+)
+
+
+class FeedVersion(NamedTuple):
+    key: str
+    modified: float
+
+
+def _block_key(classroom_id: int, version: str) -> str:
+    return f'engir:ics:block:v2:{classroom_id}:{version}'
+
+
+def versions_for(classroom_ids: List[int]) -> Dict[int, FeedVersion]:
+    """Return the current version of every classroom with one aggregate query."""
+    if not classroom_ids:
+        return {}
+    # The primary: a replica could still report the version from before the write just made.
+    rows = (
+        Classroom.objects.using(PRIMARY)
+        .filter(pk__in=classroom_ids)
+        .order_by()
+        .annotate(
+            session_seq=Max('sessions__change_seq'),
+            session_count=Count('sessions'),
+            session_updated=Max('sessions__updated_at'),
+        )
+        .values_list('pk', 'change_seq', 'session_seq', 'session_count', 'updated_at', 'session_updated')
+    )
+    return {
+        pk: FeedVersion(
+            f'{seq}.{session_seq or 0}.{session_count}', max(filter(None, (updated, session_updated))).timestamp()
+        )
+        for pk, seq, session_seq, session_count, updated, session_updated in rows
+    }
+
+
+def feed_validators(versions: Dict[int, FeedVersion]):
+    """``(etag, last_modified)`` for a feed covering ``versions``."""
+    digest = hashlib.sha1(
+        ';'.join(f'{classroom_id}:{version.key}' for classroom_id, version in sorted(versions.items())).encode()
+    ).hexdigest()
+    last_modified = max(version.modified for version in versions.values()) if versions else 0.0
+    return f'"{digest}"', int(last_modified)
+
+
+def escape_text(value: str) -> str:
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte character.
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def render_event(row: dict) -> str:
+    starts_at = row['starts_at'].astimezone(dt_timezone.utc)
+    ends_at = row['ends_at'] or row['starts_at'] + timedelta(minutes=row['duration_minutes'])
+    ends_at = ends_at.astimezone(dt_timezone.utc)
+    updated_at = row['updated_at'].astimezone(dt_timezone.utc)
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:session-{row['id']}@engir.app",
+        f"DTSTAMP:{updated_at:%Y%m%dT%H%M%SZ}",
+        f"LAST-MODIFIED:{updated_at:%Y%m%dT%H%M%SZ}",
+        f"DTSTART:{starts_at:%Y%m%dT%H%M%SZ}",
+        f"DTEND:{ends_at:%Y%m%dT%H%M%SZ}",
+        f"SUMMARY:{escape_text(row['classroom__title'])} — {escape_text(row['title'])}",
+    ]
+    if row['description']:
+        lines.append(f"DESCRIPTION:{escape_text(row['description'])}")
+    lines.append('STATUS:CANCELLED' if row['status'] == Session.Status.CANCELLED else 'STATUS:CONFIRMED')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def _render_blocks(classroom_ids: List[int]) -> Iterator[tuple]:
+    """Yield ``(classroom_id, block)`` for ``classroom_ids`` from a single streamed query."""
+    # Read the primary: a block rendered from a lagging replica would be cached under the new version.
+    rows = (
+        Session.objects.using(PRIMARY)
+        .filter(classroom_id__in=classroom_ids, status__in=FEED_SESSION_STATUSES)
+        .order_by('classroom_id', 'starts_at', 'id')
+        .values(*EVENT_FIELDS)
+        .iterator(chunk_size=500)
+    )
+    current, events = None, []
+    for row in rows:
+        if row['classroom_id'] != current:
+            if current is not None:
+                yield current, ''.join(events)
+            current, events = row['classroom_id'], []
+        events.append(render_event(row))
+    if current is not None:
+        yield current, ''.join(events)
+
+
+def stream_feed(name: str, versions: Dict[int, FeedVersion]) -> Iterator[bytes]:
+    """Yield the calendar body, reusing cached per-classroom blocks."""
+    yield (
+        'BEGIN:VCALENDAR\r\nVERSION:2.0\r\n'
+        + fold(f'PRODID:{PRODID}')
+        + 'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n'
+        + fold(f'X-WR-CALNAME:{escape_text(name)}')
+    ).encode('utf-8')
+    keys = {classroom_id: _block_key(classroom_id, versions[classroom_id].key) for classroom_id in sorted(versions)}
+    cached = cache.get_many(list(keys.values()))
+    missing = [classroom_id for classroom_id, key in keys.items() if key not in cached]
+    for key in keys.values():
+        block = cached.get(key)
+        if block:
+            yield block.encode('utf-8')
+    if missing:
+        rendered = {}
+        for classroom_id, block in _render_blocks(missing):
+            rendered[classroom_id] = block
+            yield block.encode('utf-8')
+        # Classrooms without sessions are cached as empty blocks too.
+        cache.set_many(
+            {keys[classroom_id]: rendered.get(classroom_id, '') for classroom_id in missing},
+            BLOCK_TTL,
+        )
+    yield b'END:VCALENDAR\r\n'
+
+
+def feed_token(kind: str, pk: int) -> str:
+    """Opaque token for a personal feed URL; calendar clients cannot send Bearer headers."""
+    return signing.dumps([kind, pk], salt=SIGNING_SALT, compress=True)
+
+
+def parse_feed_token(token: str):
+    try:
+        kind, pk = signing.loads(token, salt=SIGNING_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    return kind, pk
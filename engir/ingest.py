@@ -0,0 +1,94 @@
+"""Authorisation for RTMP ingest callbacks (nginx-rtmp ``on_publish``/``on_play`` style).
+
+Keys resolve to ``{'session_id', 'classroom_id', 'status'}`` through a two-tier cache
+in front of the ``session_stream_key_unique`` index, so repeated callbacks for the
+same stream are answered from process memory. Entries are dropped whenever a
+session's key or status changes (see ``engir.signals``); the short local TTL bounds
+staleness in other processes.
+"""
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .changes import change_seq_expression
+from .caching import TwoTierCache
+from .db_routing import PRIMARY
+from .models import Session
+from .scheduling import session_status_changed
+
+PUBLISHABLE = (Session.Status.SCHEDULED, Session.Status.LIVE)
+PLAYABLE = (Session.Status.LIVE,)
+# Cached for unknown keys so guessing keys does not turn into one query per attempt.
+UNKNOWN = {'session_id': None, 'classroom_id': None, 'status': None}
+
+stream_keys = TwoTierCache('stream_key', maxsize=4096, ttl=300, local_ttl=5)
+
+INGEST_DECISIONS = metrics.Counter(
+    'engir_ingest_decisions_total', 'RTMP ingest callback decisions by call and result.', ('call', 'result')
+)
+
+
+def _load(stream_key: str) -> dict:
+    # Primary only: a just-regenerated key must not be rejected because a replica lags.
+    row = (
+        Session.objects.using(PRIMARY)
+        .filter(stream_key=stream_key)
+        .order_by()
+        .values('id', 'classroom_id', 'status')
+        .first()
+    )
+    if row is None:
+        return UNKNOWN
+    return {'session_id': row['id'], 'classroom_id': row['classroom_id'], 'status': row['status']}
+
+
+def lookup(stream_key: str) -> Optional[dict]:
+    if not stream_key:
+        return None
+    entry = stream_keys.get(stream_key, _load)
+    return entry if entry['session_id'] is not None else None
+
+
+def invalidate(*keys: str) -> None:
+    for key in keys:
+        if key:
+            stream_keys.invalidate(key)
+
+
+def _go_live(entry: dict, stream_key: str) -> None:
+    with transaction.atomic():
+        updated = Session.objects.filter(pk=entry['session_id'], status=Session.Status.SCHEDULED).update(
+            status=Session.Status.LIVE, updated_at=timezone.now(), change_seq=change_seq_expression()
+        )
+        if updated:
+            transaction.on_commit(
+                lambda: session_status_changed.send(
+                    sender=Session,
+                    from_status=Session.Status.SCHEDULED,
+                    to_status=Session.Status.LIVE,
+                    session_ids=[entry['session_id']],
+                    classroom_ids=[entry['classroom_id']],
+                )
+            )
+            transaction.on_commit(
+                lambda: metrics.record_session_transition(Session.Status.SCHEDULED, Session.Status.LIVE, updated)
+            )
+    if updated:
+        invalidate(stream_key)
+
+
+def authorize(call: str, stream_key: str, auto_live: bool = False) -> bool:
+    """Decide an ingest callback; a publish may flip a scheduled session to live."""
+    entry = lookup(stream_key)
+    if call == 'publish':
+        allowed = entry is not None and entry['status'] in PUBLISHABLE
+        if allowed and auto_live and entry['status'] == Session.Status.SCHEDULED:
+            _go_live(entry, stream_key)
+    elif call == 'play':
+        allowed = entry is not None and entry['status'] in PLAYABLE
+    else:
+        allowed = entry is not None
+    INGEST_DECISIONS.inc(call=call or 'unknown', result='allowed' if allowed else 'denied')
+    return allowed
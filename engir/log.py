@@ -0,0 +1,152 @@
+"""Structured, non-blocking logging.
+
+``AsyncStreamHandler`` only enqueues records on the calling thread; a
+``QueueListener`` thread formats them with ``JSONFormatter`` and writes to the
+stream, so a slow stdout never stalls request workers. Request metadata is
+captured by ``RequestContextFilter`` from the context set by
+``engir.middleware.RequestContextMiddleware``.
+"""
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import metrics
+
+current_request = contextvars.ContextVar('engir_current_request', default=None)
+current_request_id = contextvars.ContextVar('engir_current_request_id', default='')
+
+CONTEXT_FIELDS = ('request_id', 'user_id', 'role', 'view')
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'} | set(
+    CONTEXT_FIELDS
+)
+
+LOG_RECORDS_DROPPED = metrics.Counter(
+    'engir_log_records_dropped_total', 'Log records dropped because the logging queue was full.'
+)
+
+
+def _request_user(request):
+    # Never force a lazy user: logging must not trigger a session or user query.
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return None
+    return user
+
+
+def _request_role(request, user) -> str:
+    token = request.__dict__.get('auth')
+    if token is not None and hasattr(token, 'get'):
+        role = token.get('role')
+        if role:
+            return role
+    cached = getattr(getattr(user, '_state', None), 'fields_cache', {})
+    if cached.get('teacher_profile') is not None:
+        return 'teacher'
+    if cached.get('student_profile') is not None:
+        return 'student'
+    return 'staff' if user.is_staff else ''
+
+
+def request_context(request=None) -> dict:
+    if request is None:
+        request = current_request.get()
+        request_id = current_request_id.get()
+    else:
+        request_id = getattr(request, 'request_id', '')
+    context = {'request_id': request_id, 'user_id': None, 'role': '', 'view': ''}
+    if request is None:
+        return context
+    user = _request_user(request)
+    if user is not None:
+        context['user_id'] = user.pk
+        context['role'] = _request_role(request, user)
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        context['view'] = match.view_name
+    return context
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id, user id, role and view name to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # django.request logs after the middleware chain returns but passes the request along.
+        request = getattr(record, 'request', None)
+        for key, value in request_context(request if hasattr(request, 'META') else None).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value not in (None, ''):
+                payload[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class AsyncStreamHandler(logging.handlers.QueueHandler):
+    """Queue records on the caller's thread and write them from a background listener.
+
+    When the bounded queue is full the record is dropped and counted instead of blocking.
+    """
+
+    def __init__(self, stream=None, queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt) -> None:
+        # Formatting happens on the listener thread, not in prepare().
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def stop(self) -> None:
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.flush()
+
+    def close(self) -> None:
+        self.stop()
+        super().close()
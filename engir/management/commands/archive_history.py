@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from engir.archive import DEFAULT_BATCH_SIZE, archive_history
+
+
+class Command(BaseCommand):
+    help = 'Move finished sessions and cancelled enrollments older than ENGIR_ARCHIVE_AFTER_DAYS into archive tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Override ENGIR_ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        totals = archive_history(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(f"Archived {totals['sessions']} sessions and {totals['enrollments']} enrollments.")
@@ -0,0 +1,25 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from engir.analytics import DEFAULT_CHUNK_DAYS, backfill
+
+
+class Command(BaseCommand):
+    help = 'Recompute the enrollment funnel rollups from the enrollments table, one window of days at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to recompute (YYYY-MM-DD); defaults to the first enrollment.')
+        parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            day = parse_date(options['since'])
+            if day is None:
+                raise CommandError('--since must be a date like 2024-01-31.')
+            since = datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+        total = backfill(since=since, chunk_days=options['chunk_days'])
+        self.stdout.write(f'Wrote {total} enrollment rollup rows.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from engir.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete delta-sync tombstones older than ENGIR_SYNC_TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(f'Pruned {deleted} tombstones.')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from engir.catalog import DEFAULT_BATCH_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute every classroom catalogue entry from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(f'Rebuilt {total} catalogue entries.')
@@ -0,0 +1,48 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from engir.db_routing import use_primary
+from engir.scheduling import DEFAULT_BATCH_SIZE, next_due_at, transition_overdue_sessions
+
+
+class Command(BaseCommand):
+    help = 'Complete overdue live/scheduled sessions, either once or in a polling loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit.')
+        parser.add_argument('--interval', type=float, default=60.0, help='Maximum seconds between passes.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        # Lagging replicas would hand out sessions that were already transitioned.
+        with use_primary():
+            self._loop(options)
+
+    def _loop(self, options):
+        while self._running:
+            close_old_connections()
+            totals = transition_overdue_sessions(batch_size=options['batch_size'])
+            if any(totals.values()):
+                summary = ', '.join(f'{count} {status}' for status, count in totals.items())
+                self.stdout.write(f'Completed overdue sessions: {summary}')
+            if options['once']:
+                break
+            deadline = time.monotonic() + self._sleep_seconds(options['interval'])
+            while self._running and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+
+    def _sleep_seconds(self, interval: float) -> float:
+        due_at = next_due_at()
+        if due_at is None:
+            return interval
+        return min(interval, max((due_at - timezone.now()).total_seconds(), 1.0))
+
+    def _stop(self, signum, frame):
+        self._running = False
@@ -0,0 +1,317 @@
+"""Lightweight Prometheus-compatible metrics.
+
+Every process keeps its samples in memory and periodically writes a snapshot to
+``settings.METRICS_DIR`` (one JSON file per pid). The ``/metrics`` view merges
+all snapshots in that directory, so several gunicorn workers scrape as a single
+target. Without a directory the metrics of the current process are exported.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+SNAPSHOT_PREFIX = 'metrics-'
+BASELINE_FILE = 'baselines.json'
+
+
+def _metrics_dir() -> str:
+    return getattr(settings, 'METRICS_DIR', '') or ''
+
+
+_process_token = (None, '')
+
+
+def _snapshot_name() -> str:
+    # Include the start time so a recycled pid never overwrites a dead worker's counters.
+    global _process_token
+    pid = os.getpid()
+    if _process_token[0] != pid:
+        _process_token = (pid, f'{SNAPSHOT_PREFIX}{pid}-{int(time.time() * 1000)}.json')
+    return _process_token[1]
+
+
+def _write_json(path: str, payload) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(payload, handle, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    ]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, 'Metric'] = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._dirty = False
+
+    def register(self, metric: 'Metric') -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered.')
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> 'Metric':
+        return self._metrics[name]
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def collect(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+        self._dirty = False
+
+    def flush(self, force: bool = False) -> None:
+        """Write this process' snapshot, at most once per ``METRICS_FLUSH_INTERVAL``."""
+        directory = _metrics_dir()
+        if not directory or not (self._dirty or force):
+            return
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if not force and now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, _snapshot_name()), self.collect())
+
+    def _snapshots(self):
+        directory = _metrics_dir()
+        if not directory:
+            return [self.collect()]
+        self.flush(force=True)
+        snapshots = []
+        for filename in sorted(os.listdir(directory)):
+            if not (filename.startswith(SNAPSHOT_PREFIX) and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding='utf-8') as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """Merge every process snapshot and return the text exposition format."""
+        merged: Dict[str, Dict[Tuple[str, ...], object]] = {name: {} for name in self._metrics}
+        for snapshot in self._snapshots():
+            for name, samples in snapshot.items():
+                if name not in self._metrics:
+                    continue
+                metric = self._metrics[name]
+                target = merged[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    target[key] = metric.merge(target.get(key), value)
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.expose(merged[name]))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def merge(self, current, value):
+        return (current or 0) + value
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def expose(self, samples: dict):
+        lines = self.header()
+        for key, value in sorted(samples.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._registry.mark_dirty()
+
+
+class Gauge(Metric):
+    """Gauge maintained through ``inc``/``dec`` deltas that are summed across processes.
+
+    ``baseline`` is an optional callable returning the true value; it is evaluated once per
+    metrics directory lifetime so the incremental deltas have something to start from.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, *args, baseline: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.baseline = baseline
+        self._offset: Optional[float] = None
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._registry.mark_dirty()
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        super().clear()
+        self._offset = None
+
+    def _baseline_offset(self, delta: float) -> float:
+        directory = _metrics_dir()
+        if not directory:
+            if self._offset is None:
+                self._offset = self.baseline() - delta
+            return self._offset
+        path = os.path.join(directory, BASELINE_FILE)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                offsets = json.load(handle)
+        except (OSError, ValueError):
+            offsets = {}
+        if self.name not in offsets:
+            offsets[self.name] = self.baseline() - delta
+            _write_json(path, offsets)
+        return offsets[self.name]
+
+    def expose(self, samples: dict):
+        if self.baseline is not None and not self.labelnames:
+            delta = samples.get((), 0)
+            samples = {(): self._baseline_offset(delta) + delta}
+        return super().expose(samples)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                # Per-bucket counts (last slot is +Inf) followed by the running sum.
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+        self._registry.mark_dirty()
+
+    def merge(self, current, value):
+        if current is None:
+            return list(value)
+        return [left + right for left, right in zip(current, value)]
+
+    def expose(self, samples: dict):
+        lines = self.header()
+        bucket_names = self.labelnames + ('le',)
+        for key, row in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), row[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_names, key + (le,))} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(row[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+def _live_sessions_baseline() -> float:
+    from .models import Session
+
+    return Session.objects.filter(status=Session.Status.LIVE).count()
+
+
+REQUEST_LATENCY = Histogram(
+    'engir_http_request_duration_seconds', 'Request latency by route name.', ('route', 'method')
+)
+REQUESTS = Counter('engir_http_requests_total', 'Requests by route name and status code.', ('route', 'method', 'status'))
+DB_QUERIES = Counter('engir_db_queries_total', 'Database queries executed while serving a route.', ('route', 'database'))
+CACHE_REQUESTS = Counter('engir_cache_requests_total', 'Cache lookups by cache name and result.', ('cache', 'result'))
+ENROLLMENT_ADMISSIONS = Counter(
+    'engir_enrollment_admissions_total', 'Enrollment attempts by outcome and reason.', ('outcome', 'reason')
+)
+SESSION_TRANSITIONS = Counter(
+    'engir_session_transitions_total', 'Session status transitions.', ('from_status', 'to_status')
+)
+LIVE_SESSIONS = Gauge('engir_sessions_live', 'Sessions currently live.', baseline=_live_sessions_baseline)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def record_admission(accepted: bool, reason: str = '') -> None:
+    ENROLLMENT_ADMISSIONS.inc(outcome='accepted' if accepted else 'rejected', reason=reason)
+
+
+def record_session_transition(old_status: Optional[str], new_status: str, count: int = 1) -> None:
+    if old_status == new_status or not count:
+        return
+    SESSION_TRANSITIONS.inc(count, from_status=old_status or 'new', to_status=new_status)
+    if new_status == 'live':
+        LIVE_SESSIONS.inc(count)
+    elif old_status == 'live':
+        LIVE_SESSIONS.dec(count)
+
+
+atexit.register(lambda: REGISTRY.flush(force=True))
@@ -0,0 +1,127 @@
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics
+from .log import current_request, current_request_id
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+STRONG_ETAG = re.compile(r'^"')
+
+
+def _route_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name if match else None) or 'unmatched'
+
+
+class _QueryCounter:
+    def __init__(self, alias: str):
+        self.alias = alias
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Record latency, status codes and DB query counts per resolved route name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counters = []
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                counter = _QueryCounter(connection.alias)
+                stack.enter_context(connection.execute_wrapper(counter))
+                counters.append(counter)
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = _route_name(request)
+        metrics.REQUEST_LATENCY.observe(elapsed, route=route, method=request.method)
+        metrics.REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        for counter in counters:
+            if counter.count:
+                metrics.DB_QUERIES.inc(counter.count, route=route, database=counter.alias)
+        metrics.REGISTRY.flush()
+        return response
+
+
+class RequestContextMiddleware:
+    """Expose the current request to log records and echo an ``X-Request-ID`` header."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        request_token = current_request.set(request)
+        id_token = current_request_id.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(request_token)
+            current_request_id.reset(id_token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class CompressionMiddleware:
+    """Negotiate brotli/gzip for text responses of at least ``COMPRESSION_MIN_SIZE`` bytes.
+
+    Streaming responses are compressed chunk by chunk; 304s, already-encoded and
+    small bodies pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if response.has_header('Content-Encoding') or not compression.is_compressible(response.get('Content-Type')):
+            return response
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        route = _route_name(request)
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compression.stream(response.streaming_content, encoding, route)
+            del response.headers['Content-Length']
+        else:
+            started = time.thread_time()
+            compressed = compression.compress_bytes(response.content, encoding)
+            cpu_seconds = time.thread_time() - started
+            compression.record(route, encoding, len(response.content), len(compressed), cpu_seconds)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is no longer byte-identical to the strong ETag's representation.
+        etag = response.get('ETag')
+        if etag and STRONG_ETAG.match(etag):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
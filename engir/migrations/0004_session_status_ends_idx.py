@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0003_teacher_user_student_enrollment_student'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['status', 'ends_at'], name='session_status_ends_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Scheduled and live sessions of one teacher may not overlap. PostgreSQL enforces it with a
+# GiST exclusion constraint over a half-open tstzrange; other databases rely on the
+# application check backed by session_teacher_interval_idx.
+CREATE_CONSTRAINT = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE engir_session ADD CONSTRAINT session_teacher_no_overlap EXCLUDE USING gist (
+    teacher_id WITH =,
+    tstzrange(starts_at, ends_at, '[)') WITH &&
+) WHERE (status IN ('scheduled', 'live') AND teacher_id IS NOT NULL AND ends_at IS NOT NULL);
+"""
+DROP_CONSTRAINT = 'ALTER TABLE engir_session DROP CONSTRAINT IF EXISTS session_teacher_no_overlap;'
+
+
+def backfill_teacher(apps, schema_editor):
+    Session = apps.get_model('engir', 'Session')
+    Classroom = apps.get_model('engir', 'Classroom')
+    for classroom_id, teacher_id in Classroom.objects.values_list('id', 'teacher_id').iterator():
+        Session.objects.filter(classroom_id=classroom_id).update(teacher_id=teacher_id)
+
+
+def check_no_overlaps(apps, schema_editor):
+    # Existing double-bookings would make the constraint fail to build. Which session gives
+    # way is a decision for people, so list them and stop instead of changing any data.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Session = apps.get_model('engir', 'Session')
+    blocking = Session.objects.filter(
+        status__in=('scheduled', 'live'), teacher_id__isnull=False, ends_at__isnull=False
+    )
+    overlaps = []
+    teacher_id = latest_id = latest_until = None
+    rows = blocking.order_by('teacher_id', 'starts_at', 'id').values_list('id', 'teacher_id', 'starts_at', 'ends_at')
+    for pk, row_teacher_id, starts_at, ends_at in rows.iterator():
+        if row_teacher_id == teacher_id and starts_at < latest_until:
+            overlaps.append(f'{pk} overlaps {latest_id}')
+            if ends_at > latest_until:
+                latest_id, latest_until = pk, ends_at
+            continue
+        teacher_id, latest_id, latest_until = row_teacher_id, pk, ends_at
+    if overlaps:
+        raise RuntimeError(
+            'Scheduled/live sessions of the same teacher overlap (session ids): '
+            f'{", ".join(overlaps)}. Reschedule or cancel them, then run the migration again.'
+        )
+
+
+def create_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_CONSTRAINT)
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0004_session_status_ends_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='teacher',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engir.teacher'),
+        ),
+        migrations.RunPython(backfill_teacher, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['teacher', 'starts_at', 'ends_at'], name='session_teacher_interval_idx'),
+        ),
+        migrations.RunPython(check_no_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(create_exclusion_constraint, drop_exclusion_constraint),
+    ]
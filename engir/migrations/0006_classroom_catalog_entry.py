@@ -0,0 +1,115 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:35
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# Substring search over the catalogue; other databases scan the (single) catalogue table.
+CREATE_TRGM_INDEX = '''
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS catalog_search_trgm_idx ON engir_classroomcatalogentry USING gin (search_text gin_trgm_ops);
+'''
+DROP_TRGM_INDEX = 'DROP INDEX IF EXISTS catalog_search_trgm_idx;'
+
+
+def backfill_catalog(apps, schema_editor):
+    # Same rows engir.catalog.rebuild() writes, computed from the historical models.
+    Classroom = apps.get_model('engir', 'Classroom')
+    Enrollment = apps.get_model('engir', 'Enrollment')
+    Session = apps.get_model('engir', 'Session')
+    ClassroomCatalogEntry = apps.get_model('engir', 'ClassroomCatalogEntry')
+    seats_taken = (
+        Enrollment.objects.filter(classroom=OuterRef('pk'), status__in=['pending', 'confirmed'])
+        .order_by()
+        .values('classroom')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    next_sessions = Session.objects.filter(classroom=OuterRef('pk'), status__in=['scheduled', 'live']).order_by('starts_at')
+    rows = (
+        Classroom.objects.annotate(
+            seats_taken=Coalesce(Subquery(seats_taken, output_field=IntegerField()), Value(0)),
+            next_session_id=Subquery(next_sessions.values('id')[:1]),
+            next_session_starts_at=Subquery(next_sessions.values('starts_at')[:1]),
+        )
+        .order_by('pk')
+        .values(
+            'id', 'teacher_id', 'teacher__full_name', 'title', 'code', 'tags', 'is_public', 'starts_at',
+            'capacity', 'seats_taken', 'next_session_id', 'next_session_starts_at', 'created_at',
+        )
+    )
+    entries = []
+    for row in rows.iterator():
+        available = max(row['capacity'] - row['seats_taken'], 0)
+        search_parts = [row['title'], row['code'], row['teacher__full_name'], *(str(tag) for tag in row['tags'] or ())]
+        entries.append(
+            ClassroomCatalogEntry(
+                classroom_id=row['id'],
+                teacher_id=row['teacher_id'],
+                teacher_name=row['teacher__full_name'],
+                title=row['title'],
+                code=row['code'],
+                tags=row['tags'] or [],
+                is_public=row['is_public'],
+                starts_at=row['starts_at'],
+                capacity=row['capacity'],
+                seats_taken=row['seats_taken'],
+                seats_available=available,
+                is_full=available == 0,
+                next_session_id=row['next_session_id'],
+                next_session_starts_at=row['next_session_starts_at'],
+                search_text=' '.join(part for part in search_parts if part).lower(),
+                classroom_created_at=row['created_at'],
+            )
+        )
+    ClassroomCatalogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRGM_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRGM_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0005_session_teacher_interval'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassroomCatalogEntry',
+            fields=[
+                ('classroom', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='engir.classroom')),
+                ('teacher_name', models.CharField(max_length=120)),
+                ('title', models.CharField(max_length=140)),
+                ('code', models.CharField(max_length=8)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('is_public', models.BooleanField(default=True)),
+                ('starts_at', models.DateTimeField(blank=True, null=True)),
+                ('capacity', models.PositiveIntegerField()),
+                ('seats_taken', models.PositiveIntegerField(default=0)),
+                ('seats_available', models.PositiveIntegerField(default=0)),
+                ('is_full', models.BooleanField(default=False)),
+                ('next_session_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('next_session_starts_at', models.DateTimeField(blank=True, null=True)),
+                ('search_text', models.TextField(blank=True)),
+                ('classroom_created_at', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('teacher', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engir.teacher')),
+            ],
+            options={
+                'verbose_name_plural': 'classroom catalog entries',
+                'ordering': ['-classroom_created_at'],
+                'indexes': [models.Index(fields=['is_public', '-classroom_created_at'], name='catalog_public_created_idx'), models.Index(fields=['is_public', 'next_session_starts_at'], name='catalog_public_next_idx'), models.Index(fields=['teacher', '-classroom_created_at'], name='catalog_teacher_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
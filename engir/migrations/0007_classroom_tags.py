@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_tags(apps, schema_editor):
+    Classroom = apps.get_model('engir', 'Classroom')
+    Tag = apps.get_model('engir', 'Tag')
+    ClassroomTag = apps.get_model('engir', 'ClassroomTag')
+    tag_ids = {}
+    links = []
+    for classroom_id, tags in Classroom.objects.values_list('id', 'tags').iterator():
+        names = []
+        for value in tags or ():
+            name = ' '.join(str(value).split()).lower()[:50]
+            if name and name not in names:
+                names.append(name)
+        for name in names:
+            if name not in tag_ids:
+                tag_ids[name] = Tag.objects.get_or_create(name=name)[0].id
+            links.append(ClassroomTag(classroom_id=classroom_id, tag_id=tag_ids[name]))
+    ClassroomTag.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0006_classroom_catalog_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassroomTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='engir.classroom')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='classroom_links', to='engir.tag')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='classroomtag',
+            constraint=models.UniqueConstraint(fields=('tag', 'classroom'), name='classroom_tag_unique'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
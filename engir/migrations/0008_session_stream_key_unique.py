@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0007_classroom_tags'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.UniqueConstraint(condition=models.Q(('stream_key', ''), _negated=True), fields=('stream_key',), name='session_stream_key_unique'),
+        ),
+    ]
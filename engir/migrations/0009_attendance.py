@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0008_session_stream_key_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('first_seen_at', models.DateTimeField()),
+                ('last_seen_at', models.DateTimeField()),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='engir.enrollment')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='engir.session')),
+            ],
+            options={
+                'ordering': ['session', '-minutes'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('session', 'enrollment'), name='attendance_session_enrollment_unique'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:44
+
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    # Same rows engir.analytics.backfill() writes: per hour and per UTC day of creation.
+    Enrollment = apps.get_model('engir', 'Enrollment')
+    EnrollmentRollup = apps.get_model('engir', 'EnrollmentRollup')
+    hourly = (
+        Enrollment.objects.order_by()
+        .values('classroom_id', 'source', 'status', bucket=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .annotate(count=Count('id'))
+    )
+    rows = []
+    daily = defaultdict(int)
+    for row in hourly.iterator():
+        bucket = row['bucket'].astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        classroom_id, source, status = row['classroom_id'], row['source'] or '', row['status']
+        daily[classroom_id, bucket.replace(hour=0), source, status] += row['count']
+        rows.append(
+            EnrollmentRollup(
+                classroom_id=classroom_id, granularity='hour', bucket=bucket, source=source, status=status, count=row['count']
+            )
+        )
+    for (classroom_id, bucket, source, status), count in daily.items():
+        rows.append(
+            EnrollmentRollup(
+                classroom_id=classroom_id, granularity='day', bucket=bucket, source=source, status=status, count=count
+            )
+        )
+    EnrollmentRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0009_attendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], max_length=12)),
+                ('count', models.IntegerField(default=0)),
+                ('classroom', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='engir.classroom')),
+            ],
+            options={
+                'ordering': ['granularity', 'bucket'],
+                'indexes': [models.Index(fields=['granularity', 'bucket'], name='enrollment_rollup_bucket_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='enrollmentrollup',
+            constraint=models.UniqueConstraint(fields=('classroom', 'granularity', 'bucket', 'source', 'status'), name='enrollment_rollup_key'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
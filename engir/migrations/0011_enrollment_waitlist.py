@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0010_enrollment_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('waitlisted', 'Waitlisted')], default='pending', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='enrollmentrollup',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('waitlisted', 'Waitlisted')], max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['classroom', 'status'], name='enrollment_class_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'waitlisted')), fields=['classroom', 'id'], name='enrollment_waitlist_idx'),
+        ),
+    ]
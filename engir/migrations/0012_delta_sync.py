@@ -0,0 +1,87 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+# Existing rows are stamped in id order so a first delta sync pages through them in a stable order.
+CREATE_SEQUENCE = '''
+CREATE SEQUENCE IF NOT EXISTS engir_change_seq;
+UPDATE engir_classroom SET change_seq = stamped.seq FROM (
+    SELECT id, nextval('engir_change_seq') AS seq FROM (SELECT id FROM engir_classroom ORDER BY id) ordered
+) stamped WHERE engir_classroom.id = stamped.id;
+UPDATE engir_session SET change_seq = stamped.seq FROM (
+    SELECT id, nextval('engir_change_seq') AS seq FROM (SELECT id FROM engir_session ORDER BY id) ordered
+) stamped WHERE engir_session.id = stamped.id;
+UPDATE engir_enrollment SET change_seq = stamped.seq FROM (
+    SELECT id, nextval('engir_change_seq') AS seq FROM (SELECT id FROM engir_enrollment ORDER BY id) ordered
+) stamped WHERE engir_enrollment.id = stamped.id;
+'''
+DROP_SEQUENCE = 'DROP SEQUENCE IF EXISTS engir_change_seq;'
+
+
+def create_change_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEQUENCE)
+
+
+def drop_change_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEQUENCE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0011_enrollment_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('classroom', 'Classroom'), ('session', 'Session'), ('enrollment', 'Enrollment')], max_length=12)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['change_seq'],
+            },
+        ),
+        migrations.AddField(
+            model_name='classroom',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['change_seq', 'id'], name='classroom_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['change_seq', 'id'], name='enrollment_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['change_seq', 'id'], name='session_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'change_seq'], name='tombstone_resource_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ),
+        migrations.RunPython(create_change_sequence, drop_change_sequence),
+    ]
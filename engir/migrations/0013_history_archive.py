@@ -0,0 +1,52 @@
+# Generated by Django 4.2.16 on 2026-10-19 05:56
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engir', '0012_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=140)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('live', 'Live'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('row', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('attendance', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sessions', to='engir.classroom')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+                'indexes': [models.Index(fields=['classroom', 'starts_at'], name='session_archive_class_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnrollmentArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('waitlisted', 'Waitlisted')], max_length=12)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('row', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('attendance', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_enrollments', to='engir.classroom')),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_enrollments', to='engir.student')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['classroom', 'created_at'], name='enrollment_archive_class_idx'), models.Index(fields=['created_at'], name='enrollment_archive_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+import django.db.models.functions.text
+
+# auth.User is not ours to declare constraints on, so its index is created here directly.
+# Blank emails are allowed on users (e.g. superusers) and stay out of the index.
+USER_EMAIL_CONSTRAINT = models.UniqueConstraint(
+    django.db.models.functions.text.Lower('email'), condition=~Q(email=''), name='user_email_ci_unique'
+)
+
+
+def lowercase_emails(apps, schema_editor):
+    # Rows that differ only by case must be merged by hand first; the unique indexes below refuse them.
+    email = django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('email'))
+    models_ = [apps.get_model(settings.AUTH_USER_MODEL)]
+    models_ += [apps.get_model('engir', name) for name in ('Teacher', 'Student', 'Enrollment')]
+    for model in models_:
+        model.objects.using(schema_editor.connection.alias).update(email=email)
+    # Signup usernames are the email too; login now lower-cases email-shaped usernames.
+    username = django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('username'))
+    models_[0].objects.using(schema_editor.connection.alias).filter(username__contains='@').update(username=username)
+
+
+def add_user_email_index(apps, schema_editor):
+    schema_editor.add_constraint(apps.get_model(settings.AUTH_USER_MODEL), USER_EMAIL_CONSTRAINT)
+
+
+def remove_user_email_index(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model(settings.AUTH_USER_MODEL), USER_EMAIL_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('engir', '0013_history_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='enrollment',
+            name='unique_enrollment_per_email',
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='teacher',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(models.F('classroom'), django.db.models.functions.text.Lower('email'), name='unique_enrollment_per_email'),
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='student_email_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='teacher',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='teacher_email_ci_unique'),
+        ),
+        migrations.RunPython(add_user_email_index, remove_user_email_index),
+    ]
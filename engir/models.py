@@ -1,14 +1,56 @@
+import functools
 import secrets
 import string
 from datetime import timedelta
 from typing import Optional
 
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.utils import timezone
 
+from . import metrics
+from .changes import change_seq_expression, next_change_seq
+
 User = settings.AUTH_USER_MODEL
 
+CLASS_CODE_ATTEMPTS = 8
+
+
+class ChangeTrackedModel(models.Model):
+    """Stamps ``change_seq`` from the global change sequence on every save, for delta sync."""
+
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.change_seq = next_change_seq(kwargs.get('using') or 'default')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'change_seq'}
+        super().save(*args, **kwargs)
+
+
+def normalize_email(value: Optional[str]) -> str:
+    """Emails are stored lower-cased; the unique indexes are on ``Lower('email')``."""
+    return (value or '').strip().lower()
+
+
+def normalize_login(value: Optional[str]) -> str:
+    """Signup usernames are the normalised email; other usernames (e.g. ``createsuperuser``) keep their case."""
+    value = (value or '').strip()
+    return normalize_email(value) if '@' in value else value
+
+
+def email_matches(value: str, field: str = 'email') -> Exact:
+    """Case-insensitive filter on ``field`` that the ``Lower(field)`` indexes can serve (``iexact`` cannot)."""
+    return Exact(Lower(field), normalize_email(value))
+
 
 def generate_class_code(length: int = 6) -> str:
     """Return an easy-to-share class code."""
@@ -16,12 +58,31 @@ def generate_class_code(length: int = 6) -> str:
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 
+@functools.lru_cache(maxsize=None)
+def _code_constraint_names(using: str) -> frozenset:
+    table = Classroom._meta.db_table
+    with connections[using].cursor() as cursor:
+        constraints = connections[using].introspection.get_constraints(cursor, table)
+    return frozenset(name for name, info in constraints.items() if info['unique'] and info['columns'] == ['code'])
+
+
+def _is_code_collision(exc: IntegrityError, using: str) -> bool:
+    """Whether ``exc`` is a violation of the unique class code, and not of any other constraint."""
+    cause = exc.__cause__
+    constraint = getattr(getattr(cause, 'diag', None), 'constraint_name', None)
+    if constraint:
+        # PostgreSQL names the violated constraint.
+        return constraint in _code_constraint_names(using)
+    # SQLite only says "UNIQUE constraint failed: <table>.<column>, ...".
+    return str(cause or exc).endswith(f'{Classroom._meta.db_table}.code')
+
+
 class Teacher(models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name='teacher_profile', null=True, blank=True
     )
     full_name = models.CharField(max_length=120)
-    email = models.EmailField(unique=True)
+    email = models.EmailField()
     headline = models.CharField(max_length=180, blank=True)
     bio = models.TextField(blank=True)
     profile_url = models.URLField(blank=True)
@@ -31,6 +92,9 @@ class Teacher(models.Model):
 
     class Meta:
         ordering = ['full_name']
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='teacher_email_ci_unique'),
+        ]
 
     def __str__(self) -> str:
         return self.full_name
@@ -40,6 +104,7 @@ class Teacher(models.Model):
             self.full_name = self.user.get_full_name() or self.user.username
         if self.user and not self.email:
             self.email = self.user.email
+        self.email = normalize_email(self.email)
         super().save(*args, **kwargs)
 
 
@@ -48,7 +113,7 @@ class Student(models.Model):
         User, on_delete=models.CASCADE, related_name='student_profile', null=True, blank=True
     )
     full_name = models.CharField(max_length=120)
-    email = models.EmailField(unique=True)
+    email = models.EmailField()
     bio = models.TextField(blank=True)
     interests = models.JSONField(default=list, blank=True)
     timezone = models.CharField(max_length=64, blank=True)
@@ -58,12 +123,19 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['full_name']
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='student_email_ci_unique'),
+        ]
 
     def __str__(self) -> str:
         return self.full_name
 
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
 
-class Classroom(models.Model):
+class Classroom(ChangeTrackedModel):
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='classes')
     title = models.CharField(max_length=140)
     description = models.TextField(blank=True)
@@ -79,20 +151,47 @@ class Classroom(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['change_seq', 'id'], name='classroom_change_seq_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.code})"
 
-    def save(self, *args, **kwargs):
-        if not self.code:
-            self.code = self._generate_unique_code()
-        super().save(*args, **kwargs)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_teacher_id = instance.__dict__.get('teacher_id')
+        instance._loaded_tags = instance.__dict__.get('tags')
+        instance._loaded_capacity = instance.__dict__.get('capacity')
+        return instance
 
-    def _generate_unique_code(self) -> str:
-        code = generate_class_code()
-        while Classroom.objects.filter(code=code).exists():
-            code = generate_class_code()
-        return code
+    def save(self, *args, **kwargs):
+        previous_teacher_id = getattr(self, '_loaded_teacher_id', None)
+        if previous_teacher_id is not None and previous_teacher_id != self.teacher_id:
+            # Sessions carry the teacher for the double-booking constraint; keep them in step.
+            with transaction.atomic(using=kwargs.get('using')):
+                self._save_with_code(*args, **kwargs)
+                self.sessions.update(
+                    teacher_id=self.teacher_id, change_seq=change_seq_expression(), updated_at=timezone.now()
+                )
+        else:
+            self._save_with_code(*args, **kwargs)
+        self._loaded_teacher_id = self.teacher_id
+
+    def _save_with_code(self, *args, **kwargs):
+        if self.code:
+            return super().save(*args, **kwargs)
+        # Let the unique index arbitrate: insert with a random code and retry only on a collision.
+        for attempt in range(CLASS_CODE_ATTEMPTS):
+            self.code = generate_class_code()
+            try:
+                with transaction.atomic(using=kwargs.get('using')):
+                    return super().save(*args, **kwargs)
+            except IntegrityError as exc:
+                self.code = ''
+                if not _is_code_collision(exc, kwargs.get('using') or 'default') or attempt == CLASS_CODE_ATTEMPTS - 1:
+                    raise
 
     @property
     def confirmed_enrollments(self) -> int:
@@ -116,11 +215,38 @@ class Classroom(models.Model):
         )
 
 
-class Enrollment(models.Model):
+class Tag(models.Model):
+    """Normalised (lower-cased) classroom label; ``Classroom.tags`` keeps the display spelling."""
+
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ClassroomTag(models.Model):
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='tag_links')
+    # Covered by the (tag, classroom) unique index, which also drives tag filtering.
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='classroom_links', db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'classroom'], name='classroom_tag_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.classroom_id}:{self.tag_id}"
+
+
+class Enrollment(ChangeTrackedModel):
     class Status(models.TextChoices):
         PENDING = 'pending', 'Pending'
         CONFIRMED = 'confirmed', 'Confirmed'
         CANCELLED = 'cancelled', 'Cancelled'
+        WAITLISTED = 'waitlisted', 'Waitlisted'
 
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='enrollments')
     student = models.ForeignKey(
@@ -138,14 +264,61 @@ class Enrollment(models.Model):
     class Meta:
         ordering = ['-created_at']
         constraints = [
-            models.UniqueConstraint(fields=['classroom', 'email'], name='unique_enrollment_per_email'),
+            models.UniqueConstraint('classroom', Lower('email'), name='unique_enrollment_per_email'),
         ]
+        indexes = [
+            # Seat counts scan only seat holders, never the waitlist.
+            models.Index(fields=['classroom', 'status'], name='enrollment_class_status_idx'),
+            # The waitlist in queue order (arrival = primary key), read from its head.
+            models.Index(
+                fields=['classroom', 'id'], condition=models.Q(status='waitlisted'), name='enrollment_waitlist_idx'
+            ),
+            models.Index(fields=['change_seq', 'id'], name='enrollment_change_seq_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The persisted funnel key, so engir.analytics can move the count when it changes.
+        instance._loaded_rollup_key = tuple(instance.__dict__.get(name) for name in ('classroom_id', 'source', 'status'))
+        return instance
 
     def __str__(self) -> str:
         return f"{self.full_name} → {self.classroom.title}"
 
+    def _lock_classrooms(self, classroom_ids, using: str) -> None:
+        # Classrooms before the enrollment row, the order admissions, promotions and bulk status changes
+        # use. The waitlist promotion run by the post_save/post_delete receivers would otherwise lock the
+        # classroom after this row and deadlock against them.
+        list(
+            Classroom.objects.using(using)
+            .select_for_update()
+            .filter(pk__in=classroom_ids)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
 
-class Session(models.Model):
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        previous = getattr(self, '_loaded_rollup_key', None)
+        if previous is None or (previous[0], previous[2]) == (self.classroom_id, self.status):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or 'default'
+        with transaction.atomic(using=using):
+            self._lock_classrooms({previous[0], self.classroom_id}, using)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        classroom_id, _, status = getattr(self, '_loaded_rollup_key', None) or (self.classroom_id, '', self.status)
+        if status not in (self.Status.PENDING, self.Status.CONFIRMED):
+            return super().delete(*args, **kwargs)
+        using = kwargs.get('using') or 'default'
+        with transaction.atomic(using=using):
+            self._lock_classrooms([classroom_id], using)
+            return super().delete(*args, **kwargs)
+
+
+class Session(ChangeTrackedModel):
     class Status(models.TextChoices):
         DRAFT = 'draft', 'Draft'
         SCHEDULED = 'scheduled', 'Scheduled'
@@ -160,7 +333,14 @@ class Session(models.Model):
         YOUTUBE = 'youtube', 'YouTube Live'
         OTHER = 'other', 'Other'
 
+    # Overlap checks bound their index scan by this (see engir.conflicts), so it holds for every write path.
+    MAX_DURATION = timedelta(hours=24)
+
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='sessions')
+    # Denormalised from the classroom so overlap checks and constraints need no join.
+    teacher = models.ForeignKey(
+        Teacher, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False
+    )
     title = models.CharField(max_length=140)
     description = models.TextField(blank=True)
     starts_at = models.DateTimeField()
@@ -180,13 +360,44 @@ class Session(models.Model):
 
     class Meta:
         ordering = ['starts_at']
+        indexes = [
+            models.Index(fields=['status', 'ends_at'], name='session_status_ends_idx'),
+            models.Index(fields=['teacher', 'starts_at', 'ends_at'], name='session_teacher_interval_idx'),
+            models.Index(fields=['change_seq', 'id'], name='session_change_seq_idx'),
+        ]
+        constraints = [
+            # Ingest callbacks resolve sessions by key; providers without RTMP keys leave it blank.
+            models.UniqueConstraint(
+                fields=['stream_key'], condition=~models.Q(stream_key=''), name='session_stream_key_unique'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.classroom.title} — {self.title} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted status so save() can report transitions without re-reading the row.
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_stream_key = instance.__dict__.get('stream_key')
+        return instance
+
+    def clean(self):
+        super().clean()
+        self._check_duration()
+
+    def _check_duration(self):
+        if self.starts_at and self.ends_at and self.ends_at - self.starts_at > self.MAX_DURATION:
+            raise ValidationError({'ends_at': 'Sessions can last at most 24 hours.'})
+
     def save(self, *args, **kwargs):
         if self.starts_at and not self.ends_at:
             self.ends_at = self.starts_at + timedelta(minutes=self.duration_minutes)
+        self._check_duration()
+        update_fields = kwargs.get('update_fields')
+        if self.classroom_id and (update_fields is None or 'classroom' in update_fields):
+            self.teacher_id = self.classroom.teacher_id
         if self.stream_provider == self.StreamProvider.CUSTOM and not self.stream_key:
             self.stream_key = self._generate_stream_key()
         if self.stream_key:
@@ -194,6 +405,10 @@ class Session(models.Model):
             self.host_url = self.host_url or f'{base}/host/{self.stream_key}'
             self.playback_url = self.playback_url or f'{base}/watch/{self.stream_key}'
         super().save(*args, **kwargs)
+        previous, current = getattr(self, '_loaded_status', None), self.status
+        # Counted only once the write is durable; a rolled-back save must not move the live gauge.
+        transaction.on_commit(lambda: metrics.record_session_transition(previous, current), using=kwargs.get('using'))
+        self._loaded_status = self.status
 
     def _generate_stream_key(self) -> str:
         token = secrets.token_urlsafe(16)
@@ -231,3 +446,169 @@ class Session(models.Model):
     @property
     def has_recording(self) -> bool:
         return bool(self.recording_url)
+
+
+class Attendance(models.Model):
+    """Minutes a student was present in a session, accumulated by ``engir.presence`` flushes."""
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='attendance')
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='attendance')
+    minutes = models.PositiveIntegerField(default=0)
+    first_seen_at = models.DateTimeField()
+    last_seen_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['session', '-minutes']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'enrollment'], name='attendance_session_enrollment_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.enrollment_id} @ {self.session_id}: {self.minutes} min"
+
+
+class SessionArchive(models.Model):
+    """A completed or cancelled session moved out of ``Session`` by ``engir.archive``.
+
+    ``row`` holds every column as it was; ``attendance`` the session's ``Attendance`` rows.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='archived_sessions')
+    title = models.CharField(max_length=140)
+    status = models.CharField(max_length=20, choices=Session.Status.choices)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(blank=True, null=True)
+    row = models.JSONField(encoder=DjangoJSONEncoder)
+    attendance = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['classroom', 'starts_at'], name='session_archive_class_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.title} ({self.status}, archived)"
+
+
+class EnrollmentArchive(models.Model):
+    """A cancelled enrollment moved out of ``Enrollment`` by ``engir.archive``."""
+
+    id = models.BigIntegerField(primary_key=True)
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='archived_enrollments')
+    student = models.ForeignKey(
+        'Student', on_delete=models.SET_NULL, related_name='archived_enrollments', null=True, blank=True
+    )
+    email = models.EmailField()
+    status = models.CharField(max_length=12, choices=Enrollment.Status.choices)
+    source = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField()
+    row = models.JSONField(encoder=DjangoJSONEncoder)
+    attendance = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['classroom', 'created_at'], name='enrollment_archive_class_idx'),
+            models.Index(fields=['created_at'], name='enrollment_archive_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.email} → {self.classroom_id} ({self.status}, archived)"
+
+
+class Tombstone(models.Model):
+    """A deleted classroom, session or enrollment, kept so delta sync can report the deletion."""
+
+    class Resource(models.TextChoices):
+        CLASSROOM = 'classroom', 'Classroom'
+        SESSION = 'session', 'Session'
+        ENROLLMENT = 'enrollment', 'Enrollment'
+
+    resource = models.CharField(max_length=12, choices=Resource.choices)
+    object_id = models.PositiveBigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['change_seq']
+        indexes = [
+            models.Index(fields=['resource', 'change_seq'], name='tombstone_resource_seq_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.resource} {self.object_id} deleted @ {self.change_seq}"
+
+
+class ClassroomCatalogEntry(models.Model):
+    """Denormalised catalogue card for one classroom, maintained by ``engir.catalog``."""
+
+    classroom = models.OneToOneField(
+        Classroom, on_delete=models.CASCADE, primary_key=True, related_name='catalog_entry'
+    )
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='+', db_index=False)
+    teacher_name = models.CharField(max_length=120)
+    title = models.CharField(max_length=140)
+    code = models.CharField(max_length=8)
+    tags = models.JSONField(default=list, blank=True)
+    is_public = models.BooleanField(default=True)
+    starts_at = models.DateTimeField(blank=True, null=True)
+    capacity = models.PositiveIntegerField()
+    seats_taken = models.PositiveIntegerField(default=0)
+    seats_available = models.PositiveIntegerField(default=0)
+    is_full = models.BooleanField(default=False)
+    next_session_id = models.PositiveIntegerField(blank=True, null=True)
+    next_session_starts_at = models.DateTimeField(blank=True, null=True)
+    # Lower-cased title, code, teacher name and tags for single-table search.
+    search_text = models.TextField(blank=True)
+    classroom_created_at = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-classroom_created_at']
+        verbose_name_plural = 'classroom catalog entries'
+        indexes = [
+            models.Index(fields=['is_public', '-classroom_created_at'], name='catalog_public_created_idx'),
+            models.Index(fields=['is_public', 'next_session_starts_at'], name='catalog_public_next_idx'),
+            models.Index(fields=['teacher', '-classroom_created_at'], name='catalog_teacher_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.title} ({self.code})"
+
+
+class EnrollmentRollup(models.Model):
+    """Enrollments created in one UTC hour or day, by classroom, source and current status.
+
+    Maintained incrementally by ``engir.analytics``; ``backfill_enrollment_rollups``
+    recomputes it from ``Enrollment``.
+    """
+
+    class Granularity(models.TextChoices):
+        HOUR = 'hour', 'Hour'
+        DAY = 'day', 'Day'
+
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='+', db_index=False)
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    bucket = models.DateTimeField()
+    source = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=12, choices=Enrollment.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['granularity', 'bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['classroom', 'granularity', 'bucket', 'source', 'status'], name='enrollment_rollup_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket'], name='enrollment_rollup_bucket_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.classroom_id} {self.granularity} {self.bucket:%Y-%m-%d %H:%M} {self.source or '-'} {self.status}: {self.count}"
@@ -0,0 +1,19 @@
+"""Password hashing: hashers whose cost is tuned from settings.
+
+Which hasher is used for new passwords is chosen with ``ENGIR_PASSWORD_HASHER``;
+every hasher stays listed in ``PASSWORD_HASHERS`` so existing hashes keep
+verifying and are upgraded on the next login. ``benchmarks/bench_hashing.py``
+helps pick cost parameters for the target hardware.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PBKDF2_ITERATIONS
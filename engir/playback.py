@@ -0,0 +1,49 @@
+"""Issue signed playback/host URLs for the people allowed to join a session.
+
+Verification lives in ``engir.playback_token`` and needs nothing but the keys.
+"""
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+from . import metrics, playback_token
+from .models import Enrollment
+
+OPEN_ENROLLMENT = (Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED)
+
+VERIFICATIONS = metrics.Counter('engir_playback_verifications_total', 'Playback token checks by result.', ('result',))
+
+
+def signing_keys():
+    return settings.PLAYBACK_SIGNING_KEYS
+
+
+def grant_for(user, session) -> Optional[Tuple[str, str]]:
+    """``(scope, subject)`` for ``user`` on ``session``, or ``None`` when they may not join."""
+    teacher = getattr(user, 'teacher_profile', None)
+    if teacher is not None and session.classroom.teacher_id == teacher.pk:
+        return playback_token.SCOPE_HOST, f'teacher:{teacher.pk}'
+    student = getattr(user, 'student_profile', None)
+    if student is not None and Enrollment.objects.filter(
+        classroom_id=session.classroom_id, student=student, status__in=OPEN_ENROLLMENT
+    ).exists():
+        return playback_token.SCOPE_PLAY, f'student:{student.pk}'
+    return None
+
+
+def issue(session, scope: str, subject: str) -> dict:
+    expires_at = int(time.time()) + settings.PLAYBACK_TOKEN_TTL
+    token = playback_token.sign(signing_keys()[0], session.pk, scope, subject, expires_at)
+    base = settings.PLAYBACK_BASE_URL.rstrip('/')
+    payload = {
+        'token': token,
+        'scope': scope,
+        'expires_at': datetime.fromtimestamp(expires_at, tz=dt_timezone.utc).isoformat(),
+        'playback_url': f'{base}/watch/{session.pk}?token={token}',
+    }
+    if scope == playback_token.SCOPE_HOST:
+        payload['host_url'] = f'{base}/host/{session.pk}?token={token}'
+    return payload
@@ -0,0 +1,185 @@
+"""Viewer presence from heartbeats, without a database write per heartbeat.
+
+A heartbeat claims ``(session, minute, student)`` with one ``cache.add``. Only the
+first heartbeat of a student in a minute wins, whichever worker receives it. The
+winner bumps the shared per-minute viewer counter and adds the student to this
+process' set for that session-minute. Because every present minute is recorded by
+exactly one process, flushing simply adds minutes: ``flush()`` turns the sets into
+per-enrollment minute counts and applies them to ``Attendance`` in one locked read
+and one bulk write per session.
+
+Flushes run on a background timer thread (and at exit), never on the heartbeat
+request. A session whose write fails is put back into the buffer for the next flush.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Dict, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+
+from . import metrics
+from .models import Attendance, Enrollment
+
+HEARTBEAT_TTL = 150
+OPEN_ENROLLMENT = (Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED)
+
+HEARTBEATS = metrics.Counter('engir_presence_heartbeats_total', 'Viewer heartbeats by result.', ('result',))
+FLUSHED_MINUTES = metrics.Counter('engir_attendance_minutes_flushed_total', 'Attendance minutes written.')
+FLUSH_FAILURES = metrics.Counter('engir_attendance_flush_failures_total', 'Session flushes put back after an error.')
+
+logger = logging.getLogger(__name__)
+
+# session_id -> minute -> student ids
+_buffer: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+_lock = threading.Lock()
+_flusher = None
+
+
+def _minute(now: float) -> int:
+    return int(now // 60)
+
+
+def _viewers_key(session_id: int, minute: int) -> str:
+    return f'engir:viewers:{session_id}:{minute}'
+
+
+def record_heartbeat(session_id: int, student_id: int, now: float = None) -> bool:
+    """Count ``student_id`` as present this minute; returns ``False`` for repeat heartbeats."""
+    now = time.time() if now is None else now
+    minute = _minute(now)
+    if not cache.add(f'engir:heartbeat:{session_id}:{minute}:{student_id}', 1, HEARTBEAT_TTL):
+        HEARTBEATS.inc(result='repeat')
+        return False
+    viewers_key = _viewers_key(session_id, minute)
+    if not cache.add(viewers_key, 1, HEARTBEAT_TTL):
+        try:
+            cache.incr(viewers_key)
+        except ValueError:
+            cache.add(viewers_key, 1, HEARTBEAT_TTL)
+    with _lock:
+        _buffer[session_id][minute].add(student_id)
+    HEARTBEATS.inc(result='counted')
+    _start_flusher()
+    return True
+
+
+def live_viewers(session_id: int, now: float = None) -> int:
+    """Viewers seen in the current or previous minute (a minute that just began is still filling)."""
+    minute = _minute(time.time() if now is None else now)
+    counts = cache.get_many([_viewers_key(session_id, minute), _viewers_key(session_id, minute - 1)])
+    return max(counts.values(), default=0)
+
+
+def _take():
+    with _lock:
+        taken = {session_id: minutes for session_id, minutes in _buffer.items() if minutes}
+        _buffer.clear()
+    return taken
+
+
+def _put_back(session_id: int, minutes: Dict[int, Set[int]]) -> None:
+    with _lock:
+        buffered = _buffer[session_id]
+        for minute, students in minutes.items():
+            buffered[minute] |= students
+
+
+def _minute_time(minute: int) -> datetime:
+    return datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc)
+
+
+def _apply(session_id: int, per_student: Dict[int, list]) -> int:
+    enrollment_ids = dict(
+        Enrollment.objects.filter(
+            classroom__sessions=session_id, student_id__in=per_student, status__in=OPEN_ENROLLMENT
+        ).values_list('student_id', 'id')
+    )
+    totals = {
+        enrollment_ids[student_id]: (len(minutes), min(minutes), max(minutes))
+        for student_id, minutes in per_student.items()
+        if student_id in enrollment_ids
+    }
+    if not totals:
+        return 0
+    with transaction.atomic():
+        existing = {
+            row.enrollment_id: row
+            for row in Attendance.objects.select_for_update().filter(session_id=session_id, enrollment_id__in=totals)
+        }
+        created = []
+        for enrollment_id, (count, first, last) in totals.items():
+            row = existing.get(enrollment_id)
+            if row is None:
+                created.append(
+                    Attendance(
+                        session_id=session_id,
+                        enrollment_id=enrollment_id,
+                        minutes=count,
+                        first_seen_at=_minute_time(first),
+                        last_seen_at=_minute_time(last),
+                    )
+                )
+                continue
+            row.minutes += count
+            row.first_seen_at = min(row.first_seen_at, _minute_time(first))
+            row.last_seen_at = max(row.last_seen_at, _minute_time(last))
+        if existing:
+            Attendance.objects.bulk_update(existing.values(), ['minutes', 'first_seen_at', 'last_seen_at'])
+        if created:
+            Attendance.objects.bulk_create(created)
+    return sum(count for count, _, _ in totals.values())
+
+
+def _apply_retrying(session_id: int, per_student: Dict[int, list]) -> int:
+    try:
+        return _apply(session_id, per_student)
+    except IntegrityError:
+        # Another worker created the same rows concurrently; they exist now, so retry as updates.
+        return _apply(session_id, per_student)
+
+
+def flush() -> int:
+    """Write buffered presence to ``Attendance``; returns the number of minutes written."""
+    written = 0
+    for session_id, minutes in _take().items():
+        per_student = defaultdict(list)
+        for minute, students in minutes.items():
+            for student_id in students:
+                per_student[student_id].append(minute)
+        try:
+            written += _apply_retrying(session_id, per_student)
+        except Exception:
+            _put_back(session_id, minutes)
+            FLUSH_FAILURES.inc()
+            logger.exception('Attendance flush failed; kept for retry', extra={'session_id': session_id})
+    if written:
+        FLUSHED_MINUTES.inc(written)
+    return written
+
+
+def _flush_periodically() -> None:
+    while True:
+        time.sleep(settings.PRESENCE_FLUSH_INTERVAL)
+        close_old_connections()
+        flush()
+
+
+def _start_flusher() -> None:
+    # Started lazily so each forked worker runs its own timer.
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_periodically, name='engir-presence-flush', daemon=True)
+            _flusher.start()
+
+
+atexit.register(flush)
@@ -0,0 +1,277 @@
+"""Read-only list representations built straight from ``values()`` rows.
+
+Each builder returns exactly what the corresponding ``ModelSerializer`` would for
+the same rows (``test_projections`` keeps them in lockstep) but skips model
+instantiation, per-field serializer dispatch and the per-row seat/next-session
+queries of ``ClassroomSerializer``.
+"""
+from typing import Dict, Iterable, List
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from .models import Classroom, Enrollment, Session
+
+_datetime = serializers.DateTimeField().to_representation
+
+TEACHER_VALUES = (
+    'teacher_id',
+    'teacher__user_id',
+    'teacher__full_name',
+    'teacher__email',
+    'teacher__user__email',
+    'teacher__headline',
+    'teacher__bio',
+    'teacher__profile_url',
+    'teacher__avatar_url',
+    'teacher__created_at',
+    'teacher__updated_at',
+)
+CLASSROOM_VALUES = (
+    'id',
+    'title',
+    'description',
+    'code',
+    'starts_at',
+    'duration_minutes',
+    'capacity',
+    'meeting_url',
+    'tags',
+    'is_public',
+    'created_at',
+    'updated_at',
+    'seats_taken',
+    'next_session_id',
+) + TEACHER_VALUES
+SESSION_SUMMARY_VALUES = (
+    'id',
+    'title',
+    'starts_at',
+    'ends_at',
+    'status',
+    'stream_provider',
+    'recording_url',
+)
+ENROLLMENT_VALUES = (
+    'id',
+    'classroom_id',
+    'full_name',
+    'email',
+    'phone_number',
+    'notes',
+    'status',
+    'source',
+    'created_at',
+    'updated_at',
+    'student_id',
+    'student__user_id',
+    'student__full_name',
+    'student__email',
+    'student__bio',
+    'student__interests',
+    'student__timezone',
+    'student__avatar_url',
+    'student__created_at',
+    'student__updated_at',
+)
+CATALOG_VALUES = (
+    'classroom_id',
+    'code',
+    'title',
+    'teacher_id',
+    'teacher_name',
+    'tags',
+    'starts_at',
+    'capacity',
+    'seats_taken',
+    'seats_available',
+    'is_full',
+    'next_session_id',
+    'next_session_starts_at',
+)
+
+
+def _optional_datetime(value):
+    return _datetime(value) if value is not None else None
+
+
+def _with_user_id(payload: dict, user_id) -> dict:
+    # DRF skips ``source='user.id'`` fields entirely when the profile has no user.
+    if user_id is not None:
+        payload['user_id'] = user_id
+    return payload
+
+
+def annotate_classroom_summary(queryset):
+    """Add ``seats_taken`` and ``next_session_id`` as correlated subqueries."""
+    seats_taken = (
+        Enrollment.objects.filter(
+            classroom=OuterRef('pk'), status__in=[Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED]
+        )
+        .order_by()
+        .values('classroom')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    next_session = (
+        Session.objects.filter(classroom=OuterRef('pk'), status__in=[Session.Status.SCHEDULED, Session.Status.LIVE])
+        .order_by('starts_at')
+        .values('id')[:1]
+    )
+    return queryset.annotate(
+        seats_taken=Coalesce(Subquery(seats_taken, output_field=IntegerField()), Value(0)),
+        next_session_id=Subquery(next_session),
+    )
+
+
+def classroom_values(queryset):
+    return annotate_classroom_summary(queryset.prefetch_related(None)).values(*CLASSROOM_VALUES)
+
+
+def _session_summaries(session_ids: Iterable[int]) -> Dict[int, dict]:
+    session_ids = [session_id for session_id in set(session_ids) if session_id is not None]
+    if not session_ids:
+        return {}
+    summaries = {}
+    for row in Session.objects.filter(id__in=session_ids).values(*SESSION_SUMMARY_VALUES):
+        session = Session(status=row['status'], ends_at=row['ends_at'])
+        summaries[row['id']] = {
+            'id': row['id'],
+            'title': row['title'],
+            'starts_at': _datetime(row['starts_at']),
+            'ends_at': _optional_datetime(row['ends_at']),
+            'status': row['status'],
+            'stream_provider': row['stream_provider'],
+            'recording_url': row['recording_url'],
+            'is_joinable': session.is_joinable,
+            'is_live': session.is_live,
+        }
+    return summaries
+
+
+def _teacher(row: dict) -> dict:
+    payload = {'id': row['teacher_id']}
+    _with_user_id(payload, row['teacher__user_id'])
+    payload.update(
+        {
+            'full_name': row['teacher__full_name'],
+            'email': row['teacher__user__email'] if row['teacher__user_id'] else row['teacher__email'],
+            'headline': row['teacher__headline'],
+            'bio': row['teacher__bio'],
+            'profile_url': row['teacher__profile_url'],
+            'avatar_url': row['teacher__avatar_url'],
+            'created_at': _datetime(row['teacher__created_at']),
+            'updated_at': _datetime(row['teacher__updated_at']),
+        }
+    )
+    return payload
+
+
+def represent_classrooms(rows: Iterable[dict]) -> List[dict]:
+    """Turn ``classroom_values()`` rows into ``ClassroomSerializer`` output with one extra query."""
+    rows = list(rows)
+    sessions = _session_summaries(row['next_session_id'] for row in rows)
+    data = []
+    for row in rows:
+        available = max(row['capacity'] - row['seats_taken'], 0)
+        data.append(
+            {
+                'id': row['id'],
+                'teacher': _teacher(row),
+                'title': row['title'],
+                'description': row['description'],
+                'code': row['code'],
+                'starts_at': _optional_datetime(row['starts_at']),
+                'duration_minutes': row['duration_minutes'],
+                'capacity': row['capacity'],
+                'meeting_url': row['meeting_url'],
+                'tags': row['tags'],
+                'is_public': row['is_public'],
+                'available_seats': available,
+                'is_full': available == 0,
+                'next_session': sessions.get(row['next_session_id']),
+                'created_at': _datetime(row['created_at']),
+                'updated_at': _datetime(row['updated_at']),
+            }
+        )
+    return data
+
+
+def enrollment_values(queryset):
+    return queryset.select_related(None).prefetch_related(None).values(*ENROLLMENT_VALUES)
+
+
+def _student(row: dict):
+    if row['student_id'] is None:
+        return None
+    payload = {'id': row['student_id']}
+    _with_user_id(payload, row['student__user_id'])
+    payload.update(
+        {
+            'full_name': row['student__full_name'],
+            'email': row['student__email'],
+            'bio': row['student__bio'],
+            'interests': row['student__interests'],
+            'timezone': row['student__timezone'],
+            'avatar_url': row['student__avatar_url'],
+            'created_at': _datetime(row['student__created_at']),
+            'updated_at': _datetime(row['student__updated_at']),
+        }
+    )
+    return payload
+
+
+def represent_enrollments(rows: Iterable[dict]) -> List[dict]:
+    """Turn ``enrollment_values()`` rows into ``EnrollmentSerializer`` output.
+
+    Classrooms are resolved once per distinct id, so a page costs three queries
+    regardless of its size.
+    """
+    rows = list(rows)
+    classroom_ids = {row['classroom_id'] for row in rows}
+    classrooms = {
+        classroom['id']: classroom
+        for classroom in represent_classrooms(classroom_values(Classroom.objects.filter(id__in=classroom_ids)))
+    }
+    return [
+        {
+            'id': row['id'],
+            'classroom': classrooms.get(row['classroom_id']),
+            'student': _student(row),
+            'full_name': row['full_name'],
+            'email': row['email'],
+            'phone_number': row['phone_number'],
+            'notes': row['notes'],
+            'status': row['status'],
+            'source': row['source'],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
+
+
+def catalog_values(queryset):
+    return queryset.values(*CATALOG_VALUES)
+
+
+def represent_catalog(rows: Iterable[dict]) -> List[dict]:
+    """Catalogue cards straight from ``ClassroomCatalogEntry`` rows; no joins, no extra queries."""
+    return [
+        {
+            'id': row['classroom_id'],
+            'code': row['code'],
+            'title': row['title'],
+            'teacher': {'id': row['teacher_id'], 'full_name': row['teacher_name']},
+            'tags': row['tags'],
+            'starts_at': _optional_datetime(row['starts_at']),
+            'capacity': row['capacity'],
+            'seats_taken': row['seats_taken'],
+            'available_seats': row['seats_available'],
+            'is_full': row['is_full'],
+            'next_session_id': row['next_session_id'],
+            'next_session_starts_at': _optional_datetime(row['next_session_starts_at']),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,52 @@
+"""JSON renderer/parser backed by orjson when it is installed, DRF's stdlib codec otherwise."""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    orjson = None
+
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Compact responses go through orjson; indented output and anything orjson rejects use DRF's path."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        encoder = self.encoder_class()
+        try:
+            # Datetimes are handed back to DRF's encoder so the wire format stays identical.
+            ret = orjson.dumps(
+                data,
+                default=encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict JavaScript subset, as DRF does.
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,76 @@
+"""Time-driven session status transitions.
+
+Sessions nobody ends would otherwise stay ``live``/``scheduled`` forever. The
+scheduler moves them to ``completed`` with guarded, batched ``UPDATE`` statements
+so read paths can trust the indexed ``status`` column.
+"""
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import metrics
+from .changes import change_seq_expression
+from .models import Session
+
+# Sent once per batch with ``from_status``, ``to_status``, ``session_ids`` and ``classroom_ids``.
+session_status_changed = Signal()
+
+GRACE_PERIOD = timedelta(minutes=5)
+DEFAULT_BATCH_SIZE = 500
+
+
+def _transition_batch(from_status: str, to_status: str, cutoff, batch_size: int) -> int:
+    with transaction.atomic():
+        rows = list(
+            Session.objects.filter(status=from_status, ends_at__lt=cutoff)
+            .order_by('ends_at')
+            .values_list('id', 'classroom_id')[:batch_size]
+        )
+        if not rows:
+            return 0
+        session_ids = [row[0] for row in rows]
+        # Re-check the status in the UPDATE so concurrent schedulers or hosts never double-transition.
+        updated = Session.objects.filter(id__in=session_ids, status=from_status).update(
+            status=to_status, updated_at=timezone.now(), change_seq=change_seq_expression()
+        )
+        classroom_ids = sorted({row[1] for row in rows})
+        transaction.on_commit(
+            lambda: session_status_changed.send(
+                sender=Session,
+                from_status=from_status,
+                to_status=to_status,
+                session_ids=session_ids,
+                classroom_ids=classroom_ids,
+            )
+        )
+        transaction.on_commit(lambda: metrics.record_session_transition(from_status, to_status, updated))
+    return len(rows)
+
+
+def transition_overdue_sessions(now=None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Complete live and scheduled sessions whose end time (plus grace) has passed."""
+    cutoff = (now or timezone.now()) - GRACE_PERIOD
+    totals = {}
+    for from_status in (Session.Status.LIVE, Session.Status.SCHEDULED):
+        total = 0
+        while True:
+            processed = _transition_batch(from_status, Session.Status.COMPLETED, cutoff, batch_size)
+            total += processed
+            if processed < batch_size:
+                break
+        totals[str(from_status)] = total
+    return totals
+
+
+def next_due_at() -> Optional[timezone.datetime]:
+    """When the next currently-open session becomes overdue, used to sleep no longer than needed."""
+    ends_at = (
+        Session.objects.filter(status__in=[Session.Status.LIVE, Session.Status.SCHEDULED], ends_at__isnull=False)
+        .order_by('ends_at')
+        .values_list('ends_at', flat=True)
+        .first()
+    )
+    return ends_at + GRACE_PERIOD if ends_at else None
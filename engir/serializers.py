@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Classroom, Enrollment, Session, Student, Teacher
+from . import conflicts, metrics, tokens, waitlist
+from .caching import classroom_for_code
+from .models import Classroom, Enrollment, Session, Student, Teacher, email_matches, normalize_email, normalize_login
 
 User = get_user_model()
 
@@ -94,8 +102,6 @@ class SessionSummarySerializer(serializers.ModelSerializer):
             'ends_at',
             'status',
             'stream_provider',
-            'playback_url',
-            'host_url',
             'recording_url',
             'is_joinable',
             'is_live',
@@ -134,6 +140,13 @@ class ClassroomSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('code', 'created_at', 'updated_at')
 
+    def validate_teacher_id(self, value):
+        if self.instance is not None and value.pk != self.instance.teacher_id:
+            found = conflicts.reassignment_conflicts(self.instance, value.pk)
+            if found:
+                raise serializers.ValidationError([conflicts.describe(conflict) for conflict in found])
+        return value
+
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     classroom = ClassroomSerializer(read_only=True)
@@ -161,36 +174,111 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'updated_at',
         )
         read_only_fields = ('created_at', 'updated_at')
+        # The (classroom, email) constraint is checked in create(); DRF's generated validator
+        # would otherwise make classroom_id mandatory and break joining by class_code.
+        validators = []
 
     def validate(self, attrs):
         classroom = attrs.get('classroom')
         class_code = attrs.pop('class_code', None)
 
         if classroom is None and class_code:
-            class_code = class_code.upper().strip()
-            try:
-                classroom = Classroom.objects.get(code=class_code)
-            except Classroom.DoesNotExist as exc:
-                raise serializers.ValidationError({'class_code': 'Invalid class code.'}) from exc
+            classroom = classroom_for_code(class_code)
+            if classroom is None:
+                metrics.record_admission(False, 'invalid_code')
+                raise serializers.ValidationError({'class_code': 'Invalid class code.'})
 
+        if classroom is None and self.instance is not None:
+            classroom = self.instance.classroom
         if classroom is None:
             raise serializers.ValidationError('Provide classroom_id or class_code to join a class.')
 
-        if classroom.is_full:
-            raise serializers.ValidationError({'classroom': 'This class is already full.'})
-
+        # Capacity is decided in create() under the classroom lock; a full class waitlists instead of rejecting.
         attrs['classroom'] = classroom
         return attrs
 
     def create(self, validated_data):
         classroom = validated_data['classroom']
         email = validated_data['email']
-        if Enrollment.objects.filter(classroom=classroom, email=email).exists():
+        # Checked before taking the lock so retries of an accepted or queued join stay cheap.
+        if Enrollment.objects.filter(email_matches(email), classroom=classroom).exists():
+            metrics.record_admission(False, 'duplicate')
             raise serializers.ValidationError('You are already registered for this class with this email.')
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                admitted = waitlist.admission_status(waitlist.lock_classroom(classroom.pk))
+                if admitted == Enrollment.Status.WAITLISTED or validated_data.get('status') in (
+                    None,
+                    Enrollment.Status.WAITLISTED,
+                ):
+                    validated_data['status'] = admitted
+                enrollment = super().create(validated_data)
+        except IntegrityError as exc:
+            metrics.record_admission(False, 'duplicate')
+            raise serializers.ValidationError('You are already registered for this class with this email.') from exc
+        metrics.record_admission(True, 'waitlisted' if admitted == Enrollment.Status.WAITLISTED else '')
+        return enrollment
+
+    def update(self, instance, validated_data):
+        classroom = validated_data.get('classroom', instance.classroom)
+        target = validated_data.get('status', instance.status)
+        takes_seat = target in waitlist.SEAT_STATUSES and (
+            instance.status not in waitlist.SEAT_STATUSES or classroom.pk != instance.classroom_id
+        )
+        if not takes_seat:
+            return super().update(instance, validated_data)
+        # Same check as create(), under the same lock, so an edit cannot overfill a class.
+        with transaction.atomic():
+            locked = waitlist.lock_classrooms({instance.classroom_id, classroom.pk})
+            if waitlist.admission_status(locked[classroom.pk]) == Enrollment.Status.WAITLISTED:
+                raise serializers.ValidationError({'status': 'This class is full.'})
+            return super().update(instance, validated_data)
+
+
+class BulkEnrollmentStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+    status = serializers.ChoiceField(choices=waitlist.BULK_STATUSES)
+
+    def validate_ids(self, value):
+        if len(value) > settings.BULK_STATUS_MAX_IDS:
+            raise serializers.ValidationError(f'At most {settings.BULK_STATUS_MAX_IDS} enrollments per request.')
+        return list(dict.fromkeys(value))
+
+
+class SessionListSerializer(serializers.ListSerializer):
+    """Bulk creation: overlaps inside the batch and with stored sessions are checked in one query."""
+
+    def to_internal_value(self, data):
+        # Raised here rather than in validate() so errors stay aligned with the submitted items.
+        attrs = super().to_internal_value(data)
+        intervals = {}
+        for index, item in enumerate(attrs):
+            if item.get('status', Session.Status.SCHEDULED) in conflicts.BLOCKING_STATUSES:
+                starts_at, ends_at = conflicts.session_interval(
+                    item['starts_at'], item.get('ends_at'), item.get('duration_minutes')
+                )
+                intervals[index] = (item['classroom'].teacher_id, starts_at, ends_at)
+        errors = [{} for _ in attrs]
+        indexes = list(intervals)
+        for left, right in conflicts.overlapping_pairs([intervals[index] for index in indexes]):
+            errors[indexes[right]] = {'starts_at': [f'Overlaps item {indexes[left]} of this request.']}
+        for conflict in conflicts.find_conflicts(intervals.values()):
+            for index, interval in intervals.items():
+                if not errors[index] and conflicts.overlaps(conflict, interval):
+                    errors[index] = {'starts_at': [conflicts.describe(conflict)]}
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
 
 
 class SessionSerializer(serializers.ModelSerializer):
+    """Stream URLs, keys and the passcode are only shown to the classroom's teacher.
+
+    Everyone else joins through a per-user playback token (``POST /api/sessions/<id>/playback_token/``).
+    """
+
+    OWNER_ONLY_FIELDS = ('stream_key', 'host_url', 'playback_url', 'meeting_passcode')
+
     classroom = ClassroomSerializer(read_only=True)
     classroom_id = serializers.PrimaryKeyRelatedField(
         queryset=Classroom.objects.all(), source='classroom', write_only=True
@@ -223,12 +311,40 @@ class SessionSerializer(serializers.ModelSerializer):
             'updated_at',
         )
         read_only_fields = ('stream_key', 'is_joinable', 'is_live', 'created_at', 'updated_at')
+        list_serializer_class = SessionListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if not self._is_owner(instance):
+            for field in self.OWNER_ONLY_FIELDS:
+                data.pop(field, None)
+        return data
+
+    def _is_owner(self, instance) -> bool:
+        user = getattr(self.context.get('request'), 'user', None)
+        teacher = getattr(user, 'teacher_profile', None) if user is not None and user.is_authenticated else None
+        return teacher is not None and instance.classroom.teacher_id == teacher.pk
 
     def validate(self, attrs):
         starts_at = attrs.get('starts_at') or getattr(self.instance, 'starts_at', None)
         ends_at = attrs.get('ends_at') or getattr(self.instance, 'ends_at', None)
         if starts_at and ends_at and ends_at <= starts_at:
             raise serializers.ValidationError({'ends_at': 'End time must be after the start time.'})
+        starts_at, ends_at = conflicts.session_interval(
+            starts_at, ends_at, attrs.get('duration_minutes', getattr(self.instance, 'duration_minutes', None))
+        )
+        if starts_at and ends_at - starts_at > conflicts.MAX_SESSION_DURATION:
+            raise serializers.ValidationError({'ends_at': 'Sessions can last at most 24 hours.'})
+        status_value = attrs.get('status', getattr(self.instance, 'status', Session.Status.SCHEDULED))
+        # Bulk requests are checked once for the whole batch by SessionListSerializer.
+        if isinstance(self.parent, SessionListSerializer) or status_value not in conflicts.BLOCKING_STATUSES:
+            return attrs
+        classroom = attrs.get('classroom') or getattr(self.instance, 'classroom', None)
+        if classroom and starts_at:
+            interval = (classroom.teacher_id, starts_at, ends_at)
+            found = conflicts.find_conflicts([interval], exclude_ids=[getattr(self.instance, 'pk', None)])
+            if found:
+                raise serializers.ValidationError({'starts_at': conflicts.describe(found[0])})
         return attrs
 
 
@@ -246,11 +362,56 @@ class AuthTokenSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
+        attrs[self.username_field] = normalize_login(attrs.get(self.username_field))
         data = super().validate(attrs)
         data['user'] = UserSerializer(self.user).data
         return data
 
 
+def _build_user(email, validated_data):
+    """Return an unsaved user carrying its password hash, so signup is a single INSERT."""
+    password_hash = make_password(validated_data.pop('password'))
+    return User(
+        username=normalize_login(email),
+        email=normalize_email(email),
+        first_name=validated_data.get('full_name', '').split(' ')[0],
+        password=password_hash,
+    )
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Issue a new access/refresh pair and revoke the presented refresh token.
+
+    Revocation uses ``cache.add``, so two concurrent refreshes with the same token
+    cannot both succeed; replaying a rotated token is rejected.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise InvalidToken(self.error_messages['no_active_account'])
+        if not tokens.revoke(refresh):
+            raise InvalidToken('Token has been revoked.')
+
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        return {'access': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            attrs['refresh'] = RefreshToken(attrs['refresh'])
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0]) from exc
+        return attrs
+
+
 class TeacherRegistrationSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True, min_length=8)
@@ -261,18 +422,16 @@ class TeacherRegistrationSerializer(serializers.Serializer):
     avatar_url = serializers.URLField(required=False, allow_blank=True)
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.filter(email_matches(value)).exists():
             raise serializers.ValidationError('A user with this email already exists.')
         return value
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
         email = validated_data.pop('email')
-        user = User.objects.create_user(username=email, email=email)
-        user.set_password(password)
-        user.first_name = validated_data.get('full_name', '').split(' ')[0]
-        user.save()
-        teacher = Teacher.objects.create(user=user, email=email, **validated_data)
+        user = _build_user(email, validated_data)
+        with transaction.atomic():
+            user.save()
+            teacher = Teacher.objects.create(user=user, email=email, **validated_data)
         return teacher
 
 
@@ -286,17 +445,15 @@ class StudentRegistrationSerializer(serializers.Serializer):
     avatar_url = serializers.URLField(required=False, allow_blank=True)
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.filter(email_matches(value)).exists():
             raise serializers.ValidationError('A user with this email already exists.')
         return value
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
         email = validated_data.pop('email')
         interests = validated_data.pop('interests', [])
-        user = User.objects.create_user(username=email, email=email)
-        user.set_password(password)
-        user.first_name = validated_data.get('full_name', '').split(' ')[0]
-        user.save()
-        student = Student.objects.create(user=user, email=email, interests=interests, **validated_data)
+        user = _build_user(email, validated_data)
+        with transaction.atomic():
+            user.save()
+            student = Student.objects.create(user=user, email=email, interests=interests, **validated_data)
         return student
@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import analytics, catalog, ingest, metrics, sync, tagging, waitlist
+from .caching import classroom_codes
+from .models import Classroom, Enrollment, Session, Teacher, Tombstone
+from .scheduling import session_status_changed
+
+TOMBSTONE_RESOURCES = {
+    Classroom: Tombstone.Resource.CLASSROOM,
+    Session: Tombstone.Resource.SESSION,
+    Enrollment: Tombstone.Resource.ENROLLMENT,
+}
+
+
+def _invalidate_stream_keys(*keys):
+    transaction.on_commit(lambda: ingest.invalidate(*keys))
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, **kwargs):
+    catalog.schedule_refresh([instance.classroom_id])
+    _invalidate_stream_keys(instance.stream_key, getattr(instance, '_loaded_stream_key', None))
+    instance._loaded_stream_key = instance.stream_key
+
+
+@receiver(post_delete, sender=Session)
+def session_deleted(sender, instance, **kwargs):
+    if instance.status == Session.Status.LIVE:
+        transaction.on_commit(lambda: metrics.record_session_transition(Session.Status.LIVE, 'deleted'))
+    catalog.schedule_refresh([instance.classroom_id])
+    _invalidate_stream_keys(instance.stream_key)
+
+
+@receiver(session_status_changed)
+def sessions_transitioned(sender, session_ids, classroom_ids, **kwargs):
+    catalog.refresh(classroom_ids)
+    ingest.invalidate(*Session.objects.filter(id__in=session_ids).values_list('stream_key', flat=True))
+
+
+@receiver(post_save, sender=Classroom)
+def classroom_saved(sender, instance, created, **kwargs):
+    if getattr(instance, '_loaded_tags', None) != instance.tags:
+        tagging.sync_classroom_tags(instance)
+        instance._loaded_tags = list(instance.tags or [])
+    previous_capacity = getattr(instance, '_loaded_capacity', None)
+    instance._loaded_capacity = instance.capacity
+    if previous_capacity is not None and instance.capacity > previous_capacity:
+        waitlist.promote(instance.pk)
+    catalog.schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    catalog.schedule_refresh([instance.classroom_id])
+
+
+def _rollup_key(enrollment):
+    return enrollment.classroom_id, enrollment.source, enrollment.status
+
+
+def _seat(rollup_key):
+    classroom_id, _, status = rollup_key
+    return classroom_id, status
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_moved(sender, instance, created, **kwargs):
+    # Same transaction as the enrollment write, so the funnel never counts a rolled-back signup
+    # and a freed seat is handed to the waitlist before anyone else can take it.
+    previous = None if created else getattr(instance, '_loaded_rollup_key', None)
+    current = _rollup_key(instance)
+    if previous is None and not created:
+        # Saved from an instance that was not loaded from the database; nothing to move from.
+        return
+    analytics.record_enrollment_change(instance, previous, current)
+    instance._loaded_rollup_key = current
+    if previous is not None and waitlist.frees_seat(_seat(previous), _seat(current)):
+        waitlist.promote(previous[0])
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_removed(sender, instance, origin=None, **kwargs):
+    if getattr(origin, 'model', type(origin)) is not Enrollment:
+        # Cascaded from a classroom (or teacher) delete, which removes its rollups and waitlist too.
+        return
+    previous = getattr(instance, '_loaded_rollup_key', None) or _rollup_key(instance)
+    analytics.record_enrollment_change(instance, previous, None)
+    if waitlist.frees_seat(_seat(previous), None):
+        waitlist.promote(previous[0])
+
+
+@receiver(post_save, sender=Teacher)
+def teacher_saved(sender, instance, created, **kwargs):
+    if not created:
+        catalog.schedule_refresh(Classroom.objects.filter(teacher=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Classroom)
+def classroom_deleted(sender, instance, **kwargs):
+    classroom_codes.invalidate(instance.code)
+
+
+@receiver(post_delete, sender=Classroom)
+@receiver(post_delete, sender=Session)
+@receiver(post_delete, sender=Enrollment)
+def record_tombstone(sender, instance, **kwargs):
+    # Cascades included: clients holding the children must drop them too.
+    sync.record_deletion(TOMBSTONE_RESOURCES[sender], instance.pk)
@@ -0,0 +1,125 @@
+"""Delta sync for offline clients.
+
+Classrooms, sessions and enrollments carry ``change_seq`` (see ``engir.changes``),
+stamped on every write. Deletions leave a ``Tombstone`` with their own sequence
+number. A sync page merges both streams in sequence order, starting after the
+caller's cursor, and each stream is read through its ``(change_seq, ...)`` index. So
+a client that is up to date costs two index probes, and the traffic is proportional
+to what changed.
+
+A sequence number is taken before its transaction commits, so a slow transaction
+can commit a number lower than one already served. To cover that, the cursor only
+moves past items older than ``SYNC_SETTLE_SECONDS``. Newer items are still
+returned, but they come back on the next call, so clients must apply changes
+idempotently.
+
+Cursors are ``"<seq>.<id>"``. Tombstones are kept for
+``SYNC_TOMBSTONE_RETENTION_DAYS``; pruning keeps the newest expired tombstone of
+each resource, and every deletion it removed has a lower sequence number. A cursor
+whose first following tombstone is already expired could have missed pruned
+deletions, so it is refused and the client must sync again from scratch. A cursor
+with no expired deletion after it stays valid however long the client was idle.
+"""
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from .changes import next_change_seq
+from .models import Tombstone
+
+START = (-1, 0)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ExpiredCursor(InvalidCursor):
+    pass
+
+
+def encode_cursor(seq: int, object_id: int) -> str:
+    return f'{seq}.{object_id}'
+
+
+def parse_cursor(raw: str) -> Tuple[int, int]:
+    try:
+        seq, object_id = (int(part) for part in raw.split('.'))
+    except ValueError:
+        raise InvalidCursor('Malformed cursor.')
+    return seq, object_id
+
+
+def _retention_cutoff(now: datetime) -> datetime:
+    return now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def record_deletion(resource: str, object_id: int) -> None:
+    Tombstone.objects.create(resource=resource, object_id=object_id, change_seq=next_change_seq())
+
+
+def prune_tombstones(now: datetime = None) -> int:
+    """Delete expired tombstones, keeping the newest expired one per resource as the horizon."""
+    expired = Tombstone.objects.filter(deleted_at__lt=_retention_cutoff(now or datetime.now(dt_timezone.utc)))
+    deleted = 0
+    for resource, horizon in expired.values_list('resource').annotate(horizon=Max('change_seq')).order_by():
+        count, _ = expired.filter(resource=resource, change_seq__lt=horizon).delete()
+        deleted += count
+    return deleted
+
+
+def changes(
+    resource: str,
+    queryset,
+    represent: Callable[[List[int]], List[dict]],
+    cursor: Optional[str],
+    limit: int,
+    now: datetime = None,
+) -> dict:
+    """One page of changed rows of ``queryset`` and tombstones of ``resource`` after ``cursor``.
+
+    ``represent`` turns the changed ids into API payloads; it is called once per page.
+    Without a cursor this is a full snapshot and deletions are not reported.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    seq, object_id = parse_cursor(cursor) if cursor else START
+    keys = queryset.filter(Q(change_seq__gt=seq) | Q(change_seq=seq, id__gt=object_id)).order_by('change_seq', 'id')
+    # (seq, id for the cursor, changed at, object id, deleted)
+    items = [
+        (row_seq, row_id, changed_at, row_id, False)
+        for row_seq, row_id, changed_at in keys.values_list('change_seq', 'id', 'updated_at')[: limit + 1]
+    ]
+    if cursor:
+        tombstones = list(
+            Tombstone.objects.filter(resource=resource, change_seq__gt=seq)
+            .order_by('change_seq')
+            .values_list('change_seq', 'object_id', 'deleted_at')[: limit + 1]
+        )
+        if tombstones and tombstones[0][2] < _retention_cutoff(now):
+            raise ExpiredCursor('Cursor is older than the deletion log; sync again without a cursor.')
+        items.extend((row_seq, 0, deleted_at, deleted_id, True) for row_seq, deleted_id, deleted_at in tombstones)
+        items.sort(key=lambda item: item[:2])
+    page, overflow = items[:limit], len(items) > limit
+
+    settled_before = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    next_cursor = None
+    for item_seq, cursor_id, changed_at, _, _ in page:
+        if changed_at > settled_before:
+            break
+        next_cursor = encode_cursor(item_seq, cursor_id)
+    if next_cursor is None:
+        next_cursor = cursor or encode_cursor(*START)
+
+    changed_ids = [object_id for *_, object_id, deleted in page if not deleted]
+    order = {changed_id: index for index, changed_id in enumerate(changed_ids)}
+    rows = sorted(represent(changed_ids), key=lambda row: order[row['id']]) if changed_ids else []
+    return {
+        'changes': rows,
+        'deleted': [object_id for *_, object_id, deleted in page if deleted],
+        'cursor': next_cursor,
+        # Only worth calling straight back when this page moved the cursor.
+        'has_more': overflow and next_cursor != cursor,
+    }
@@ -0,0 +1,81 @@
+"""Normalised classroom tags.
+
+``Classroom.tags`` stays the display list shown on cards; every save mirrors it into
+``Tag``/``ClassroomTag`` so filtering and facet counts are plain indexed joins on
+every database backend instead of JSON scans.
+"""
+from typing import Iterable, List
+
+from django.db.models import Count
+
+from .models import ClassroomTag, Tag
+
+MAX_TAG_LENGTH = Tag._meta.get_field('name').max_length
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def normalize_tag(value) -> str:
+    return ' '.join(str(value).split()).lower()[:MAX_TAG_LENGTH]
+
+
+def normalize_tags(values: Iterable) -> List[str]:
+    """Lower-cased, whitespace-collapsed, de-duplicated tags in their original order."""
+    seen = []
+    for value in values or ():
+        tag = normalize_tag(value)
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def parse_tags_param(raw: str) -> List[str]:
+    return normalize_tags(raw.split(',')) if raw else []
+
+
+def sync_classroom_tags(classroom) -> None:
+    """Make the join rows of ``classroom`` match ``classroom.tags``."""
+    names = normalize_tags(classroom.tags)
+    if names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = set(Tag.objects.filter(name__in=names).values_list('id', flat=True)) if names else set()
+    existing = set(ClassroomTag.objects.filter(classroom=classroom).values_list('tag_id', flat=True))
+    stale = existing - tag_ids
+    if stale:
+        ClassroomTag.objects.filter(classroom=classroom, tag_id__in=stale).delete()
+    missing = tag_ids - existing
+    if missing:
+        ClassroomTag.objects.bulk_create(
+            [ClassroomTag(classroom=classroom, tag_id=tag_id) for tag_id in missing], ignore_conflicts=True
+        )
+
+
+def classroom_ids_with_tags(tags: List[str], match: str = MATCH_ANY):
+    """Subquery of classroom ids carrying any (or all) of ``tags``."""
+    links = ClassroomTag.objects.filter(tag__name__in=tags)
+    if match == MATCH_ALL and len(tags) > 1:
+        return (
+            links.values('classroom_id')
+            .annotate(matched=Count('tag_id'))
+            .filter(matched=len(tags))
+            .values('classroom_id')
+        )
+    return links.values('classroom_id')
+
+
+def filter_by_tags(queryset, tags: List[str], match: str = MATCH_ANY, field: str = 'pk'):
+    if not tags:
+        return queryset
+    return queryset.filter(**{f'{field}__in': classroom_ids_with_tags(tags, match)})
+
+
+def tag_facets(classroom_queryset, field: str = 'pk') -> List[dict]:
+    """``[{'tag', 'count'}]`` over the classrooms of ``classroom_queryset`` in one aggregate query."""
+    rows = (
+        ClassroomTag.objects.filter(classroom_id__in=classroom_queryset.order_by().values(field))
+        .values('tag__name')
+        .annotate(count=Count('classroom_id'))
+        .order_by('-count', 'tag__name')
+        .values_list('tag__name', 'count')
+    )
+    return [{'tag': name, 'count': count} for name, count in rows]
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from engir import admin as engir_admin
+from engir.models import Classroom, Enrollment, Session, Teacher
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.superuser = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'strongpass')
+        self.client.force_login(self.superuser)
+        self.teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+
+    def add_classroom(self, index):
+        classroom = Classroom.objects.create(teacher=self.teacher, title=f'Class {index}', capacity=3)
+        Enrollment.objects.create(classroom=classroom, full_name='Leo', email=f'leo{index}@example.com')
+        Session.objects.create(classroom=classroom, title='Kickoff', starts_at=timezone.now())
+        return classroom
+
+    def changelist_queries(self, model_name):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(f'admin:engir_{model_name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        self.add_classroom(0)
+        baseline = {name: self.changelist_queries(name) for name in ('classroom', 'enrollment', 'session')}
+        for index in range(1, 6):
+            self.add_classroom(index)
+        for name, count in baseline.items():
+            self.assertEqual(self.changelist_queries(name), count, name)
+
+    def test_seat_column_uses_annotation(self):
+        classroom = self.add_classroom(0)
+        response = self.client.get(reverse('admin:engir_classroom_changelist'))
+        row = response.context['cl'].result_list.get(pk=classroom.pk)
+        self.assertEqual(row.seats_taken, 1)
+
+    def test_inlines_are_limited(self):
+        classroom = self.add_classroom(0)
+        Enrollment.objects.bulk_create(
+            Enrollment(classroom=classroom, full_name='Bulk', email=f'bulk{index}@example.com')
+            for index in range(engir_admin.INLINE_LIMIT + 5)
+        )
+        response = self.client.get(reverse('admin:engir_classroom_change', args=[classroom.pk]))
+        self.assertEqual(response.status_code, 200)
+        formsets = {formset.formset.prefix: formset.formset for formset in response.context['inline_admin_formsets']}
+        self.assertEqual(len(formsets['enrollments'].forms), engir_admin.INLINE_LIMIT)
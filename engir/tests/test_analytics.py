@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from engir.models import Classroom, Enrollment, EnrollmentRollup, Teacher
+
+
+def snapshot():
+    return sorted(
+        EnrollmentRollup.objects.exclude(count=0).values_list(
+            'classroom_id', 'granularity', 'bucket', 'source', 'status', 'count'
+        )
+    )
+
+
+class EnrollmentFunnelTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='teacher@example.com', password='strongpass')
+        self.client.force_authenticate(user)
+        teacher = Teacher.objects.create(user=user, full_name='Jane Mentor', email='teacher@example.com')
+        other = Teacher.objects.create(full_name='Other Mentor', email='other@example.com')
+        self.classroom = Classroom.objects.create(teacher=teacher, title='Streaming', capacity=50)
+        self.foreign = Classroom.objects.create(teacher=other, title='Lighting', capacity=50)
+        self.enrollments = [
+            Enrollment.objects.create(
+                classroom=self.classroom, full_name=f'Student {i}', email=f's{i}@example.com', source=source
+            )
+            for i, source in enumerate(['ads', 'ads', 'ads', 'newsletter', ''])
+        ]
+        Enrollment.objects.create(classroom=self.foreign, full_name='Elsewhere', email='x@example.com', source='ads')
+
+    def test_rollups_follow_status_changes_and_deletes(self):
+        first, second, *_ = self.enrollments
+        first.status = Enrollment.Status.CONFIRMED
+        first.save()
+        second.status = Enrollment.Status.CANCELLED
+        second.save(update_fields=['status'])
+        self.enrollments[-1].delete()
+        incremental = snapshot()
+        call_command('backfill_enrollment_rollups', chunk_days=1, stdout=open('/dev/null', 'w'))
+        self.assertEqual(snapshot(), incremental)
+        day = EnrollmentRollup.objects.filter(classroom=self.classroom, granularity='day', source='ads')
+        self.assertEqual(dict(day.values_list('status', 'count')), {'pending': 1, 'confirmed': 1, 'cancelled': 1})
+
+    def test_backfill_buckets_history_by_creation_time(self):
+        old = timezone.now() - timedelta(days=3)
+        # update() bypasses signals, as bulk imports would.
+        Enrollment.objects.filter(pk=self.enrollments[0].pk).update(created_at=old)
+        call_command('backfill_enrollment_rollups', chunk_days=2, stdout=open('/dev/null', 'w'))
+        days = EnrollmentRollup.objects.filter(classroom=self.classroom, granularity='day')
+        self.assertEqual(sorted(days.values_list('count', flat=True)), [1, 1, 1, 2])
+        self.assertEqual(days.filter(count=1, source='ads').get().bucket.date(), old.astimezone(timezone.utc).date())
+
+    def test_funnel_endpoint_reads_only_rollups(self):
+        self.enrollments[0].status = Enrollment.Status.CONFIRMED
+        self.enrollments[0].save()
+        url = reverse('enrollment-funnel')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        totals = response.data['totals']
+        self.assertEqual((totals['total'], totals['confirmed'], totals['confirmation_rate']), (5, 1, 0.2))
+        self.assertEqual(response.data['sources'][0]['source'], 'ads')
+        self.assertEqual(response.data['sources'][0]['total'], 3)
+
+        response = self.client.get(url, {'source': 'newsletter', 'interval': 'hour'})
+        self.assertEqual(response.data['totals']['total'], 1)
+        self.assertEqual(len(response.data['series']), 1)
+        self.assertEqual(self.client.get(url, {'classroom': self.foreign.pk}).status_code, 403)
+        self.assertEqual(self.client.get(url, {'interval': 'week'}).status_code, 400)
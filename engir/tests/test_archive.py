@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from engir.models import (
+    Attendance,
+    Classroom,
+    Enrollment,
+    EnrollmentArchive,
+    EnrollmentRollup,
+    Session,
+    SessionArchive,
+    Teacher,
+    Tombstone,
+)
+
+
+def rollups():
+    return sorted(EnrollmentRollup.objects.exclude(count=0).values_list('granularity', 'bucket', 'status', 'count'))
+
+
+class HistoryArchiveTests(APITestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=teacher, title='Streaming', capacity=10)
+        old = timezone.now() - timedelta(days=400)
+        self.old_session = Session.objects.create(
+            classroom=self.classroom, title='Old', starts_at=old, status=Session.Status.COMPLETED
+        )
+        self.recent_session = Session.objects.create(
+            classroom=self.classroom, title='Recent', starts_at=timezone.now() - timedelta(days=2),
+            status=Session.Status.COMPLETED,
+        )
+        self.dropped = Enrollment.objects.create(
+            classroom=self.classroom, full_name='Leo', email='leo@example.com', source='ads',
+            status=Enrollment.Status.CANCELLED,
+        )
+        self.kept = Enrollment.objects.create(classroom=self.classroom, full_name='Mia', email='mia@example.com')
+        Session.objects.filter(pk=self.old_session.pk).update(ends_at=old + timedelta(hours=1))
+        Enrollment.objects.filter(pk=self.dropped.pk).update(created_at=old, updated_at=old)
+        Attendance.objects.create(
+            session=self.old_session, enrollment=self.dropped, minutes=40, first_seen_at=old, last_seen_at=old
+        )
+        call_command('backfill_enrollment_rollups', stdout=open('/dev/null', 'w'))
+
+    def test_moves_old_rows_with_their_attendance(self):
+        before = rollups()
+        call_command('archive_history', batch_size=1, stdout=open('/dev/null', 'w'))
+
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), [self.recent_session.pk])
+        self.assertEqual(list(Enrollment.objects.values_list('pk', flat=True)), [self.kept.pk])
+        self.assertFalse(Attendance.objects.exists())
+        archived = SessionArchive.objects.get(pk=self.old_session.pk)
+        self.assertEqual((archived.title, archived.row['stream_key']), ('Old', self.old_session.stream_key))
+        self.assertEqual(archived.attendance[0]['minutes'], 40)
+        enrollment = EnrollmentArchive.objects.get(pk=self.dropped.pk)
+        self.assertEqual((enrollment.email, enrollment.row['full_name']), ('leo@example.com', 'Leo'))
+        self.assertEqual(enrollment.attendance, [])  # already archived with its session
+
+        # Sync clients see archived rows go; the funnel still counts the enrollment.
+        self.assertEqual(
+            set(Tombstone.objects.values_list('resource', 'object_id')),
+            {(Tombstone.Resource.SESSION, self.old_session.pk), (Tombstone.Resource.ENROLLMENT, self.dropped.pk)},
+        )
+        self.assertEqual(rollups(), before)
+        call_command('backfill_enrollment_rollups', stdout=open('/dev/null', 'w'))
+        self.assertEqual(rollups(), before)
+
+        response = self.client.get(reverse('session-list'))
+        listed = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row['id'] for row in listed], [self.recent_session.pk])
+
+    @override_settings(DATABASE_REPLICAS=['replica_lagging'])
+    def test_reads_only_from_the_primary(self):
+        # The alias does not exist, so any read routed to a replica would raise.
+        call_command('archive_history', stdout=open('/dev/null', 'w'))
+        self.assertEqual(SessionArchive.objects.using('default').get().attendance[0]['minutes'], 40)
+
+    def test_respects_the_age_threshold(self):
+        call_command('archive_history', days=1000, stdout=open('/dev/null', 'w'))
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertFalse(SessionArchive.objects.exists() or EnrollmentArchive.objects.exists())
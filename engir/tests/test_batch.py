@@ -0,0 +1,81 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from engir import tokens
+from engir.authentication import DenylistJWTAuthentication
+from engir.models import Classroom, Student, Teacher
+
+BOOT = [
+    {'id': 'me', 'path': '/api/auth/me/'},
+    {'id': 'dashboard', 'path': '/api/dashboard/student/'},
+    {'id': 'classes', 'path': '/api/classes/?is_public=true'},
+    {'id': 'sessions', 'path': '/api/sessions/?upcoming=true'},
+]
+
+
+def make_student():
+    user = get_user_model().objects.create_user(username='leo@example.com', email='leo@example.com', password='pw')
+    Student.objects.create(user=user, full_name='Leo', email='leo@example.com')
+    teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+    Classroom.objects.create(teacher=teacher, title='Streaming')
+    return user
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tokens.revoked_tokens.clear_local()
+        access = RefreshToken.for_user(make_student()).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def batch(self, requests, **extra):
+        return self.client.post(reverse('batch'), {'requests': requests, **extra}, format='json')
+
+    def test_boot_calls_match_individual_responses_with_one_authentication(self):
+        original = DenylistJWTAuthentication.authenticate
+        with mock.patch.object(DenylistJWTAuthentication, 'authenticate', autospec=True, side_effect=original) as auth:
+            response = self.batch(BOOT)
+        self.assertEqual(auth.call_count, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)['responses']
+        self.assertEqual(list(results), ['me', 'dashboard', 'classes', 'sessions'])
+        for item in BOOT:
+            direct = self.client.get(item['path'])
+            batched = results[item['id']]
+            self.assertEqual(batched['status'], direct.status_code)
+            direct_body = json.loads(direct.content)
+            # The signed calendar URL embeds a timestamp, so it differs across a second boundary.
+            for body in (batched['body'], direct_body):
+                if isinstance(body, dict):
+                    body.pop('calendar_url', None)
+            self.assertEqual(batched['body'], direct_body)
+
+    def test_sub_requests_fail_independently(self):
+        self.client.credentials()
+        response = self.batch(['/api/auth/me/', '/api/classes/', '/api/nowhere/', '/api/batch/'])
+        results = json.loads(response.content)['responses']
+        self.assertEqual([results[key]['status'] for key in '0123'], [401, 200, 404, 404])
+
+    def test_rejects_writes_and_oversized_batches(self):
+        self.assertEqual(self.batch([{'method': 'POST', 'path': '/api/enrollments/'}]).status_code, 400)
+        self.assertEqual(self.batch(['/api/classes/'] * 11).status_code, 400)
+        self.assertEqual(self.batch([{'id': 'a', 'path': '/api/classes/'}] * 2).status_code, 400)
+
+
+class ParallelBatchTests(TransactionTestCase):
+    def test_parallel_matches_sequential(self):
+        client = APIClient()
+        client.force_authenticate(make_student())
+        url = reverse('batch')
+        sequential = client.post(url, {'requests': BOOT}, format='json')
+        parallel = client.post(url, {'requests': BOOT, 'parallel': True}, format='json')
+        self.assertEqual(json.loads(parallel.content), json.loads(sequential.content))
+        self.assertEqual(json.loads(parallel.content)['responses']['me']['status'], 200)
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir.models import Classroom, Enrollment, EnrollmentRollup, Teacher
+
+
+def rollups():
+    return sorted(
+        EnrollmentRollup.objects.exclude(count=0).values_list('classroom_id', 'granularity', 'bucket', 'status', 'count')
+    )
+
+
+class BulkEnrollmentStatusTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='teacher@example.com', password='strongpass')
+        self.client.force_authenticate(user)
+        teacher = Teacher.objects.create(user=user, full_name='Jane Mentor', email='teacher@example.com')
+        other = Teacher.objects.create(full_name='Other Mentor', email='other@example.com')
+        self.classroom = Classroom.objects.create(teacher=teacher, title='Launch', capacity=3)
+        self.foreign = Enrollment.objects.create(
+            classroom=Classroom.objects.create(teacher=other, title='Lighting'), full_name='X', email='x@example.com'
+        )
+
+    def enroll(self, count, status=Enrollment.Status.PENDING, prefix='s'):
+        return [
+            Enrollment.objects.create(
+                classroom=self.classroom, full_name=f'{prefix}{i}', email=f'{prefix}{i}@example.com', status=status
+            ).pk
+            for i in range(count)
+        ]
+
+    def bulk(self, ids, target):
+        response = self.client.post(reverse('enrollment-bulk-status'), {'ids': ids, 'status': target}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json()
+
+    def test_confirms_many_with_a_fixed_number_of_queries(self):
+        self.classroom.capacity = 500
+        self.classroom.save()
+        few = self.enroll(3, prefix='a')
+        many = self.enroll(200, prefix='b')
+        self.bulk(self.enroll(1, prefix='c'), 'confirmed')  # creates the 'confirmed' rollup rows
+        with CaptureQueriesContext(connection) as small:
+            self.bulk(few, 'confirmed')
+        with CaptureQueriesContext(connection) as large:
+            result = self.bulk(many, 'confirmed')
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(result['updated'], 200)
+        self.assertEqual(sum('UPDATE "engir_enrollment"' in query['sql'] for query in large), 1)
+        self.assertEqual(Enrollment.objects.filter(status='confirmed').count(), 204)
+
+        incremental = rollups()
+        call_command('backfill_enrollment_rollups', stdout=open('/dev/null', 'w'))
+        self.assertEqual(rollups(), incremental)
+        self.assertEqual(self.bulk(few, 'confirmed')['results'], dict.fromkeys(map(str, few), 'unchanged'))
+
+    def test_enforces_capacity_and_promotes_into_freed_seats(self):
+        seated = self.enroll(2, prefix='p')
+        waiting = self.enroll(3, status=Enrollment.Status.WAITLISTED, prefix='w')
+        result = self.bulk(waiting + [self.foreign.pk, 999999], 'confirmed')
+        self.assertEqual(
+            result['results'],
+            {
+                str(waiting[0]): 'updated',
+                str(waiting[1]): 'full',
+                str(waiting[2]): 'full',
+                str(self.foreign.pk): 'not_found',
+                '999999': 'not_found',
+            },
+        )
+        self.assertEqual(Enrollment.objects.get(pk=self.foreign.pk).status, 'pending')
+
+        self.bulk(seated, 'cancelled')
+        statuses = dict(Enrollment.objects.filter(classroom=self.classroom).values_list('pk', 'status'))
+        self.assertEqual([statuses[pk] for pk in waiting], ['confirmed', 'pending', 'pending'])
+        incremental = rollups()
+        call_command('backfill_enrollment_rollups', stdout=open('/dev/null', 'w'))
+        self.assertEqual(rollups(), incremental)
+
+    def test_only_teachers_and_staff(self):
+        student = get_user_model().objects.create_user(username='leo@example.com', password='strongpass')
+        self.client.force_authenticate(student)
+        response = self.client.post(
+            reverse('enrollment-bulk-status'), {'ids': [self.foreign.pk], 'status': 'cancelled'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            reverse('enrollment-bulk-status'), {'ids': [self.foreign.pk], 'status': 'waitlisted'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_single_changes_lock_the_classroom_before_the_enrollment(self):
+        # Bulk changes lock classroom -> enrollments; a single save or delete must not go the other way round.
+        def lock_then_write(action, write):
+            with CaptureQueriesContext(connection) as context:
+                action()
+            sql = [query['sql'] for query in context]
+            lock = next(i for i, query in enumerate(sql) if 'FROM "engir_classroom"' in query and 'ORDER BY' in query)
+            self.assertLess(lock, next(i for i, query in enumerate(sql) if query.startswith(write)))
+
+        first, second = (Enrollment.objects.get(pk=pk) for pk in self.enroll(2))
+        first.status = Enrollment.Status.CANCELLED
+        lock_then_write(first.save, 'UPDATE "engir_enrollment"')
+        lock_then_write(second.delete, 'DELETE FROM "engir_enrollment"')
+        with CaptureQueriesContext(connection) as context:
+            self.bulk([self.enroll(1, prefix='n')[0]], 'confirmed')
+        sql = [query['sql'] for query in context]
+        classroom = next(i for i, query in enumerate(sql) if 'FROM "engir_classroom"' in query)
+        enrollments = next(i for i, query in enumerate(sql) if query.startswith('SELECT "engir_enrollment"'))
+        self.assertLess(classroom, enrollments)
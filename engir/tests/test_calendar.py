@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from engir import ics
+from engir.models import Classroom, Enrollment, Session, Student, Teacher
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=self.teacher, title='Streaming, basics')
+        self.starts_at = timezone.now() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session = Session.objects.create(
+                classroom=self.classroom, title='Kickoff; intro', starts_at=self.starts_at, duration_minutes=60
+            )
+            Session.objects.create(
+                classroom=self.classroom, title='Draft', starts_at=self.starts_at, status=Session.Status.DRAFT
+            )
+        self.url = reverse('classroom-calendar', args=[self.classroom.code])
+
+    def fetch(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        body = b''.join(response.streaming_content).decode() if response.streaming else ''
+        return response, body
+
+    def test_classroom_feed_renders_sessions(self):
+        response, body = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], ics.CONTENT_TYPE)
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:session-{self.session.id}@engir.app', body)
+        self.assertIn(r'SUMMARY:Streaming\, basics — Kickoff\; intro', body)
+        self.assertIn(f"DTSTART:{self.starts_at.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}", body)
+        self.assertNotIn('Draft', body)
+
+    def test_conditional_get_costs_one_version_query(self):
+        response, _ = self.fetch()
+        with self.assertNumQueries(1):
+            revalidated, body = self.fetch(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        with self.assertNumQueries(1):
+            cached, body = self.fetch()
+        self.assertIn('Kickoff', body)
+
+    def test_version_comes_from_the_database_not_a_cache_stamp(self):
+        # Another worker or the scheduler process shares nothing with this one but the database.
+        response, _ = self.fetch()
+        cache.clear()
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=response['ETag'])[0].status_code, 304)
+        self.session.delete()
+        changed, body = self.fetch(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotIn('Kickoff', body)
+
+    def test_session_changes_invalidate_the_feed(self):
+        response, _ = self.fetch()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.title = 'Renamed'
+            self.session.save()
+        changed, body = self.fetch(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertIn('Renamed', body)
+
+    def test_student_feed_uses_signed_token(self):
+        student = Student.objects.create(full_name='Leo', email='leo@example.com')
+        Enrollment.objects.create(classroom=self.classroom, student=student, full_name='Leo', email='leo@example.com')
+        other = Classroom.objects.create(teacher=self.teacher, title='Other class')
+        Session.objects.create(classroom=other, title='Not enrolled', starts_at=self.starts_at)
+
+        url = reverse('calendar-feed', args=[ics.feed_token('student', student.pk)])
+        response, body = self.fetch(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Kickoff', body)
+        self.assertNotIn('Not enrolled', body)
+        self.assertEqual(self.client.get(reverse('calendar-feed', args=['forged'])).status_code, 404)
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from engir.models import Classroom, ClassroomCatalogEntry, Enrollment, Session, Teacher
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        self.teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.classroom = Classroom.objects.create(
+                teacher=self.teacher, title='Intro to Streaming', capacity=2, tags=['OBS', 'audio']
+            )
+            Classroom.objects.create(teacher=self.teacher, title='Hidden', is_public=False)
+
+    def entry(self):
+        return ClassroomCatalogEntry.objects.get(classroom=self.classroom)
+
+    def test_entries_follow_enrollments_sessions_and_teacher(self):
+        self.assertEqual(self.entry().seats_available, 2)
+        starts_at = timezone.now() + timedelta(days=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(classroom=self.classroom, full_name='Leo', email='leo@example.com')
+            Enrollment.objects.create(classroom=self.classroom, full_name='Mia', email='mia@example.com')
+            session = Session.objects.create(classroom=self.classroom, title='Kickoff', starts_at=starts_at)
+            self.teacher.full_name = 'Jane Streamer'
+            self.teacher.save()
+
+        entry = self.entry()
+        self.assertEqual((entry.seats_taken, entry.seats_available, entry.is_full), (2, 0, True))
+        self.assertEqual(entry.next_session_id, session.id)
+        self.assertEqual(entry.next_session_starts_at, starts_at)
+        self.assertEqual(entry.teacher_name, 'Jane Streamer')
+        self.assertIn('obs', entry.search_text)
+
+    def test_listing_is_a_single_table_query(self):
+        url = reverse('catalog-list')
+        with self.assertNumQueries(2):  # count + page
+            response = self.client.get(url, {'search': 'STREAMING jane'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['code'] for card in response.data['results']], [self.classroom.code])
+        card = response.data['results'][0]
+        self.assertEqual(card['teacher'], {'id': self.teacher.id, 'full_name': 'Jane Mentor'})
+        self.assertEqual(card['available_seats'], 2)
+        self.assertEqual(self.client.get(url, {'search': 'hidden'}).data['count'], 0)
+        self.assertEqual(self.client.get(url, {'tags': 'obs,lighting', 'tags_match': 'all'}).data['count'], 0)
+        self.assertEqual(self.client.get(url, {'tags': 'obs,lighting'}).data['count'], 1)
+
+    def test_rebuild_repairs_drift(self):
+        Classroom.objects.filter(pk=self.classroom.pk).update(title='Renamed outside the ORM')
+        ClassroomCatalogEntry.objects.filter(classroom__title='Hidden').delete()
+        out = StringIO()
+        call_command('rebuild_catalog', '--batch-size', '1', stdout=out)
+        self.assertIn('Rebuilt 2', out.getvalue())
+        self.assertEqual(self.entry().title, 'Renamed outside the ORM')
+        self.assertEqual(ClassroomCatalogEntry.objects.count(), 2)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir.caching import classroom_codes, classroom_id_for_code
+from engir.models import Classroom, Enrollment, Teacher, _is_code_collision
+
+
+class ClassCodeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        classroom_codes.clear_local()
+        self.teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=self.teacher, title='Codes')
+
+    def test_code_collision_retries_on_unique_constraint(self):
+        with mock.patch('engir.models.generate_class_code', side_effect=[self.classroom.code, 'FRESH1']):
+            classroom = Classroom.objects.create(teacher=self.teacher, title='Second')
+        self.assertEqual(classroom.code, 'FRESH1')
+        self.assertEqual(Classroom.objects.count(), 2)
+
+    def test_only_the_code_constraint_counts_as_a_collision(self):
+        self.assertFalse(_is_code_collision(IntegrityError('UNIQUE constraint failed: engir_tag.code'), 'default'))
+        not_null = IntegrityError('NOT NULL constraint failed: engir_classroom.title')
+        self.assertFalse(_is_code_collision(not_null, 'default'))
+        cause = Exception('duplicate key value violates unique constraint')
+        cause.diag = mock.Mock(constraint_name='engir_classroom_pkey')
+        pg_error = IntegrityError(*cause.args)
+        pg_error.__cause__ = cause
+        self.assertFalse(_is_code_collision(pg_error, 'default'))
+
+    def test_by_code_lookup_is_cached_and_invalidated_on_delete(self):
+        url = reverse('classroom-by-code', args=[self.classroom.code.lower()])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(classroom_id_for_code(self.classroom.code), self.classroom.id)
+
+        self.classroom.delete()
+        self.assertIsNone(cache.get(f'engir:classroom_code:{self.classroom.code}'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_join_by_class_code(self):
+        user = get_user_model().objects.create_user(username='leo@example.com', password='strongpass')
+        self.client.force_authenticate(user)
+        payload = {'class_code': f' {self.classroom.code.lower()} ', 'full_name': 'Leo', 'email': 'leo@example.com'}
+        response = self.client.post(reverse('enrollment-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Enrollment.objects.get().classroom, self.classroom)
+
+        response = self.client.post(reverse('enrollment-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
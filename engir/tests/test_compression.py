@@ -0,0 +1,66 @@
+import gzip
+from unittest import skipUnless
+
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from engir.compression import brotli, choose_encoding
+from engir.middleware import CompressionMiddleware
+from engir.models import Classroom, Teacher
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, accept='gzip, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_negotiation_prefers_brotli_and_honours_quality(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0'), None)
+        self.assertEqual(choose_encoding('*'), 'br')
+        self.assertEqual(choose_encoding(''), None)
+
+    def get_classes(self, accept):
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        for index in range(10):
+            Classroom.objects.create(teacher=teacher, title=f'Class {index}', description='x' * 200)
+        url = reverse('classroom-list')
+        plain = self.client.get(url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        return plain, self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+
+    def test_list_endpoint_is_gzipped(self):
+        plain, encoded = self.get_classes('gzip')
+        self.assertEqual(encoded['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', encoded['Vary'])
+        self.assertEqual(gzip.decompress(encoded.content), plain.content)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_list_endpoint_prefers_brotli(self):
+        plain, encoded = self.get_classes('gzip, br')
+        self.assertEqual(encoded['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(encoded.content), plain.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100)
+    def test_small_bodies_and_304_pass_through(self):
+        small = self.run_middleware(HttpResponse(b'{"ok":true}', content_type='application/json'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        not_modified = self.run_middleware(HttpResponseNotModified())
+        self.assertFalse(not_modified.has_header('Content-Encoding'))
+        binary = self.run_middleware(HttpResponse(b'\0' * 500, content_type='image/png'))
+        self.assertFalse(binary.has_header('Content-Encoding'))
+
+    def test_streaming_responses_are_compressed_incrementally(self):
+        chunks = [b'{"row": %d}\n' % index * 20 for index in range(50)]
+        response = StreamingHttpResponse(iter(chunks), content_type='application/json')
+        response['ETag'] = '"abc"'
+        response = self.run_middleware(response, accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
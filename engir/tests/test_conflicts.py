@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir.models import Classroom, Session, Teacher
+
+
+class SessionConflictTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='strongpass'
+        )
+        self.client.force_authenticate(user)
+        self.teacher = Teacher.objects.create(user=user, full_name='Jane Mentor', email='teacher@example.com')
+        self.first = Classroom.objects.create(teacher=self.teacher, title='Streaming')
+        self.second = Classroom.objects.create(teacher=self.teacher, title='Lighting')
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        self.booked = Session.objects.create(
+            classroom=self.first, title='Booked', starts_at=self.start, duration_minutes=60
+        )
+
+    def payload(self, classroom, offset_minutes, **extra):
+        return {
+            'classroom_id': classroom.id,
+            'title': f'At +{offset_minutes}',
+            'starts_at': self.start + timedelta(minutes=offset_minutes),
+            'duration_minutes': 60,
+            **extra,
+        }
+
+    def test_overlap_across_classrooms_is_rejected_in_one_query(self):
+        self.assertEqual(self.booked.teacher_id, self.teacher.id)
+        url = reverse('session-list')
+        with self.assertNumQueries(2):  # classroom lookup, overlap query
+            response = self.client.post(url, self.payload(self.second, 30), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Booked', response.data['starts_at'][0])
+
+        adjacent = self.client.post(url, self.payload(self.second, 60), format='json')
+        self.assertEqual(adjacent.status_code, status.HTTP_201_CREATED)
+        draft = self.client.post(url, self.payload(self.second, 15, status='draft'), format='json')
+        self.assertEqual(draft.status_code, status.HTTP_201_CREATED)
+
+    def test_rescheduling_ignores_the_session_itself(self):
+        url = reverse('session-detail', args=[self.booked.id])
+        later = self.start + timedelta(minutes=15)
+        response = self.client.patch(url, {'starts_at': later}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_creation_checks_batch_and_stored_sessions(self):
+        url = reverse('session-list')
+        batch = [self.payload(self.second, 120), self.payload(self.second, 150), self.payload(self.second, -30)]
+        response = self.client.post(url, batch, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('item 0', response.data[1]['starts_at'][0])
+        self.assertIn('Booked', response.data[2]['starts_at'][0])
+        self.assertEqual(Session.objects.count(), 1)
+
+        response = self.client.post(url, [self.payload(self.second, 120), self.payload(self.first, 180)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+
+    def test_duration_limit_holds_outside_the_api(self):
+        with self.assertRaises(ValidationError):
+            Session.objects.create(classroom=self.second, title='Marathon', starts_at=self.start, duration_minutes=25 * 60)
+        self.booked.ends_at = self.start + timedelta(hours=30)
+        with self.assertRaises(ValidationError):
+            self.booked.full_clean()
+
+    def test_reassigning_classroom_moves_sessions_to_new_teacher(self):
+        other = Teacher.objects.create(full_name='Max Coach', email='max@example.com')
+        classroom = Classroom.objects.get(pk=self.first.pk)
+        classroom.teacher = other
+        previous = (self.booked.updated_at, self.booked.change_seq)
+        classroom.save()
+        self.booked.refresh_from_db()
+        self.assertEqual(self.booked.teacher_id, other.id)
+        self.assertGreater(self.booked.updated_at, previous[0])
+        self.assertGreater(self.booked.change_seq, previous[1])
+
+    def test_reassigning_classroom_to_busy_teacher_is_rejected(self):
+        other = Teacher.objects.create(full_name='Max Coach', email='max@example.com')
+        busy = Classroom.objects.create(teacher=other, title='Audio')
+        Session.objects.create(classroom=busy, title='Mixing', starts_at=self.start + timedelta(minutes=30))
+        url = reverse('classroom-detail', args=[self.first.id])
+        response = self.client.patch(url, {'teacher_id': other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Mixing', response.data['teacher_id'][0])
+        self.booked.refresh_from_db()
+        self.assertEqual(self.booked.teacher_id, self.teacher.id)
+
+        response = self.client.patch(reverse('classroom-detail', args=[self.second.id]), {'teacher_id': other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
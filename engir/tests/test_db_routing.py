@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from engir.db_routing import (
+    PRIMARY,
+    STICKY_COOKIE,
+    PrimaryReplicaRouter,
+    ReplicaStickinessMiddleware,
+    use_primary,
+)
+from engir.models import Session
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.routed = []
+
+        def view(request):
+            self.routed.append(self.router.db_for_read(Session))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        self.middleware = ReplicaStickinessMiddleware(view)
+
+    def test_reads_use_replicas_and_writes_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Session), 'replica_0')
+        self.assertEqual(self.router.db_for_write(Session), PRIMARY)
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Session), PRIMARY)
+        self.assertTrue(self.router.allow_migrate(PRIMARY, 'engir'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'engir'))
+
+    def test_reads_inside_a_primary_transaction_use_the_primary(self):
+        connection = connections[PRIMARY]
+        with mock.patch.object(connection, 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(Session), PRIMARY)
+        self.assertEqual(self.router.db_for_read(Session), 'replica_0')
+
+    def test_select_for_update_is_routed_to_the_primary(self):
+        self.assertEqual(Session.objects.all().db, 'replica_0')
+        self.assertEqual(Session.objects.select_for_update().db, PRIMARY)
+
+    def test_clients_read_their_writes_after_a_post(self):
+        response = self.middleware(self.factory.post('/api/enrollments/'))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        request = self.factory.get('/api/dashboard/student/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.middleware(request)
+        self.middleware(self.factory.get('/api/classes/'))
+        self.assertEqual(self.routed, [PRIMARY, PRIMARY, 'replica_0'])
+
+    def test_token_clients_are_sticky_without_cookies(self):
+        self.middleware(self.factory.post('/api/enrollments/', HTTP_AUTHORIZATION='Bearer abc'))
+        self.middleware(self.factory.get('/api/dashboard/student/', HTTP_AUTHORIZATION='Bearer abc'))
+        self.middleware(self.factory.get('/api/dashboard/student/', HTTP_AUTHORIZATION='Bearer other'))
+        self.assertEqual(self.routed, [PRIMARY, PRIMARY, 'replica_0'])
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from engir import ingest
+from engir.models import Classroom, Session, Teacher
+
+
+@override_settings(INGEST_SECRET='s3cret', INGEST_AUTO_LIVE=True)
+class IngestAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ingest.stream_keys.clear_local()
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        classroom = Classroom.objects.create(teacher=teacher, title='Streaming')
+        self.session = Session.objects.create(
+            classroom=classroom, title='Kickoff', starts_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.url = reverse('ingest-auth')
+
+    def callback(self, call, key=None, secret='s3cret'):
+        return self.client.post(
+            self.url, {'call': call, 'name': key or self.session.stream_key}, HTTP_X_INGEST_SECRET=secret
+        )
+
+    def test_publish_flips_session_live_and_play_is_then_allowed(self):
+        self.assertEqual(self.callback('play').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.callback('publish').status_code, 204)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, Session.Status.LIVE)
+        self.assertEqual(self.callback('play').status_code, 204)
+
+    def test_repeated_callbacks_are_served_from_cache(self):
+        self.session.mark_live()
+        self.callback('play')
+        self.callback('publish', key='UNKNOWNKEY')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.callback('play').status_code, 204)
+            self.assertEqual(self.callback('publish', key='UNKNOWNKEY').status_code, 403)
+
+    def test_regenerating_or_completing_revokes_the_key(self):
+        old_key = self.session.stream_key
+        self.assertEqual(self.callback('publish', key=old_key).status_code, 204)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.regenerate_stream_credentials()
+        self.assertEqual(self.callback('publish', key=old_key).status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.mark_completed()
+        self.assertEqual(self.callback('publish').status_code, 403)
+
+    def test_callbacks_require_the_shared_secret(self):
+        self.assertEqual(self.callback('publish', secret='wrong').status_code, 401)
+        response = self.client.post(self.url + '?secret=s3cret', {'call': 'publish', 'name': self.session.stream_key})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,49 @@
+import io
+import json
+import logging
+import queue
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from engir import log
+
+
+class StructuredLoggingTests(APITestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = log.AsyncStreamHandler(stream=self.stream)
+        self.handler.setFormatter(log.JSONFormatter())
+        self.handler.addFilter(log.RequestContextFilter())
+        self.logger = logging.getLogger('django.request')
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(self.handler.close)
+
+    def records(self):
+        self.handler.stop()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_request_records_carry_context(self):
+        user = get_user_model().objects.create_user(username='staff@example.com', password='strongpass', is_staff=True)
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('teacher-dashboard'), HTTP_X_REQUEST_ID='req-123')
+        self.assertEqual(response['X-Request-ID'], 'req-123')
+
+        record = self.records()[-1]
+        self.assertEqual(record['level'], 'WARNING')
+        self.assertEqual(record['request_id'], 'req-123')
+        self.assertEqual(record['view'], 'teacher-dashboard')
+        self.assertEqual(record['user_id'], user.pk)
+        self.assertEqual(record['role'], 'staff')
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = log.AsyncStreamHandler(stream=io.StringIO(), queue_size=1)
+        handler.listener.stop()
+        handler.queue = queue.Queue(maxsize=1)
+        before = log.LOG_RECORDS_DROPPED.value() or 0
+        for _ in range(3):
+            handler.handle(logging.LogRecord('bench', logging.INFO, __file__, 1, 'hello', (), None))
+        self.assertEqual(log.LOG_RECORDS_DROPPED.value(), before + 2)
+        handler.close()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir import metrics
+from engir.models import Classroom, Session, Teacher
+
+
+class MetricsEndpointTests(APITestCase):
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username='teacher@example.com', email='teacher@example.com', password='strongpass'
+        )
+        self.teacher = Teacher.objects.create(user=self.user, full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=self.teacher, title='Metrics 101', capacity=1)
+
+    def test_request_latency_is_labelled_by_route_name(self):
+        self.client.get(reverse('session-list'))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('engir_http_request_duration_seconds_count{route="session-list",method="GET"} 1', body)
+        self.assertIn('engir_http_requests_total{route="session-list",method="GET",status="200"} 1', body)
+        self.assertIn('engir_db_queries_total{route="session-list",database="default"}', body)
+
+    def test_enrollment_admissions_and_live_gauge(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('enrollment-list')
+        payload = {'classroom_id': self.classroom.id, 'full_name': 'Leo', 'email': 'leo@example.com'}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+        payload['email'] = 'mia@example.com'
+        self.assertEqual(self.client.post(url, payload, format='json').data['status'], 'waitlisted')
+
+        session = Session.objects.create(classroom=self.classroom, title='Live', starts_at=timezone.now())
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('engir_sessions_live 0', body)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            session.mark_live()
+            raise RuntimeError('rolled back')
+        self.assertIn('engir_sessions_live 0', self.client.get('/metrics').content.decode())
+        session = Session.objects.get(pk=session.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            session.mark_live()
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('engir_enrollment_admissions_total{outcome="accepted",reason=""} 1', body)
+        self.assertIn('engir_enrollment_admissions_total{outcome="accepted",reason="waitlisted"} 1', body)
+        self.assertIn('engir_sessions_live 1', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_snapshots_from_other_workers_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            metrics.REQUESTS.inc(route='auth-me', method='GET', status='200')
+            other_worker = {'engir_http_requests_total': [[['auth-me', 'GET', '200'], 4]]}
+            with open(os.path.join(directory, 'metrics-99999-1.json'), 'w') as handle:
+                json.dump(other_worker, handle)
+            body = metrics.REGISTRY.render()
+        self.assertIn('engir_http_requests_total{route="auth-me",method="GET",status="200"} 5', body)
@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from engir import playback_token
+from engir.models import Classroom, Enrollment, Session, Student, Teacher
+
+KEYS = [b'new-key', b'old-key']
+
+
+@override_settings(PLAYBACK_SIGNING_KEYS=KEYS, PLAYBACK_TOKEN_TTL=600)
+class PlaybackTokenTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.teacher_user = User.objects.create_user(username='t@example.com', password='strongpass1')
+        teacher = Teacher.objects.create(user=self.teacher_user, full_name='Jane', email='t@example.com')
+        classroom = Classroom.objects.create(teacher=teacher, title='Streaming')
+        self.session = Session.objects.create(
+            classroom=classroom, title='Kickoff', starts_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.student_user = User.objects.create_user(username='s@example.com', password='strongpass1')
+        student = Student.objects.create(user=self.student_user, full_name='Leo', email='s@example.com')
+        Enrollment.objects.create(classroom=classroom, student=student, full_name='Leo', email='s@example.com')
+        self.outsider = User.objects.create_user(username='o@example.com', password='strongpass1')
+        Student.objects.create(user=self.outsider, full_name='Olga', email='o@example.com')
+        self.api = APIClient()
+
+    def issue(self, user):
+        self.api.force_authenticate(user)
+        return self.api.post(reverse('session-playback-token', args=[self.session.id]))
+
+    def verify(self, token, **params):
+        return self.client.get(reverse('playback-verify'), {'token': token, 'session': self.session.id, **params})
+
+    def test_enrolled_student_gets_a_play_token_verified_without_queries(self):
+        response = self.issue(self.student_user)
+        self.assertEqual(response.status_code, 200)
+        token = response.data['token']
+        self.assertIn(f'/watch/{self.session.id}?token=', response.data['playback_url'])
+        self.assertNotIn('host_url', response.data)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.verify(token).status_code, 204)
+            self.assertEqual(self.verify(token, scope='host').status_code, 403)
+            self.assertEqual(self.verify(token, session=self.session.id + 1).status_code, 403)
+            self.assertEqual(self.verify(token[:-2] + 'xx').status_code, 403)
+            self.assertEqual(self.verify(token[:-2] + 'é').status_code, 403)
+
+    def test_teacher_gets_host_scope_and_outsiders_nothing(self):
+        response = self.issue(self.teacher_user)
+        self.assertEqual(response.data['scope'], 'host')
+        self.assertEqual(self.verify(response.data['token'], scope='host').status_code, 204)
+        self.assertEqual(self.issue(self.outsider).status_code, 403)
+
+    def test_standalone_validator_handles_expiry_and_rotation(self):
+        token = playback_token.sign(b'old-key', self.session.id, 'play', 'student:1', time.time() + 60)
+        claims = playback_token.verify(token, KEYS, session_id=self.session.id)
+        self.assertEqual(claims['sub'], 'student:1')
+        with self.assertRaises(playback_token.InvalidToken):
+            playback_token.verify(token, [b'new-key'])
+        with self.assertRaises(playback_token.InvalidToken):
+            playback_token.verify(token, KEYS, now=time.time() + 120)
@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from engir import playback_token, presence
+from engir.models import Attendance, Classroom, Enrollment, Session, Student, Teacher
+
+KEYS = [b'presence-key']
+
+
+@override_settings(PLAYBACK_SIGNING_KEYS=KEYS, PRESENCE_FLUSH_INTERVAL=3600)
+class PresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        presence._take()
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        classroom = Classroom.objects.create(teacher=teacher, title='Streaming')
+        self.session = Session.objects.create(classroom=classroom, title='Live', starts_at=timezone.now())
+        self.students = [
+            Student.objects.create(full_name=name, email=f'{name}@example.com') for name in ('leo', 'mia')
+        ]
+        self.enrollments = [
+            Enrollment.objects.create(classroom=classroom, student=student, full_name=student.full_name, email=student.email)
+            for student in self.students
+        ]
+
+    def tearDown(self):
+        presence._take()
+
+    def token(self, student):
+        return playback_token.sign(KEYS[0], self.session.id, 'play', f'student:{student.pk}', time.time() + 600)
+
+    def test_heartbeats_touch_no_database_and_count_viewers(self):
+        url = reverse('presence-heartbeat')
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.assertEqual(self.client.post(url, {'token': self.token(self.students[0])}).status_code, 204)
+            self.client.post(url, {'token': self.token(self.students[1])})
+            response = self.client.get(reverse('session-viewers', args=[self.session.id]))
+        self.assertEqual(response.json()['viewers'], 2)
+        self.assertEqual(self.client.post(url, {'token': 'forged'}).status_code, 403)
+        self.assertEqual(self.client.post(url, {'token': self.token(self.students[0])[:-1] + 'é'}).status_code, 403)
+
+    def test_flush_accumulates_minutes_per_enrollment(self):
+        start = (time.time() // 60 - 10) * 60
+        for minute in range(3):
+            for second in (0, 20, 40):  # repeats inside a minute count once
+                presence.record_heartbeat(self.session.id, self.students[0].pk, now=start + minute * 60 + second)
+        presence.record_heartbeat(self.session.id, self.students[1].pk, now=start)
+        self.assertEqual(presence.flush(), 4)
+
+        presence.record_heartbeat(self.session.id, self.students[0].pk, now=start + 300)
+        presence.flush()
+        minutes = dict(Attendance.objects.values_list('enrollment_id', 'minutes'))
+        self.assertEqual(minutes, {self.enrollments[0].id: 4, self.enrollments[1].id: 1})
+        row = Attendance.objects.get(enrollment=self.enrollments[0])
+        self.assertEqual(row.last_seen_at - row.first_seen_at, timedelta(minutes=5))
+
+    def test_failed_flush_keeps_minutes_for_the_next_one(self):
+        start = (time.time() // 60 - 10) * 60
+        presence.record_heartbeat(self.session.id, self.students[0].pk, now=start)
+        with mock.patch('engir.presence._apply', side_effect=OperationalError('connection lost')):
+            self.assertEqual(presence.flush(), 0)
+        self.assertFalse(Attendance.objects.exists())
+
+        presence.record_heartbeat(self.session.id, self.students[0].pk, now=start + 60)
+        self.assertEqual(presence.flush(), 2)
+        self.assertEqual(Attendance.objects.get().minutes, 2)
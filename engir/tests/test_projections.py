@@ -0,0 +1,62 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from engir import projections
+from engir.models import Classroom, Enrollment, Session, Student, Teacher
+from engir.renderers import FastJSONParser, FastJSONRenderer
+from engir.serializers import ClassroomSerializer, EnrollmentSerializer
+
+
+class ProjectionParityTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create_user(username='teacher@example.com', email='teacher@example.com')
+        linked = Teacher.objects.create(user=user, full_name='Jane Mentor', email='jane@example.com')
+        unlinked = Teacher.objects.create(full_name='Guest Mentor', email='guest@example.com')
+        self.full = Classroom.objects.create(teacher=linked, title='Full', capacity=1, tags=['a', 'b'])
+        self.open = Classroom.objects.create(teacher=unlinked, title='Open', starts_at=timezone.now())
+        Session.objects.create(classroom=self.full, title='Soon', starts_at=timezone.now() + timedelta(days=1))
+        Session.objects.create(
+            classroom=self.full, title='Now', starts_at=timezone.now(), status=Session.Status.LIVE
+        )
+        student = Student.objects.create(full_name='Leo Learner', email='leo@example.com', interests=['x'])
+        Enrollment.objects.create(classroom=self.full, student=student, full_name='Leo', email='leo@example.com')
+        Enrollment.objects.create(
+            classroom=self.open, full_name='Mia', email='mia@example.com', status=Enrollment.Status.CANCELLED
+        )
+
+    def test_classroom_rows_match_serializer(self):
+        queryset = Classroom.objects.order_by('id')
+        expected = ClassroomSerializer(queryset, many=True).data
+        with self.assertNumQueries(2):
+            actual = projections.represent_classrooms(projections.classroom_values(queryset))
+        self.assertEqual(json.loads(JSONRenderer().render(expected)), actual)
+
+    def test_enrollment_rows_match_serializer(self):
+        queryset = Enrollment.objects.order_by('id')
+        expected = EnrollmentSerializer(queryset, many=True).data
+        with self.assertNumQueries(3):
+            actual = projections.represent_enrollments(projections.enrollment_values(queryset))
+        self.assertEqual(json.loads(JSONRenderer().render(expected)), actual)
+
+    def test_list_endpoint_uses_projection(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('classroom-list'))
+        self.assertEqual(response.json()['count'], 2)
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_matches_drf_output(self):
+        data = {'when': timezone.now(), 'text': 'line break', 'nested': [{'ok': True}]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_round_trip(self):
+        from io import BytesIO
+
+        self.assertEqual(FastJSONParser().parse(BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
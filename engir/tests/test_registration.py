@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from engir.models import Classroom, Enrollment, Student, Teacher
+
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_student_signup_is_one_insert_per_table(self):
+        payload = {'email': 'Leo@Example.com', 'password': 'strongpass1', 'full_name': 'Leo Learner', 'interests': ['ai']}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('auth-register-student'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['interests'], ['ai'])
+
+        writes = [query['sql'].split()[0] + ' ' + query['sql'].split()[2] for query in context
+                  if query['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(writes, ['INSERT "auth_user"', 'INSERT "engir_student"'])
+        user = get_user_model().objects.get()
+        self.assertTrue(user.check_password('strongpass1'))
+        self.assertEqual(user.first_name, 'Leo')
+        self.assertEqual(Student.objects.get().user, user)
+
+    def test_login_ignores_email_case(self):
+        payload = {'email': 'Leo@Example.com', 'password': 'strongpass1', 'full_name': 'Leo Learner'}
+        self.client.post(reverse('auth-register-student'), payload, format='json')
+        self.assertEqual(get_user_model().objects.get().username, 'leo@example.com')
+        response = self.client.post(
+            reverse('auth-login'), {'username': ' LEO@example.COM', 'password': 'strongpass1'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.json())
+
+    def test_teacher_signup_validates_before_hashing(self):
+        url = reverse('auth-register-teacher')
+        payload = {'email': 'ava@example.com', 'password': 'strongpass1', 'full_name': 'Ava Instructor'}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Teacher.objects.get().user.email, 'ava@example.com')
+
+        response = self.client.post(url, {**payload, 'email': 'AVA@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.json())
+        response = self.client.post(url, b'{not json', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_emails_are_stored_lower_cased_and_unique_ignoring_case(self):
+        payload = {'email': ' Leo@Example.com', 'password': 'strongpass1', 'full_name': 'Leo Learner'}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('auth-register-student'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('LOWER("auth_user"."email")', context[0]['sql'])  # served by user_email_ci_unique
+        self.assertEqual(get_user_model().objects.get().email, 'leo@example.com')
+        self.assertEqual(Student.objects.get().email, 'leo@example.com')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            get_user_model().objects.create(username='other', email='LEO@example.com')
+        get_user_model().objects.create(username='blank-1')
+        get_user_model().objects.create(username='blank-2')  # blank emails stay out of the index
+
+        teacher = Teacher.objects.create(full_name='Ava Instructor', email='Ava@Example.com')
+        classroom = Classroom.objects.create(teacher=teacher, title='Streaming')
+        Enrollment.objects.create(classroom=classroom, full_name='Leo', email='Leo@Example.com')
+        self.client.force_authenticate(get_user_model().objects.get(username='blank-1'))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Enrollment.objects.bulk_create([Enrollment(classroom=classroom, full_name='Leo', email='LEO@example.com')])
+        response = self.client.post(
+            reverse('enrollment-list'),
+            {'classroom_id': classroom.pk, 'full_name': 'Leo', 'email': 'lEo@example.COM'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Enrollment.objects.get().email, 'leo@example.com')
+
+    def test_tuned_argon2_hasher(self):
+        with override_settings(PASSWORD_HASHERS=['engir.passwords.TunedArgon2PasswordHasher']):
+            encoded = make_password('strongpass1')
+            self.assertTrue(encoded.startswith('argon2$'))
+            self.assertTrue(check_password('strongpass1', encoded))
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from engir import metrics
+from engir.models import Classroom, Session, Teacher
+from engir.scheduling import session_status_changed, transition_overdue_sessions
+
+
+class SessionSchedulerTests(TestCase):
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=teacher, title='Scheduling')
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stale_live = self.add_session('Forgotten live', now - timedelta(hours=3), Session.Status.LIVE)
+            self.stale_scheduled = self.add_session('Never started', now - timedelta(hours=2), Session.Status.SCHEDULED)
+            self.current_live = self.add_session('On air', now - timedelta(minutes=10), Session.Status.LIVE)
+            self.future = self.add_session('Next week', now + timedelta(days=7), Session.Status.SCHEDULED)
+
+    def add_session(self, title, starts_at, status):
+        return Session.objects.create(classroom=self.classroom, title=title, starts_at=starts_at, status=status)
+
+    def test_overdue_sessions_are_completed_in_batches(self):
+        events = []
+
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+
+        session_status_changed.connect(receiver)
+        self.addCleanup(session_status_changed.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            totals = transition_overdue_sessions(batch_size=1)
+
+        self.assertEqual(totals, {'live': 1, 'scheduled': 1})
+        statuses = dict(Session.objects.values_list('title', 'status'))
+        self.assertEqual(statuses['Forgotten live'], Session.Status.COMPLETED)
+        self.assertEqual(statuses['Never started'], Session.Status.COMPLETED)
+        self.assertEqual(statuses['On air'], Session.Status.LIVE)
+        self.assertEqual(statuses['Next week'], Session.Status.SCHEDULED)
+        self.assertEqual([event['session_ids'] for event in events], [[self.stale_live.id], [self.stale_scheduled.id]])
+        self.assertEqual(events[0]['classroom_ids'], [self.classroom.id])
+        self.assertEqual(metrics.LIVE_SESSIONS.value(), 1)
+
+    def test_command_runs_once(self):
+        out = StringIO()
+        call_command('run_session_scheduler', '--once', stdout=out)
+        self.assertIn('1 live, 1 scheduled', out.getvalue())
+        self.assertEqual(Session.objects.filter(status=Session.Status.COMPLETED).count(), 2)
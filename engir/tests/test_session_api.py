@@ -71,3 +71,23 @@ class SessionAPITests(APITestCase):
         session.refresh_from_db()
         self.assertEqual(session.status, Session.Status.COMPLETED)
         self.assertEqual(session.recording_url, recording)
+
+    def test_publishing_credentials_are_shown_to_the_owner_only(self):
+        session = Session.objects.create(classroom=self.classroom, title='Kickoff', starts_at=timezone.now())
+        detail = reverse('session-detail', args=[session.id])
+        owned = self.client.get(detail).data
+        self.assertEqual(owned['stream_key'], session.stream_key)
+        self.assertEqual(owned['playback_url'], session.playback_url)
+
+        other_user = get_user_model().objects.create_user(username='other@example.com', password='strongpass')
+        Teacher.objects.create(user=other_user, full_name='Max Coach', email='other@example.com')
+        for user in (None, other_user):
+            self.client.force_authenticate(user)
+            listed = self.client.get(reverse('session-list')).data['results'][0]
+            for field in ('stream_key', 'host_url', 'playback_url', 'meeting_passcode'):
+                self.assertNotIn(field, listed)
+            self.assertNotIn('playback_url', listed['classroom']['next_session'])
+            synced = self.client.get(reverse('sync', args=['sessions'])).data['changes'][0]
+            self.assertNotIn('playback_url', synced)
+        response = self.client.post(reverse('session-regenerate-stream-key', args=[session.id]), {})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir import sync
+from engir.models import Classroom, Enrollment, Session, Student, Teacher, Tombstone
+from engir.scheduling import transition_overdue_sessions
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classes = [Classroom.objects.create(teacher=teacher, title=f'Class {i}') for i in range(3)]
+
+    def sync(self, resource, cursor=None, **params):
+        if cursor:
+            params['updated_since'] = cursor
+        response = self.client.get(reverse('sync', args=[resource]), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_snapshot_then_only_changes_and_tombstones(self):
+        page = self.sync('classes')
+        self.assertEqual([row['id'] for row in page['changes']], [c.id for c in self.classes])
+        with self.assertNumQueries(2):  # changed keys, tombstones
+            idle = self.sync('classes', page['cursor'])
+        self.assertEqual((idle['changes'], idle['deleted']), ([], []))
+
+        self.classes[1].title = 'Renamed'
+        self.classes[1].save()
+        deleted_id = self.classes[0].pk
+        self.classes[0].delete()
+        delta = self.sync('classes', idle['cursor'])
+        self.assertEqual([row['title'] for row in delta['changes']], ['Renamed'])
+        self.assertEqual(delta['deleted'], [deleted_id])
+        self.assertEqual(self.sync('classes', delta['cursor'])['changes'], [])
+
+    def test_pages_and_bulk_updates(self):
+        start = timezone.now() - timedelta(hours=3)
+        sessions = [
+            Session.objects.create(classroom=classroom, title='Old', starts_at=start) for classroom in self.classes
+        ]
+        cursor, seen = None, []
+        while True:
+            page = self.sync('sessions', cursor, limit=2)
+            seen += [row['id'] for row in page['changes']]
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual(seen, [session.id for session in sessions])
+
+        transition_overdue_sessions()  # QuerySet.update() must still advance the sequence
+        self.assertEqual(
+            {row['status'] for row in self.sync('sessions', cursor)['changes']}, {Session.Status.COMPLETED}
+        )
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_cursor_waits_for_the_settle_window(self):
+        page = self.sync('classes')
+        self.assertEqual(len(page['changes']), 3)
+        again = self.sync('classes', page['cursor'])
+        self.assertEqual(len(again['changes']), 3)
+        self.assertFalse(again['has_more'])
+
+    def test_cursor_expires_only_behind_pruned_deletions(self):
+        idle = self.sync('classes')['cursor']
+        with override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=1):
+            self.assertEqual(self.sync('classes', idle)['changes'], [])  # idle for any time is fine
+
+            deleted_ids = [classroom.pk for classroom in self.classes[:2]]
+            for classroom in self.classes[:2]:
+                classroom.delete()
+            Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+            self.assertEqual(sync.prune_tombstones(), 1)
+            kept = Tombstone.objects.get()
+            self.assertEqual(kept.object_id, deleted_ids[1])
+
+            response = self.client.get(reverse('sync', args=['classes']), {'updated_since': idle})
+            self.assertEqual(response.status_code, status.HTTP_410_GONE)
+            current = sync.encode_cursor(kept.change_seq, 0)
+            self.assertEqual(self.sync('classes', current)['deleted'], [])
+
+    def test_enrollment_scope(self):
+        self.assertEqual(self.client.get(reverse('sync', args=['enrollments'])).status_code, 401)
+
+        user = get_user_model().objects.create_user(username='leo@example.com', password='strongpass')
+        student = Student.objects.create(user=user, full_name='Leo', email='leo@example.com')
+        mine = Enrollment.objects.create(
+            classroom=self.classes[0], student=student, full_name='Leo', email='leo@example.com'
+        )
+        Enrollment.objects.create(classroom=self.classes[0], full_name='Mia', email='mia@example.com')
+        self.client.force_authenticate(user)
+        page = self.sync('enrollments')
+        self.assertEqual([row['id'] for row in page['changes']], [mine.id])
+        self.classes[0].delete()
+        self.assertIn(mine.id, self.sync('enrollments', page['cursor'])['deleted'])
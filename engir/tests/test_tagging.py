@@ -0,0 +1,41 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from engir.models import Classroom, ClassroomTag, Tag, Teacher
+
+
+class TagFilteringTests(TestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.obs = Classroom.objects.create(teacher=teacher, title='OBS basics', tags=['OBS', 'Streaming'])
+        self.audio = Classroom.objects.create(teacher=teacher, title='Audio', tags=['audio', 'streaming '])
+        self.other = Classroom.objects.create(teacher=teacher, title='Other', tags=[])
+
+    def codes(self, response):
+        return sorted(row['code'] for row in response.data['results'])
+
+    def test_tags_are_normalised_and_kept_in_sync(self):
+        self.assertEqual(sorted(Tag.objects.values_list('name', flat=True)), ['audio', 'obs', 'streaming'])
+        self.obs.tags = ['Lighting']
+        self.obs.save()
+        names = ClassroomTag.objects.filter(classroom=self.obs).values_list('tag__name', flat=True)
+        self.assertEqual(list(names), ['lighting'])
+        self.assertEqual(self.obs.tags, ['Lighting'])
+
+    def test_filter_any_and_all(self):
+        url = reverse('classroom-list')
+        response = self.client.get(url, {'tags': 'obs,AUDIO'})
+        self.assertEqual(self.codes(response), sorted([self.obs.code, self.audio.code]))
+        response = self.client.get(url, {'tags': 'streaming,obs', 'tags_match': 'all'})
+        self.assertEqual(self.codes(response), [self.obs.code])
+
+    def test_facets_follow_filters_in_one_query(self):
+        url = reverse('classroom-tag-facets')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            response.data,
+            [{'tag': 'streaming', 'count': 2}, {'tag': 'audio', 'count': 1}, {'tag': 'obs', 'count': 1}],
+        )
+        response = self.client.get(url, {'tags': 'obs'})
+        self.assertEqual(response.data, [{'tag': 'obs', 'count': 1}, {'tag': 'streaming', 'count': 1}])
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir.models import Classroom, Teacher
+
+RATES = {'register': '2/min', 'login': '100/min', 'login_username': '2/min', 'enroll': '100/min', 'enroll_user': '1/min'}
+
+
+@override_settings(THROTTLE_RATES=RATES)
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_registration_is_rejected_before_hashing(self):
+        url = reverse('auth-register-student')
+        for index in range(2):
+            payload = {'email': f'learner{index}@example.com', 'password': 'strongpass1', 'full_name': 'Leo'}
+            self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+
+        payload = {'email': 'bot@example.com', 'password': 'strongpass1', 'full_name': 'Bot'}
+        with mock.patch('engir.serializers.make_password') as make_password:
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        make_password.assert_not_called()
+        self.assertFalse(get_user_model().objects.filter(email='bot@example.com').exists())
+
+    def test_spoofed_forwarded_for_does_not_reset_the_ip_bucket(self):
+        url = reverse('auth-register-student')
+        statuses = []
+        for index in range(3):
+            payload = {'email': f'learner{index}@example.com', 'password': 'strongpass1', 'full_name': 'Leo'}
+            response = self.client.post(url, payload, format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{index}')
+            statuses.append(response.status_code)
+        self.assertEqual(statuses, [201, 201, 429])
+
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            payload = {'email': 'proxied@example.com', 'password': 'strongpass1', 'full_name': 'Leo'}
+            response = self.client.post(url, payload, format='json', HTTP_X_FORWARDED_FOR='203.0.113.9, 198.51.100.7')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_login_is_limited_per_username_across_ips(self):
+        url = reverse('auth-login')
+        payload = {'username': 'victim@example.com', 'password': 'wrong-password'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = self.client.post(url, payload, format='json', REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(url, payload, format='json', REMOTE_ADDR='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_enrollment_create_is_limited_per_user(self):
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        classroom = Classroom.objects.create(teacher=teacher, title='Launch', capacity=10)
+        self.client.force_authenticate(get_user_model().objects.create_user(username='leo'))
+        url = reverse('enrollment-list')
+        payload = {'classroom_id': classroom.id, 'full_name': 'Leo', 'email': 'leo@example.com'}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_201_CREATED)
+        payload['email'] = 'leo2@example.com'
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
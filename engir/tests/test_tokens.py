@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from engir import checks, tokens
+from engir.models import Student
+
+
+class TokenLifecycleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tokens.revoked_tokens.clear_local()
+        self.user = get_user_model().objects.create_user(
+            username='leo@example.com', email='leo@example.com', password='strongpass1'
+        )
+        Student.objects.create(user=self.user, full_name='Leo', email='leo@example.com')
+
+    def login(self):
+        response = self.client.post(
+            reverse('auth-login'), {'username': 'leo@example.com', 'password': 'strongpass1'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_refresh_rotates_and_rejects_replay(self):
+        pair = self.login()
+        url = reverse('auth-refresh')
+        response = self.client.post(url, {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], pair['refresh'])
+        self.assertEqual(RefreshToken(response.data['refresh'])['role'], 'student')
+
+        replay = self.client.post(url, {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(replay.status_code, status.HTTP_401_UNAUTHORIZED)
+        rotated = self.client.post(url, {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(rotated.status_code, status.HTTP_200_OK)
+
+    def test_logout_revokes_refresh_and_access_tokens(self):
+        pair = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {pair['access']}")
+        self.assertEqual(self.client.get(reverse('auth-me')).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('auth-logout'), {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(reverse('auth-me')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        refresh = self.client.post(reverse('auth-refresh'), {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_validating_access_token_does_not_query_revocation_table(self):
+        pair = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {pair['access']}")
+        # User lookup plus the profile lookups of /auth/me; revocation is checked in the cache.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('auth-me'))
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        self.assertEqual([error.id for error in checks.check_shared_cache(None)], ['engir.E001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(checks.check_shared_cache(None), [])
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from engir.models import Classroom, Enrollment, Teacher
+
+
+class WaitlistTests(APITestCase):
+    def setUp(self):
+        cache.clear()  # enrollment throttle buckets
+        user = get_user_model().objects.create_user(username='leo@example.com', password='strongpass')
+        self.client.force_authenticate(user)
+        teacher = Teacher.objects.create(full_name='Jane Mentor', email='teacher@example.com')
+        self.classroom = Classroom.objects.create(teacher=teacher, title='Launch', capacity=2)
+
+    def join(self, name):
+        payload = {'class_code': self.classroom.code, 'full_name': name, 'email': f'{name}@example.com'}
+        return self.client.post(reverse('enrollment-list'), payload, format='json')
+
+    def statuses(self):
+        return dict(Enrollment.objects.values_list('full_name', 'status'))
+
+    def test_full_class_queues_and_retries_do_not_queue_twice(self):
+        for name in ('ann', 'bob', 'cat', 'dan'):
+            self.assertEqual(self.join(name).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.statuses(), {'ann': 'pending', 'bob': 'pending', 'cat': 'waitlisted', 'dan': 'waitlisted'}
+        )
+        self.assertEqual(self.join('cat').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Enrollment.objects.filter(email='cat@example.com').count(), 1)
+
+    def test_cancellation_and_deletion_promote_in_arrival_order(self):
+        for name in ('ann', 'bob', 'cat', 'dan', 'eve'):
+            self.join(name)
+        ann = Enrollment.objects.get(full_name='ann')
+        ann.status = Enrollment.Status.CANCELLED
+        ann.save()
+        self.assertEqual(self.statuses()['cat'], 'pending')
+        self.assertEqual(self.statuses()['dan'], 'waitlisted')
+
+        Enrollment.objects.get(full_name='bob').delete()
+        self.assertEqual(self.statuses()['dan'], 'pending')
+        self.assertEqual(self.statuses()['eve'], 'waitlisted')
+
+    def test_capacity_increase_promotes_next_n(self):
+        for name in ('ann', 'bob', 'cat', 'dan', 'eve'):
+            self.join(name)
+        self.classroom.refresh_from_db()
+        self.classroom.capacity = 4
+        self.classroom.save()
+        self.assertEqual(
+            [status for _, status in sorted(self.statuses().items())],
+            ['pending', 'pending', 'pending', 'pending', 'waitlisted'],
+        )
+
+    def test_edits_cannot_take_a_seat_in_a_full_class(self):
+        for name in ('ann', 'bob', 'cat'):
+            self.join(name)
+        cat = Enrollment.objects.get(full_name='cat')
+        url = reverse('enrollment-detail', args=[cat.pk])
+        response = self.client.patch(url, {'classroom_id': self.classroom.pk, 'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.statuses()['cat'], 'waitlisted')
+
+        other = Classroom.objects.create(teacher=self.classroom.teacher, title='Other', capacity=1)
+        ann = Enrollment.objects.get(full_name='ann')
+        ann_url = reverse('enrollment-detail', args=[ann.pk])
+        response = self.client.patch(ann_url, {'classroom_id': other.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.statuses()['cat'], 'pending')  # ann's old seat went to the waitlist
+        bob = Enrollment.objects.get(full_name='bob')
+        response = self.client.patch(
+            reverse('enrollment-detail', args=[bob.pk]), {'classroom_id': other.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.patch(ann_url, {'status': 'cancelled'}, format='json')
+        response = self.client.patch(ann_url, {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Enrollment.objects.filter(classroom=other, status__in=['pending', 'confirmed']).count(), 1)
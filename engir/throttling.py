@@ -0,0 +1,95 @@
+"""Token-bucket throttles stored in the shared Django cache.
+
+Each bucket holds up to N tokens and refills continuously at N per period
+(rates use DRF's ``'N/period'`` syntax in ``settings.THROTTLE_RATES``). DRF runs
+throttles in ``APIView.initial()``, so rejected requests never reach serializer
+validation, capacity COUNTs or password hashing.
+"""
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import metrics
+from .models import normalize_login
+
+THROTTLED_REQUESTS = metrics.Counter('engir_throttled_requests_total', 'Requests rejected by a throttle.', ('scope',))
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache = default_cache
+    cache_format = 'engir:throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # Rates are resolved per request in allow_request() so the scope can come from the view.
+        self.wait_seconds = None
+
+    def get_rate(self):
+        return getattr(settings, 'THROTTLE_RATES', {}).get(self.scope)
+
+    def get_scope(self, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        self.rate = self.get_rate() if self.scope else None
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        refill_per_second = capacity / self.duration
+        now = self.timer()
+        tokens, updated_at = self.cache.get(self.key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill_per_second
+            THROTTLED_REQUESTS.inc(scope=self.scope)
+            return False
+        # A read-modify-write on the shared cache: concurrent workers may overshoot by a token or two.
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ScopedIPThrottle(TokenBucketThrottle):
+    """Bucket per client IP, scoped by the view's ``throttle_scope``."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class ScopedUserThrottle(ScopedIPThrottle):
+    """Bucket per authenticated user (falling back to IP), under ``<throttle_scope>_user``."""
+
+    def get_scope(self, view):
+        scope = super().get_scope(view)
+        return f'{scope}_user' if scope else None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Bucket per submitted username so one account cannot be hammered from many IPs."""
+
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        username = data.get('username') or data.get('email')
+        if not username:
+            return None
+        # Keyed like login resolves it, so case variants of one account share a bucket.
+        return self.cache_format % {'scope': self.scope, 'ident': normalize_login(str(username))[:150]}
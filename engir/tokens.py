@@ -0,0 +1,27 @@
+"""JWT revocation without database lookups.
+
+Revoked ``jti`` values are kept in the shared cache (fronted by a small in-process
+LRU) only until the token would have expired anyway, so the denylist garbage-collects
+itself and stays proportional to the number of live revoked tokens.
+"""
+import time
+
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import TwoTierCache
+
+revoked_tokens = TwoTierCache('revoked_jti', maxsize=4096, local_ttl=300)
+
+
+def _remaining_lifetime(token) -> int:
+    return max(int(token.get('exp', 0) - time.time()), 1)
+
+
+def revoke(token) -> bool:
+    """Deny ``token`` until it expires; returns ``False`` if it was already revoked."""
+    return revoked_tokens.add(token.get(api_settings.JTI_CLAIM), True, ttl=_remaining_lifetime(token))
+
+
+def is_revoked(token) -> bool:
+    jti = token.get(api_settings.JTI_CLAIM)
+    return bool(jti and revoked_tokens.get(jti))
@@ -2,30 +2,54 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    AuthTokenRefreshView,
     AuthTokenView,
+    BatchView,
+    CatalogViewSet,
+    ClassroomCalendarView,
     ClassroomViewSet,
+    EnrollmentFunnelView,
     EnrollmentViewSet,
+    LogoutView,
     MeView,
+    PersonalCalendarView,
     SessionViewSet,
     StudentDashboardView,
     StudentRegisterView,
+    SyncView,
     TeacherDashboardView,
     TeacherRegisterView,
     TeacherViewSet,
+    ingest_auth_view,
+    playback_verify_view,
+    presence_heartbeat_view,
+    session_viewers_view,
 )
 
 router = DefaultRouter()
 router.register('teachers', TeacherViewSet)
 router.register('classes', ClassroomViewSet, basename='classroom')
+router.register('catalog', CatalogViewSet, basename='catalog')
 router.register('enrollments', EnrollmentViewSet, basename='enrollment')
 router.register('sessions', SessionViewSet, basename='session')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', AuthTokenView.as_view(), name='auth-login'),
+    path('auth/refresh/', AuthTokenRefreshView.as_view(), name='auth-refresh'),
+    path('auth/logout/', LogoutView.as_view(), name='auth-logout'),
     path('auth/register/teacher/', TeacherRegisterView.as_view(), name='auth-register-teacher'),
     path('auth/register/student/', StudentRegisterView.as_view(), name='auth-register-student'),
     path('auth/me/', MeView.as_view(), name='auth-me'),
+    path('calendar/classes/<str:code>.ics', ClassroomCalendarView.as_view(), name='classroom-calendar'),
+    path('calendar/<str:token>.ics', PersonalCalendarView.as_view(), name='calendar-feed'),
+    path('ingest/auth/', ingest_auth_view, name='ingest-auth'),
+    path('playback/verify/', playback_verify_view, name='playback-verify'),
+    path('presence/heartbeat/', presence_heartbeat_view, name='presence-heartbeat'),
+    path('sessions/<int:pk>/viewers/', session_viewers_view, name='session-viewers'),
     path('dashboard/teacher/', TeacherDashboardView.as_view(), name='teacher-dashboard'),
     path('dashboard/student/', StudentDashboardView.as_view(), name='student-dashboard'),
+    path('analytics/funnel/', EnrollmentFunnelView.as_view(), name='enrollment-funnel'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('sync/<str:resource>/', SyncView.as_view(), name='sync'),
 ]
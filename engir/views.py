@@ -1,25 +1,60 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from rest_framework import filters, generics, permissions, status, viewsets
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import filters, generics, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
-
-from .models import Classroom, Enrollment, Session, Student, Teacher
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from . import (
+    analytics,
+    batch,
+    conflicts,
+    ics,
+    ingest,
+    metrics,
+    playback,
+    playback_token,
+    presence,
+    projections,
+    sync,
+    tagging,
+    tokens,
+    waitlist,
+)
+from .caching import classroom_for_code, classroom_id_for_code, normalize_class_code
+from .models import Classroom, ClassroomCatalogEntry, Enrollment, Session, Student, Teacher, Tombstone
 from .permissions import IsStudentUser, IsTeacherOwnerOrReadOnly, IsTeacherUser
 from .serializers import (
     AuthTokenSerializer,
+    BulkEnrollmentStatusSerializer,
     ClassroomSerializer,
     EnrollmentSerializer,
+    RotatingTokenRefreshSerializer,
     SessionSerializer,
     StudentRegistrationSerializer,
     StudentSerializer,
     TeacherRegistrationSerializer,
     TeacherSerializer,
+    TokenRevokeSerializer,
     UserSerializer,
 )
+from .throttling import LoginUsernameThrottle, ScopedIPThrottle, ScopedUserThrottle
 
 User = get_user_model()
 
@@ -31,12 +66,28 @@ class TeacherViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('full_name', 'email', 'headline')
 
 
-class ClassroomViewSet(viewsets.ModelViewSet):
+class ValuesListMixin:
+    """Serve ``list`` from a ``values()`` projection instead of the model serializer."""
+
+    project_queryset = None
+    represent_rows = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.project_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.represent_rows(page))
+        return Response(self.represent_rows(queryset))
+
+
+class ClassroomViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = ClassroomSerializer
     permission_classes = [IsTeacherOwnerOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ('title', 'code', 'teacher__full_name')
     ordering_fields = ('starts_at', 'created_at')
+    project_queryset = staticmethod(projections.classroom_values)
+    represent_rows = staticmethod(projections.represent_classrooms)
 
     def get_queryset(self):
         queryset = Classroom.objects.select_related('teacher').prefetch_related('enrollments', 'sessions')
@@ -46,6 +97,8 @@ class ClassroomViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(teacher_id=teacher_id)
         if is_public is not None:
             queryset = queryset.filter(is_public=is_public.lower() == 'true')
+        tags = tagging.parse_tags_param(self.request.query_params.get('tags', ''))
+        queryset = tagging.filter_by_tags(queryset, tags, self.request.query_params.get('tags_match', tagging.MATCH_ANY))
         mine = self.request.query_params.get('mine')
         queryset = queryset.order_by('-created_at')
         if mine and mine.lower() == 'true' and hasattr(self.request.user, 'teacher_profile'):
@@ -62,22 +115,77 @@ class ClassroomViewSet(viewsets.ModelViewSet):
         teacher = getattr(self.request.user, 'teacher_profile', None)
         if not teacher or serializer.instance.teacher != teacher:
             raise PermissionDenied('You can only update your own classrooms.')
-        serializer.save()
+        # A reassignment that raced past the serializer check trips the exclusion constraint.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError as exc:
+            if not conflicts.is_overlap_violation(exc):
+                raise
+            found = conflicts.reassignment_conflicts(serializer.instance, serializer.validated_data['teacher'].pk)
+            raise ValidationError(
+                {'teacher_id': [conflicts.describe(conflict) for conflict in found] or ['Overlaps another session of this teacher.']}
+            ) from exc
+
+    @action(detail=False, methods=['get'], url_path='tags')
+    def tag_facets(self, request):
+        """Tag counts over the classrooms matching the current filters."""
+        return Response(tagging.tag_facets(self.filter_queryset(self.get_queryset())))
 
     @action(detail=False, methods=['get'], url_path=r'code/(?P<code>[A-Za-z0-9]+)')
     def by_code(self, request, code: str):
-        classroom = Classroom.objects.filter(code=code.upper()).select_related('teacher').first()
+        classroom = classroom_for_code(code, Classroom.objects.select_related('teacher'))
         if not classroom:
             return Response({'detail': 'Class not found.'}, status=404)
         serializer = self.get_serializer(classroom)
         return Response(serializer.data)
 
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class CatalogViewSet(ValuesListMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Public classroom catalogue served from the ``ClassroomCatalogEntry`` read model."""
+
+    queryset = ClassroomCatalogEntry.objects.all()
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ('classroom_created_at', 'next_session_starts_at', 'seats_available')
+    project_queryset = staticmethod(projections.catalog_values)
+    represent_rows = staticmethod(projections.represent_catalog)
+
+    def get_queryset(self):
+        queryset = ClassroomCatalogEntry.objects.filter(is_public=True)
+        params = self.request.query_params
+        if params.get('teacher'):
+            queryset = queryset.filter(teacher_id=params['teacher'])
+        if params.get('available', '').lower() == 'true':
+            queryset = queryset.filter(is_full=False)
+        if params.get('upcoming', '').lower() == 'true':
+            queryset = queryset.filter(next_session_starts_at__gte=timezone.now())
+        search = params.get('search', '').strip().lower()
+        if search:
+            for term in search.split():
+                queryset = queryset.filter(search_text__contains=term)
+        tags = tagging.parse_tags_param(params.get('tags', ''))
+        queryset = tagging.filter_by_tags(queryset, tags, params.get('tags_match', tagging.MATCH_ANY), field='classroom_id')
+        return queryset.order_by('-classroom_created_at')
+
+    @action(detail=False, methods=['get'], url_path='tags')
+    def tag_facets(self, request):
+        return Response(tagging.tag_facets(self.filter_queryset(self.get_queryset()), field='classroom_id'))
+
+
+class EnrollmentViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = EnrollmentSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ('full_name', 'email', 'classroom__title', 'classroom__code')
     ordering_fields = ('created_at',)
+    project_queryset = staticmethod(projections.enrollment_values)
+    represent_rows = staticmethod(projections.represent_enrollments)
+    throttle_scope = 'enroll'
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [ScopedIPThrottle(), ScopedUserThrottle()]
+        return super().get_throttles()
 
     def get_queryset(self):
         queryset = Enrollment.objects.select_related('classroom', 'classroom__teacher', 'student')
@@ -96,6 +204,28 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=False, methods=['post'], url_path='bulk_status', permission_classes=[permissions.IsAuthenticated])
+    def bulk_status(self, request):
+        """Confirm, cancel or reset many enrollments at once; teachers act on their classes, staff on all."""
+        teacher = getattr(request.user, 'teacher_profile', None)
+        if request.user.is_staff:
+            classroom_ids = None
+        elif teacher is not None:
+            classroom_ids = Classroom.objects.filter(teacher=teacher).values('pk')
+        else:
+            raise PermissionDenied('Only teachers and staff can change enrollment statuses.')
+        serializer = BulkEnrollmentStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data['status']
+        results = waitlist.bulk_set_status(serializer.validated_data['ids'], target, classroom_ids=classroom_ids)
+        return Response(
+            {
+                'status': target,
+                'updated': sum(outcome == waitlist.UPDATED for outcome in results.values()),
+                'results': {str(enrollment_id): outcome for enrollment_id, outcome in results.items()},
+            }
+        )
+
 
 class SessionViewSet(viewsets.ModelViewSet):
     serializer_class = SessionSerializer
@@ -109,28 +239,68 @@ class SessionViewSet(viewsets.ModelViewSet):
         classroom_id = self.request.query_params.get('classroom')
         status_filter = self.request.query_params.get('status')
         upcoming = self.request.query_params.get('upcoming')
+        joinable = self.request.query_params.get('joinable')
         if classroom_id:
             queryset = queryset.filter(classroom_id=classroom_id)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if upcoming and upcoming.lower() == 'true':
             queryset = queryset.filter(starts_at__gte=timezone.now())
+        if joinable and joinable.lower() == 'true':
+            # Kept accurate by run_session_scheduler, so no time arithmetic is needed here.
+            queryset = queryset.filter(status__in=[Session.Status.SCHEDULED, Session.Status.LIVE])
         return queryset.order_by('starts_at')
 
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         teacher = getattr(self.request.user, 'teacher_profile', None)
-        classroom = serializer.validated_data.get('classroom')
-        if not teacher or classroom.teacher != teacher:
+        items = serializer.validated_data
+        if not isinstance(items, list):
+            items = [items]
+        if not teacher or any(item['classroom'].teacher != teacher for item in items):
             raise PermissionDenied('You can only schedule sessions for your classrooms.')
-        serializer.save()
+        self._save_checked(serializer)
 
     def perform_update(self, serializer):
         teacher = getattr(self.request.user, 'teacher_profile', None)
         if not teacher or serializer.instance.classroom.teacher != teacher:
             raise PermissionDenied('You can only edit sessions for your classrooms.')
-        serializer.save()
+        self._save_checked(serializer)
+
+    @staticmethod
+    def _save_checked(serializer):
+        # The exclusion constraint catches overlaps that raced past the serializer check.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError as exc:
+            if not conflicts.is_overlap_violation(exc):
+                raise
+            raise ValidationError({'starts_at': 'Overlaps another session of this teacher.'}) from exc
+
+    @action(
+        detail=True,
+        methods=['post'],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path='playback_token',
+        url_name='playback-token',
+    )
+    def issue_playback_token(self, request, pk=None):
+        """Signed, expiring watch (or host) URL for an enrolled student or the owning teacher."""
+        session = self.get_object()
+        grant = playback.grant_for(request.user, session)
+        if grant is None:
+            raise PermissionDenied('Only enrolled students and the teacher can join this session.')
+        return Response(playback.issue(session, *grant))
 
-    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser])
+    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser, IsTeacherOwnerOrReadOnly])
     def regenerate_stream_key(self, request, pk=None):
         session = self.get_object()
         key = session.regenerate_stream_credentials()
@@ -142,13 +312,13 @@ class SessionViewSet(viewsets.ModelViewSet):
             }
         )
 
-    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser])
+    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser, IsTeacherOwnerOrReadOnly])
     def start_stream(self, request, pk=None):
         session = self.get_object()
         session.mark_live()
         return Response(self.get_serializer(session).data)
 
-    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser])
+    @action(detail=True, methods=['post'], permission_classes=[IsTeacherUser, IsTeacherOwnerOrReadOnly])
     def end_stream(self, request, pk=None):
         session = self.get_object()
         recording_url = request.data.get('recording_url')
@@ -158,16 +328,41 @@ class SessionViewSet(viewsets.ModelViewSet):
 
 class AuthTokenView(TokenObtainPairView):
     serializer_class = AuthTokenSerializer
+    throttle_classes = [ScopedIPThrottle, LoginUsernameThrottle]
+    throttle_scope = 'login'
+
+
+class AuthTokenRefreshView(TokenRefreshView):
+    serializer_class = RotatingTokenRefreshSerializer
+
+
+class LogoutView(generics.GenericAPIView):
+    """Revoke a refresh token and, when present, the access token used for this request."""
+
+    serializer_class = TokenRevokeSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke(serializer.validated_data['refresh'])
+        if request.auth is not None and hasattr(request.auth, 'payload'):
+            tokens.revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class TeacherRegisterView(generics.CreateAPIView):
     serializer_class = TeacherRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedIPThrottle]
+    throttle_scope = 'register'
 
 
 class StudentRegisterView(generics.CreateAPIView):
     serializer_class = StudentRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedIPThrottle]
+    throttle_scope = 'register'
 
 
 class MeView(generics.RetrieveAPIView):
@@ -201,8 +396,11 @@ class TeacherDashboardView(APIView):
             {
                 'teacher': TeacherSerializer(teacher).data,
                 'classes': ClassroomSerializer(classes, many=True).data,
-                'upcoming_sessions': SessionSerializer(upcoming_sessions, many=True).data,
+                'upcoming_sessions': SessionSerializer(
+                    upcoming_sessions, many=True, context={'request': request}
+                ).data,
                 'recent_enrollments': EnrollmentSerializer(recent_enrollments, many=True).data,
+                'calendar_url': _calendar_url(request, 'teacher', teacher.pk),
             }
         )
 
@@ -228,5 +426,269 @@ class StudentDashboardView(APIView):
                 'student': StudentSerializer(student).data,
                 'enrollments': EnrollmentSerializer(enrollments, many=True).data,
                 'upcoming_sessions': SessionSerializer(upcoming_sessions, many=True).data,
+                'calendar_url': _calendar_url(request, 'student', student.pk),
             }
         )
+
+
+class EnrollmentFunnelView(APIView):
+    """Enrollment funnel from the rollup tables; teachers see their classes, staff see all."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_DAYS = 30
+
+    def get(self, request):
+        params = request.query_params
+        teacher = getattr(request.user, 'teacher_profile', None)
+        if request.user.is_staff:
+            classroom_ids = None
+        elif teacher is not None:
+            classroom_ids = Classroom.objects.filter(teacher=teacher).values('pk')
+        else:
+            raise PermissionDenied('Only teachers and staff can view enrollment analytics.')
+        classroom_id = params.get('classroom')
+        if classroom_id:
+            if not classroom_id.isdigit():
+                raise ValidationError({'classroom': 'Expected a classroom id.'})
+            if classroom_ids is not None and not classroom_ids.filter(pk=classroom_id).exists():
+                raise PermissionDenied('You can only view analytics for your classrooms.')
+            classroom_ids = [int(classroom_id)]
+        granularity = params.get('interval', analytics.DAY)
+        if granularity not in (analytics.HOUR, analytics.DAY):
+            raise ValidationError({'interval': 'Use "hour" or "day".'})
+        until = self._moment(params, 'until') or timezone.now()
+        since = self._moment(params, 'since') or until - timedelta(days=self.DEFAULT_DAYS)
+        if since >= until:
+            raise ValidationError({'since': 'Must be before until.'})
+        return Response(
+            analytics.funnel(
+                since, until, granularity=granularity, classroom_ids=classroom_ids, source=params.get('source')
+            )
+        )
+
+    @staticmethod
+    def _moment(params, name):
+        raw = params.get(name)
+        if not raw:
+            return None
+        moment = parse_datetime(raw)
+        if moment is None:
+            day = parse_date(raw)
+            if day is None:
+                raise ValidationError({name: 'Expected an ISO date or datetime.'})
+            moment = datetime(day.year, day.month, day.day)
+        return moment if timezone.is_aware(moment) else moment.replace(tzinfo=dt_timezone.utc)
+
+
+def _represent_classes(ids):
+    return projections.represent_classrooms(projections.classroom_values(Classroom.objects.filter(id__in=ids)))
+
+
+def _represent_sessions(ids):
+    sessions = Session.objects.select_related('classroom', 'classroom__teacher').filter(id__in=ids)
+    return SessionSerializer(sessions, many=True).data
+
+
+def _represent_enrollments(ids):
+    return projections.represent_enrollments(projections.enrollment_values(Enrollment.objects.filter(id__in=ids)))
+
+
+class SyncView(APIView):
+    """Delta sync: rows changed and ids deleted since ``updated_since`` (the previous response's cursor)."""
+
+    permission_classes = [permissions.AllowAny]
+    RESOURCES = {
+        'classes': (Tombstone.Resource.CLASSROOM, _represent_classes),
+        'sessions': (Tombstone.Resource.SESSION, _represent_sessions),
+        'enrollments': (Tombstone.Resource.ENROLLMENT, _represent_enrollments),
+    }
+
+    def get(self, request, resource):
+        if resource not in self.RESOURCES:
+            return Response({'detail': 'Unknown resource.'}, status=status.HTTP_404_NOT_FOUND)
+        tombstone_resource, represent = self.RESOURCES[resource]
+        try:
+            limit = min(int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE)), settings.SYNC_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+        try:
+            page = sync.changes(
+                tombstone_resource,
+                self._scope(request, resource),
+                represent,
+                request.query_params.get('updated_since'),
+                max(limit, 1),
+            )
+        except sync.ExpiredCursor as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_410_GONE)
+        except sync.InvalidCursor as exc:
+            raise ValidationError({'updated_since': str(exc)})
+        return Response(page)
+
+    @staticmethod
+    def _scope(request, resource):
+        if resource == 'classes':
+            return Classroom.objects.all()
+        if resource == 'sessions':
+            return Session.objects.all()
+        user = request.user
+        if not user.is_authenticated:
+            raise NotAuthenticated()
+        if user.is_staff:
+            return Enrollment.objects.all()
+        teacher = getattr(user, 'teacher_profile', None)
+        if teacher is not None:
+            return Enrollment.objects.filter(classroom__teacher=teacher)
+        return Enrollment.objects.filter(student__user=user)
+
+
+class BatchView(APIView):
+    """Several read-only API calls in one round trip; each sub-request keeps its own permissions."""
+
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+    # Only GET/HEAD sub-requests run here, so the POST must not pin the client to the primary.
+    replica_reads = True
+
+    def post(self, request):
+        try:
+            items = batch.parse(request.data.get('requests'), settings.BATCH_MAX_REQUESTS)
+        except (AttributeError, batch.BatchError) as exc:
+            raise ValidationError({'requests': str(exc) or 'Expected an object with a "requests" list.'})
+        results = batch.execute(
+            request._request,
+            request.user,
+            request.auth,
+            items,
+            parallel=bool(request.data.get('parallel')),
+            max_workers=settings.BATCH_MAX_WORKERS,
+            excluded_view=BatchView,
+        )
+        return HttpResponse(batch.render(results), content_type='application/json')
+
+
+def _calendar_url(request, kind: str, pk: int) -> str:
+    return request.build_absolute_uri(reverse('calendar-feed', args=[ics.feed_token(kind, pk)]))
+
+
+def _classroom_feed(code):
+    # The code lookup is cached, so revalidating a class feed needs no database query.
+    classroom_id = classroom_id_for_code(code)
+    if classroom_id is None:
+        return None
+    return f'Engir {normalize_class_code(code)}', [classroom_id]
+
+
+def _personal_feed(token):
+    parsed = ics.parse_feed_token(token)
+    if parsed is None:
+        return None
+    kind, pk = parsed
+    if kind == 'teacher':
+        classroom_ids = Classroom.objects.filter(teacher_id=pk).values_list('id', flat=True)
+        return 'Engir teaching schedule', list(classroom_ids)
+    if kind == 'student':
+        classroom_ids = (
+            Enrollment.objects.filter(student_id=pk)
+            .exclude(status=Enrollment.Status.CANCELLED)
+            .values_list('classroom_id', flat=True)
+        )
+        return 'Engir classes', list(classroom_ids)
+    return None
+
+
+class CalendarFeedView(View):
+    """Serve an iCalendar feed with ``ETag``/``Last-Modified`` so polling clients mostly get ``304``.
+
+    Subclasses set ``feed`` (the metrics label) and ``resolve``, a function mapping the URL kwargs to
+    ``(calendar name, classroom ids)``, or ``None`` when the feed does not exist.
+    """
+
+    feed = ''
+
+    def get(self, request, **kwargs):
+        feed = self.resolve(**kwargs)
+        if feed is None:
+            ics.FEED_REQUESTS.inc(feed=self.feed, result='not_found')
+            return HttpResponseNotFound()
+        name, classroom_ids = feed
+        versions = ics.versions_for(classroom_ids)
+        etag, last_modified = ics.feed_validators(versions)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = StreamingHttpResponse(ics.stream_feed(name, versions), content_type=ics.CONTENT_TYPE)
+            ics.FEED_REQUESTS.inc(feed=self.feed, result='rendered')
+        else:
+            ics.FEED_REQUESTS.inc(feed=self.feed, result='not_modified')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class ClassroomCalendarView(CalendarFeedView):
+    feed = 'classroom'
+    resolve = staticmethod(_classroom_feed)
+
+
+class PersonalCalendarView(CalendarFeedView):
+    feed = 'personal'
+    resolve = staticmethod(_personal_feed)
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@csrf_exempt
+@require_POST
+def ingest_auth_view(request):
+    """Media-server callback: any 2xx lets the stream through, 403 rejects it."""
+    secret = settings.INGEST_SECRET
+    # A header, not a query parameter, so the secret stays out of access logs.
+    if not secret or not constant_time_compare(request.headers.get('X-Ingest-Secret', ''), secret):
+        return HttpResponse(status=401)
+    call = request.POST.get('call', '')
+    stream_key = request.POST.get('name', '')
+    if ingest.authorize(call, stream_key, auto_live=settings.INGEST_AUTO_LIVE):
+        return HttpResponse(status=204)
+    return HttpResponse(status=403)
+
+
+def playback_verify_view(request):
+    """Edge ``auth_request`` target: checks a playback token using only the signing keys.
+
+    No database or cache access, so a crowd joining at once costs only CPU.
+    """
+    token = request.GET.get('token') or request.headers.get('X-Playback-Token', '')
+    session_id = request.GET.get('session') or request.headers.get('X-Playback-Session')
+    scope = request.GET.get('scope', playback_token.SCOPE_PLAY)
+    try:
+        playback_token.verify(token, playback.signing_keys(), session_id=session_id, scope=scope)
+    except playback_token.InvalidToken:
+        playback.VERIFICATIONS.inc(result='denied')
+        return HttpResponse(status=403)
+    playback.VERIFICATIONS.inc(result='allowed')
+    return HttpResponse(status=204)
+
+
+@csrf_exempt
+@require_POST
+def presence_heartbeat_view(request):
+    """Viewer heartbeat authenticated by the playback token; no database access."""
+    token = request.POST.get('token') or request.headers.get('X-Playback-Token', '')
+    try:
+        claims = playback_token.verify(token, playback.signing_keys())
+    except playback_token.InvalidToken:
+        return HttpResponse(status=403)
+    kind, _, subject_id = claims['sub'].partition(':')
+    if kind == 'student' and subject_id.isdigit():
+        presence.record_heartbeat(claims['sid'], int(subject_id))
+    return HttpResponse(status=204)
+
+
+def session_viewers_view(request, pk):
+    return JsonResponse({'session': pk, 'viewers': presence.live_viewers(pk)})
@@ -0,0 +1,148 @@
+"""Seat admission and the per-classroom waitlist.
+
+Admissions and promotions for a classroom serialise on its row lock. Under the lock,
+the seat count reads only seat holders (``enrollment_class_status_idx``), and the
+waitlist is read from its head in arrival order (``enrollment_waitlist_idx``). So
+admitting one student or promoting N students costs the same whether ten or ten
+thousand students are waiting. ``bulk_set_status`` moves many enrollments under the
+same locks with one ``UPDATE`` and keeps the funnel rollups and waitlist in step.
+"""
+from collections import Counter
+from typing import Dict, Iterable
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import analytics, catalog, metrics
+from .changes import change_seq_expression
+from .models import Classroom, Enrollment
+
+SEAT_STATUSES = (Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED)
+BULK_STATUSES = (Enrollment.Status.PENDING, Enrollment.Status.CONFIRMED, Enrollment.Status.CANCELLED)
+# Per-enrollment outcomes of bulk_set_status.
+UPDATED, UNCHANGED, FULL, NOT_FOUND = 'updated', 'unchanged', 'full', 'not_found'
+
+WAITLIST_PROMOTIONS = metrics.Counter('engir_waitlist_promotions_total', 'Waitlisted enrollments given a seat.')
+BULK_STATUS_CHANGES = metrics.Counter(
+    'engir_enrollment_bulk_status_total', 'Enrollments moved by bulk status changes.', ('status',)
+)
+
+
+def lock_classroom(classroom_id: int) -> Classroom:
+    return Classroom.objects.select_for_update().only('id', 'capacity').get(pk=classroom_id)
+
+
+def lock_classrooms(classroom_ids) -> Dict[int, Classroom]:
+    """Lock several classrooms in primary-key order, so two callers never wait on each other in a cycle."""
+    return {
+        classroom.pk: classroom
+        for classroom in Classroom.objects.select_for_update()
+        .filter(pk__in=classroom_ids)
+        .order_by('pk')
+        .only('id', 'capacity')
+    }
+
+
+def seats_taken(classroom_id: int) -> int:
+    return Enrollment.objects.filter(classroom_id=classroom_id, status__in=SEAT_STATUSES).count()
+
+
+def admission_status(classroom: Classroom) -> str:
+    """Status for a new enrollment; call with ``classroom`` locked by ``lock_classroom``."""
+    if seats_taken(classroom.pk) < classroom.capacity:
+        return Enrollment.Status.PENDING
+    return Enrollment.Status.WAITLISTED
+
+
+def frees_seat(previous: tuple, current: tuple) -> bool:
+    """Whether moving an enrollment from ``previous`` to ``current`` ``(classroom_id, status)`` releases a seat."""
+    if previous[1] not in SEAT_STATUSES:
+        return False
+    return current is None or current[0] != previous[0] or current[1] not in SEAT_STATUSES
+
+
+def promote(classroom_id: int) -> int:
+    """Give free seats of ``classroom_id`` to the head of its waitlist; returns the number promoted."""
+    with transaction.atomic():
+        try:
+            classroom = lock_classroom(classroom_id)
+        except Classroom.DoesNotExist:
+            return 0
+        free = classroom.capacity - seats_taken(classroom_id)
+        if free <= 0:
+            return 0
+        promoted = list(
+            Enrollment.objects.select_for_update()
+            .filter(classroom_id=classroom_id, status=Enrollment.Status.WAITLISTED)
+            .order_by('id')[:free]
+        )
+        for enrollment in promoted:
+            # Saved one by one so the catalogue, rollups and other receivers see the change.
+            enrollment.status = Enrollment.Status.PENDING
+            enrollment.save(update_fields=['status', 'updated_at'])
+    if promoted:
+        WAITLIST_PROMOTIONS.inc(len(promoted))
+    return len(promoted)
+
+
+def bulk_set_status(enrollment_ids: Iterable[int], status: str, classroom_ids=None) -> Dict[int, str]:
+    """Move ``enrollment_ids`` to ``status`` with one ``UPDATE``; returns an outcome per id.
+
+    ``classroom_ids`` (a list or subquery, ``None`` for all) limits the classrooms the
+    caller may touch; other enrollments report ``not_found``. Enrollments that need a
+    seat get one in arrival order while seats last, the rest report ``full``. Seats
+    freed by the change go to the waitlist in the same transaction.
+    """
+    results = dict.fromkeys(enrollment_ids, NOT_FOUND)
+    scope = Enrollment.objects.filter(pk__in=list(results))
+    if classroom_ids is not None:
+        scope = scope.filter(classroom_id__in=classroom_ids)
+    with transaction.atomic():
+        # Classrooms before enrollments, as admissions, promotions and Enrollment.save/delete lock them.
+        classrooms = lock_classrooms(scope.order_by().values('classroom_id'))
+        rows = list(
+            scope.select_for_update()
+            .filter(classroom_id__in=list(classrooms))
+            .order_by('pk')
+            .values('id', 'classroom_id', 'source', 'status', 'created_at')
+        )
+        taken = Counter()
+        if status in SEAT_STATUSES and any(row['status'] not in SEAT_STATUSES for row in rows):
+            taken.update(
+                dict(
+                    Enrollment.objects.filter(classroom_id__in=list(classrooms), status__in=SEAT_STATUSES)
+                    .order_by()
+                    .values_list('classroom_id')
+                    .annotate(Count('id'))
+                )
+            )
+        changed, freed = [], set()
+        for row in rows:
+            classroom_id, previous = row['classroom_id'], row['status']
+            if previous == status:
+                results[row['id']] = UNCHANGED
+                continue
+            if status in SEAT_STATUSES and previous not in SEAT_STATUSES:
+                if taken[classroom_id] >= classrooms[classroom_id].capacity:
+                    results[row['id']] = FULL
+                    continue
+                taken[classroom_id] += 1
+            elif frees_seat((classroom_id, previous), (classroom_id, status)):
+                freed.add(classroom_id)
+            results[row['id']] = UPDATED
+            changed.append(row)
+        if changed:
+            Enrollment.objects.filter(pk__in=[row['id'] for row in changed]).update(
+                status=status, updated_at=timezone.now(), change_seq=change_seq_expression()
+            )
+            # QuerySet.update() sends no signals, so do what the Enrollment receivers would.
+            analytics.record_status_changes(
+                (row['created_at'], row['classroom_id'], row['source'], row['status'], status) for row in changed
+            )
+            catalog.schedule_refresh({row['classroom_id'] for row in changed})
+        for classroom_id in sorted(freed):
+            promote(classroom_id)
+    if changed:
+        BULK_STATUS_CHANGES.inc(len(changed), status=status)
+    return results
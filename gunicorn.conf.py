@@ -0,0 +1,21 @@
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+
+
+def on_starting(server):
+    if workers > 1:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        from engir.checks import shared_cache_configured
+
+        if not shared_cache_configured():
+            # Token revocation and rotation would only hold inside the worker that saw the logout.
+            server.log.error('Refusing to start %d workers on a process-local cache; set ENGIR_REDIS_URL.', workers)
+            raise SystemExit(1)
+    # Start every deployment with an empty metrics directory so stale worker snapshots are not summed.
+    metrics_dir = os.getenv('ENGIR_METRICS_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)